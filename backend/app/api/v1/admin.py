@@ -1,5 +1,6 @@
 # Admin API endpoints for user management
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
 from ...core.database import get_db
@@ -10,6 +11,7 @@ from ...core.security import get_password_hash
 from ...services.email_service import EmailService
 from ...schemas.user import UserResponse, UserCreate
 from ...schemas.patient import PatientCreate, PatientResponse
+from ...ml.model_loader import model_loader, resolve_model_path
 from pydantic import BaseModel, EmailStr
 
 router = APIRouter(tags=["admin"])
@@ -34,6 +36,13 @@ class CreatePatientWithAccountRequest(BaseModel):
     create_account: bool = True
     send_email: bool = True
 
+class RegisterModelVersionRequest(BaseModel):
+    version: str
+    model_path: str  # Relative to MODELS_DIR
+
+class SetDefaultModelRequest(BaseModel):
+    version: str
+
 class UserWithPasswordResponse(BaseModel):
     user: UserResponse
     password: str | None = None
@@ -217,7 +226,7 @@ async def list_users(
             "is_active": u.is_active,
             "created_at": u.created_at.isoformat() if u.created_at else None
         })
-        
+    
     return serialized_users
 
 @router.delete("/users/{user_id}")
@@ -246,3 +255,48 @@ async def delete_user(
     db.commit()
     
     return {"message": "User deleted successfully"}
+
+
+@router.get("/model")
+async def get_model_status(
+    current_user: User = Depends(require_admin)
+):
+    """Get model load state and lifecycle statistics - Admin only"""
+    return model_loader.get_stats()
+
+@router.post("/model/unload")
+async def unload_model(
+    current_user: User = Depends(require_admin)
+):
+    """Unload the model in every worker to free memory; it reloads on the next detection - Admin only"""
+    unloaded = model_loader.unload_model(reason="admin")
+    await run_in_threadpool(model_loader.publish_registry, unload=True)
+    return {"unloaded": unloaded, **model_loader.get_stats()}
+
+@router.post("/model/versions")
+async def register_model_version(
+    request: RegisterModelVersionRequest,
+    current_user: User = Depends(require_admin)
+):
+    """Register a .pt file under MODELS_DIR as a model version that can later be made the default - Admin only"""
+    try:
+        model_loader.register_version(request.version, resolve_model_path(request.model_path))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    await run_in_threadpool(model_loader.publish_registry)
+    return model_loader.get_stats()
+
+@router.put("/model/default")
+async def set_default_model_version(
+    request: SetDefaultModelRequest,
+    current_user: User = Depends(require_admin)
+):
+    """Atomically switch the model used for new detections in every worker - Admin only"""
+    try:
+        previous = await run_in_threadpool(model_loader.set_default_version, request.version)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    
+    await run_in_threadpool(model_loader.publish_registry)
+    return {"previous_version": previous, **model_loader.get_stats()}
\ No newline at end of file
@@ -1,29 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Callable, ContextManager, Dict, List, Optional
+from contextlib import contextmanager
+import asyncio
+import json
 from uuid import UUID
+from ...core.config import settings
 from ...core.database import get_db
+from ...core.metrics import IMAGE_QUALITY_REJECTIONS
 from ...schemas.detection import DetectionCreate, DetectionResponse
+from ...services.detection_jobs import FINAL_STAGES
 from ...services.detection_service import DetectionService
 from ...services.image_service import ImageService
 from ...dependencies.auth import get_current_active_dentist
 from ...models.user import User
+from ...utils.timing import StageTimer
 from ...utils.validation import validate_file_extension, validate_file_size
 
 router = APIRouter()
 detection_service = DetectionService()
 image_service = ImageService()
 
+def get_session_factory(request: Request) -> Callable[[], ContextManager[Session]]:
+    """Open sessions through get_db, or its override, for work that outlives the request"""
+    return contextmanager(request.app.dependency_overrides.get(get_db, get_db))
+
+def _reject_unusable_images(upload_results: List[Dict[str, Any]], filenames: List[str]):
+    """Delete the saved uploads and answer 422 with a retake prompt if any failed the quality gate"""
+    rejected = [
+        {"filename": filename, "issues": result["quality"]["issues"], "metrics": result["quality"]["metrics"]}
+        for filename, result in zip(filenames, upload_results)
+        if result.get("quality") is not None and not result["quality"]["passed"]
+    ]
+    if not rejected:
+        return
+    
+    for result in upload_results:
+        image_service.delete_file(result.get("local_path"))
+    for image in rejected:
+        for issue in image["issues"]:
+            IMAGE_QUALITY_REJECTIONS.labels(check=issue["check"]).inc()
+    raise HTTPException(
+        status_code=422,  # HTTP_422_UNPROCESSABLE_CONTENT only exists in recent Starlette
+        detail={
+            "message": "The image is not usable for caries detection. Please retake it.",
+            "retake": True,
+            "images": rejected
+        }
+    )
+
 @router.post("/", response_model=DetectionResponse, status_code=status.HTTP_201_CREATED)
 async def create_detection(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     patient_id: str = Form(...),
     image_type: Optional[str] = Form(None),
     notes: Optional[str] = Form(None),
+    annotate: bool = Form(True),
+    reuse_duplicate: bool = Form(False),
+    async_job: bool = Form(False),
+    check_quality: bool = Form(True),
     db: Session = Depends(get_db),
+    session_factory: Callable[[], ContextManager[Session]] = Depends(get_session_factory),
     current_user: User = Depends(get_current_active_dentist)
 ):
-    """Perform dental caries detection"""
+    """Perform dental caries detection
+    
+    If the patient already has a near-duplicate of the image (re-exported,
+    re-compressed or slightly cropped), the response's duplicate_of_id points
+    to it. With reuse_duplicate=true its findings and stored images are reused
+    instead of running inference and uploading the image again.
+    
+    With async_job=true the upload is stored as a pending detection and 202
+    is returned immediately; follow it with GET /{id}/status or the
+    GET /{id}/events stream.
+    
+    Captures that fail the quality gate get 422; check_quality=false analyzes them anyway.
+    """
     # Validate file
     if not validate_file_extension(file.filename):
         raise HTTPException(
@@ -31,9 +86,11 @@ async def create_detection(
             detail="Invalid file format. Only JPG, PNG, and BMP are allowed."
         )
     
-    # Save uploaded file (now returns dict with local_path and cloudinary info)
-    upload_result = await image_service.save_upload_file(file)
+    # Save uploaded file locally; Cloudinary upload waits for the duplicate check
+    upload_result = await image_service.save_upload_file(file, upload_to_cloudinary=False)
     file_path = upload_result.get("local_path")
+    if check_quality:
+        _reject_unusable_images([upload_result], [file.filename])
     
     try:
         # Create detection data
@@ -43,14 +100,72 @@ async def create_detection(
             notes=notes
         )
         
-        # Process detection with Cloudinary data
-        detection = detection_service.process_detection(
+        with StageTimer(upload_result["timings"]).stage("near_duplicate_lookup"):
+            near_duplicate = await run_in_threadpool(
+                detection_service.find_near_duplicate, db, UUID(patient_id), upload_result.get("phash")
+            )
+        if reuse_duplicate and near_duplicate is not None and near_duplicate.original_image_url:
+            # Point at the copy already stored instead of uploading another one
+            upload_result.update({
+                "cloudinary_url": near_duplicate.original_image_url,
+                "public_id": near_duplicate.original_image_public_id
+            })
+        else:
+            await run_in_threadpool(image_service.upload_to_cloudinary, upload_result)
+        
+        if async_job:
+            detection = await run_in_threadpool(
+                detection_service.create_pending_detection,
+                db=db,
+                image_path=file_path,
+                patient_id=UUID(patient_id),
+                dentist_id=current_user.id,
+                detection_data=detection_data,
+                original_image_cloudinary=upload_result,
+                image_phash=upload_result.get("phash"),
+                duplicate_of_id=near_duplicate.id if near_duplicate is not None else None
+            )
+            
+            # Runs in a worker thread after the response has been sent
+            background_tasks.add_task(
+                detection_service.run_detection_job,
+                session_factory=session_factory,
+                detection_id=detection.id,
+                detection_data=detection_data,
+                image_bytes=upload_result.get("content"),
+                render_annotated=annotate,
+                image_hash=upload_result.get("content_hash"),
+                near_duplicate_id=near_duplicate.id if near_duplicate is not None else None,
+                reuse_near_duplicate=reuse_duplicate
+            )
+            
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={
+                    "id": str(detection.id),
+                    "detection_id": detection.detection_id,
+                    "status": detection.status.value,
+                    "status_url": f"/api/v1/detections/{detection.id}/status",
+                    "events_url": f"/api/v1/detections/{detection.id}/events"
+                }
+            )
+        
+        # Process detection with Cloudinary data. Runs in a worker thread so that
+        # concurrent requests can be coalesced by the batch scheduler.
+        detection = await run_in_threadpool(
+            detection_service.process_detection,
             db=db,
             image_path=file_path,
             patient_id=UUID(patient_id),
             dentist_id=current_user.id,
             detection_data=detection_data,
-            original_image_cloudinary=upload_result
+            original_image_cloudinary=upload_result,
+            image_bytes=upload_result.get("content"),
+            render_annotated=annotate,
+            image_hash=upload_result.get("content_hash"),
+            image_phash=upload_result.get("phash"),
+            near_duplicate=near_duplicate,
+            reuse_near_duplicate=reuse_duplicate
         )
         
         return detection
@@ -63,6 +178,149 @@ async def create_detection(
             detail=f"Detection processing failed: {str(e)}"
         )
 
+@router.post("/batch", response_model=List[DetectionResponse], status_code=status.HTTP_201_CREATED)
+async def create_batch_detection(
+    files: List[UploadFile] = File(...),
+    patient_id: str = Form(...),
+    image_type: Optional[str] = Form(None),
+    notes: Optional[str] = Form(None),
+    annotate: bool = Form(True),
+    check_quality: bool = Form(True),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_dentist)
+):
+    """Perform dental caries detection on a series of images for one patient; none is analyzed if any fails the quality gate"""
+    if len(files) > settings.MAX_BATCH_IMAGES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many images. At most {settings.MAX_BATCH_IMAGES} images are allowed per batch."
+        )
+    
+    # Validate files
+    for file in files:
+        if not validate_file_extension(file.filename):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid file format for {file.filename}. Only JPG, PNG, and BMP are allowed."
+            )
+    
+    # Save uploaded files; Cloudinary uploads wait for the quality gate
+    upload_results = []
+    for file in files:
+        upload_results.append(await image_service.save_upload_file(file, upload_to_cloudinary=False))
+    if check_quality:
+        _reject_unusable_images(upload_results, [file.filename for file in files])
+    for upload_result in upload_results:
+        await run_in_threadpool(image_service.upload_to_cloudinary, upload_result)
+    
+    try:
+        # Create detection data
+        detection_data = DetectionCreate(
+            patient_id=UUID(patient_id),
+            image_type=image_type,
+            notes=notes
+        )
+        
+        # Process the whole series in one batch and one transaction, off the event loop
+        return await run_in_threadpool(
+            detection_service.process_batch_detection,
+            db=db,
+            uploads=upload_results,
+            patient_id=UUID(patient_id),
+            dentist_id=current_user.id,
+            detection_data=detection_data,
+            render_annotated=annotate
+        )
+    
+    except Exception as e:
+        # Clean up uploaded files on error
+        db.rollback()
+        for upload_result in upload_results:
+            image_service.delete_file(upload_result.get("local_path"))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch detection processing failed: {str(e)}"
+        )
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats(
+    current_user: User = Depends(get_current_active_dentist)
+):
+    """Get achieved micro-batch sizes for single-image detections"""
+    if detection_service.scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **detection_service.scheduler.get_stats()}
+
+@router.get("/pool/stats")
+async def get_inference_pool_stats(
+    current_user: User = Depends(get_current_active_dentist)
+):
+    """Get queue depth and utilization of the inference worker processes or shared inference server"""
+    if detection_service.inference_pool is None:
+        return {"enabled": False}
+    return {"enabled": True, **await run_in_threadpool(detection_service.inference_pool.get_stats)}
+
+@router.get("/cache/stats")
+async def get_inference_cache_stats(
+    current_user: User = Depends(get_current_active_dentist)
+):
+    """Get hit and miss counts for re-uploaded images"""
+    if detection_service.inference_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **detection_service.inference_cache.get_stats()}
+
+@router.get("/{detection_id}/status")
+async def get_detection_status(
+    detection_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_dentist)
+):
+    """Get the status and current stage of a detection job"""
+    return detection_service.get_job_status(db, detection_id)
+
+@router.get("/{detection_id}/events")
+async def stream_detection_events(
+    detection_id: UUID,
+    db: Session = Depends(get_db),
+    session_factory: Callable[[], ContextManager[Session]] = Depends(get_session_factory),
+    current_user: User = Depends(get_current_active_dentist)
+):
+    """Stream stage transitions of a detection job as Server-Sent Events
+    
+    Each event is named after the stage (queued, preprocessing, inference,
+    uploading, done or failed) and carries the job status as JSON. Stages
+    reached before the client connected are replayed first. The stream ends
+    after done or failed.
+    """
+    # Fail with 404 before starting the stream
+    detection_service.get_detection(db, detection_id)
+    
+    async def events():
+        # The request's session is closed once streaming starts, so use our own
+        with session_factory() as stream_db:
+            sent, last_stage = 0, None
+            while True:
+                job = await run_in_threadpool(detection_service.get_job_status, stream_db, detection_id)
+                # Jobs run by another process have no history here, only their current stage
+                if job["history"]:
+                    stages = [entry["stage"] for entry in job["history"][sent:]]
+                    sent = len(job["history"])
+                else:
+                    stages = [job["stage"]] if job["stage"] != last_stage else []
+                for stage in stages:
+                    last_stage = stage
+                    yield f"event: {stage}\ndata: {json.dumps({**job, 'stage': stage})}\n\n"
+                if last_stage in FINAL_STAGES:
+                    break
+                stream_db.expire_all()  # See status changes committed by the job
+                await asyncio.sleep(0.25)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/{detection_id}", response_model=DetectionResponse)
 async def get_detection(
     detection_id: UUID,
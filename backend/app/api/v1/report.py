@@ -9,17 +9,25 @@ from ...core.database import get_db
 from ...models.user import User
 from ...models.detection import Detection
 from ...models.patient import Patient
-from ...services.report_service import ReportService
 from ...services.email_service import EmailService
 from ...dependencies.auth import get_current_user, get_current_active_dentist
 from datetime import datetime
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
-report_service = ReportService()
+report_service = None  # Created on first report, so reportlab is not imported at startup
 email_service = EmailService()
 
 
+def get_report_service():
+    """ReportService, imported and created on first use"""
+    global report_service
+    if report_service is None:
+        from ...services.report_service import ReportService
+        report_service = ReportService()
+    return report_service
+
+
 class EmailReportRequest(BaseModel):
     """Request model for emailing a report"""
     recipient_email: EmailStr
@@ -67,7 +75,7 @@ async def download_detection_report(
     
     try:
         # Generate PDF
-        pdf_bytes = report_service.generate_detection_report(
+        pdf_bytes = get_report_service().generate_detection_report(
             detection=detection,
             patient=patient,
             include_images=True
@@ -121,7 +129,7 @@ async def email_detection_report(
     
     try:
         # Generate PDF
-        pdf_bytes = report_service.generate_detection_report(
+        pdf_bytes = get_report_service().generate_detection_report(
             detection=detection,
             patient=patient,
             include_images=True
@@ -13,8 +13,79 @@ class Settings(BaseSettings):
     
     # Model
     MODEL_PATH: str = "models/best.pt"
+    MODEL_VERSION: str = ""  # Name of the MODEL_PATH version; defaults to the file name
+    MODEL_VERSIONS: str = ""  # Extra versions to register, e.g. "candidate=models/candidate.pt"
+    MODELS_DIR: str = "models"  # The admin API only registers .pt files under this directory
+    MODEL_REGISTRY_FILE: str = "models/registry.json"  # Admin version changes, shared by every API worker on the host
     CONFIDENCE_THRESHOLD: float = 0.25
     IOU_THRESHOLD: float = 0.45
+    INFERENCE_BACKEND: str = "ultralytics"  # "ultralytics", "onnx" or "onnx_int8" (onnxruntime on CPU)
+    ONNX_INPUT_SIZE: int = 640
+    
+    # Preparation at load time: dummy inferences so the first real request runs at steady-state speed
+    MODEL_WARMUP_ENABLED: bool = True
+    MODEL_WARMUP_SHAPES: str = "1280x960,640x840"  # Image sizes (WIDTHxHEIGHT) to warm up: bitewing, periapical
+    MODEL_WARMUP_RUNS: int = 2  # Per shape; the last run is reported as steady state
+    MODEL_CHANNELS_LAST: bool = False  # NHWC weights (PyTorch backend); faster on some CPUs, measure first
+    
+    # Model lifecycle (0 disables)
+    MODEL_IDLE_TTL_MINUTES: float = 0
+    MODEL_MEMORY_LIMIT_MB: float = 0
+    MODEL_WATCHDOG_INTERVAL_SECONDS: float = 30
+    MAX_BATCH_IMAGES: int = 20  # Full-mouth bitewing series are 4-18 images
+    
+    # CPU threads and affinity for inference; python -m benchmarks threads recommends values for a host
+    INFERENCE_INTRA_OP_THREADS: int = 0  # torch/onnxruntime threads per forward pass; 0 keeps the library default (one per core)
+    INFERENCE_INTER_OP_THREADS: int = 0  # 0 keeps the library default
+    OPENCV_THREADS: int = -1  # Decode/resize/draw threads; 0 runs on the calling thread, -1 keeps OpenCV's default
+    INFERENCE_CPU_AFFINITY: str = ""  # e.g. "0-3": pins the shared inference server (INFERENCE_WORKER_CPUS pins worker processes); API workers are never pinned
+    
+    # Micro-batching of concurrent single-image detections
+    DETECTION_BATCHING_ENABLED: bool = True
+    DETECTION_MAX_BATCH_SIZE: int = 8
+    DETECTION_BATCH_WAIT_MS: float = 20.0
+    
+    # Inference worker processes (0 runs inference in the API process)
+    INFERENCE_WORKERS: int = 0  # Each worker holds its own model copy
+    INFERENCE_WORKER_CPUS: str = ""  # CPU set per worker, e.g. "0-1;2-3"; empty splits available CPUs evenly
+    
+    # Shared inference server: one model copy for all uvicorn workers on the host (overrides INFERENCE_WORKERS)
+    INFERENCE_SERVER_ENABLED: bool = False
+    INFERENCE_SERVER_SOCKET: str = "/tmp/caries-inference.sock"
+    INFERENCE_SERVER_AUTOSTART: bool = True  # Start it from the API when it is not running
+    INFERENCE_SERVER_SLOTS: int = 4  # Shared-memory image slots, and concurrent requests, per API worker
+    INFERENCE_SERVER_SLOT_MB: float = 16  # Largest decoded image passed through shared memory
+    INFERENCE_SERVER_CONNECT_TIMEOUT_SECONDS: float = 30
+    
+    # Pre-forking launcher (python -m app.launcher): loads the model once and forks the API workers
+    WEB_WORKERS: int = 1
+    WEB_PRELOAD_MODEL: bool = True  # With WEB_WORKERS > 1, workers share the launcher's model pages copy-on-write
+    
+    # Tiled inference for panoramic radiographs
+    TILED_INFERENCE_ENABLED: bool = True
+    TILE_SIZE: int = 640
+    TILE_OVERLAP: float = 0.2  # Fraction of the tile shared with its neighbour
+    TILE_MAX_COUNT: int = 24  # Tiles grow beyond TILE_SIZE to stay under this
+    TILE_MERGE_METHOD: str = "wbf"  # "wbf" or "nms"
+    TILE_MATCH_THRESHOLD: float = 0.5
+    
+    # Reuse findings for re-uploads of an identical image
+    INFERENCE_CACHE_ENABLED: bool = True
+    INFERENCE_CACHE_SIZE: int = 256
+    NEAR_DUPLICATE_MAX_DISTANCE: int = 8  # Differing bits out of 64 in the perceptual hash
+    
+    # Quality gate: reject unusable captures before inference (see app/ml/quality.py)
+    QUALITY_GATE_ENABLED: bool = True
+    QUALITY_MIN_SIDE_PX: int = 320
+    QUALITY_MIN_CONTRAST: float = 4.0  # Gray-level standard deviation; below it the image is blank
+    QUALITY_MAX_CLIPPED_FRACTION: float = 0.3  # Share of blown-out pixels
+    QUALITY_MIN_HIGHLIGHT_LEVEL: int = 48  # 99th-percentile gray level; below it the image is underexposed
+    QUALITY_MIN_SHARPNESS: float = 20.0  # Variance of the Laplacian at quarter size
+    
+    # Prometheus metrics
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""  # Bearer token Prometheus scrapes /metrics with; empty leaves /metrics off the API
+    PROMETHEUS_MULTIPROC_DIR: str = ""  # Shared directory for aggregating over uvicorn workers; clear it on deploy
     
     # Email Configuration (Resend API)
     RESEND_API_KEY: str = ""
@@ -26,6 +97,10 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "uploads"
     RESULTS_DIR: str = "results"
     
+    # Annotated images
+    ANNOTATED_IMAGE_FORMAT: str = "jpg"  # "jpg" or "webp"
+    ANNOTATED_IMAGE_QUALITY: int = 85
+    
     # Cloudinary
     CLOUDINARY_CLOUD_NAME: str = ""
     CLOUDINARY_API_KEY: str = ""
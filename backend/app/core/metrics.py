@@ -0,0 +1,163 @@
+import hmac
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+from sqlalchemy import event
+from starlette.requests import Request
+from .config import settings
+
+# Multiprocess mode is chosen when prometheus_client is imported, so the
+# directory must be in the environment first
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+
+INFERENCE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 12, 16, 24, 32)
+
+# HTTP
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response starts, by route template",
+    ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests being handled",
+    ["method"],
+    multiprocess_mode="livesum"
+)
+
+# Database connection pool
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Persistent connections the pool keeps, summed over workers",
+    multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connection checkouts")
+DB_POOL_CONNECTIONS_CREATED = Counter("db_pool_connections_created_total", "New database connections opened")
+
+# Models and inference
+MODEL_LOADED = Gauge(
+    "model_loaded",
+    "Processes holding the model version in memory",
+    ["version"],
+    multiprocess_mode="livesum"
+)
+MODEL_LOAD_SECONDS = Histogram("model_load_duration_seconds", "Model load time", ["backend"], buckets=INFERENCE_BUCKETS)
+MODEL_WARMUP_SECONDS = Histogram(
+    "model_warmup_duration_seconds",
+    "Dummy inferences run after a model load",
+    ["backend"],
+    buckets=INFERENCE_BUCKETS
+)
+MODEL_WARMUP_INFERENCE_SECONDS = Histogram(
+    "model_warmup_inference_duration_seconds",
+    "Forward pass time of the first and the last warm-up inference at the first shape",
+    ["backend", "phase"],
+    buckets=INFERENCE_BUCKETS
+)
+MODEL_UNLOADS = Counter("model_unloads_total", "Model versions unloaded", ["reason"])
+INFERENCE_SECONDS = Histogram(
+    "inference_duration_seconds",
+    "Forward pass time (including tile merging for tiled inference)",
+    ["mode"],
+    buckets=INFERENCE_BUCKETS
+)
+INFERENCE_BATCH_SIZE = Histogram(
+    "inference_batch_size",
+    "Images (or tiles) per forward pass",
+    ["mode"],
+    buckets=BATCH_SIZE_BUCKETS
+)
+IMAGE_QUALITY_REJECTIONS = Counter(
+    "image_quality_rejections_total",
+    "Uploads turned away by the quality gate, by failed check",
+    ["check"]
+)
+
+# Upstream services (cloudinary, resend, groq)
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "upstream_request_duration_seconds",
+    "Calls to external services",
+    ["service", "operation"]
+)
+UPSTREAM_ERRORS = Counter("upstream_errors_total", "Failed calls to external services", ["service", "operation"])
+
+@contextmanager
+def track_upstream(service: str, operation: str):
+    """Time a call to an external service, counting exceptions as errors
+    
+    Callers count error responses themselves with UPSTREAM_ERRORS.
+    """
+    start_time = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.labels(service, operation).inc()
+        raise
+    finally:
+        UPSTREAM_REQUEST_SECONDS.labels(service, operation).observe(time.perf_counter() - start_time)
+
+def instrument_engine(engine):
+    """Follow connection pool usage through SQLAlchemy pool events"""
+    DB_POOL_SIZE.set(engine.pool.size())
+    
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTIONS_CREATED.inc()
+    
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_CHECKED_OUT.inc()
+    
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+def route_template(request: Request) -> str:
+    """Path template of the route that handled a request, or "unmatched", so IDs don't explode the label set"""
+    route = request.scope.get("route")
+    if getattr(route, "path", None) is None:
+        return "unmatched"
+    # Newer FastAPI resolves included routers lazily and leaves their prefix out of route.path
+    included = request.scope.get("fastapi", {}).get("included_router")
+    prefix = getattr(getattr(included, "include_context", None), "prefix", "")
+    return prefix + route.path
+
+def scrape_authorized(authorization: Optional[str]) -> bool:
+    """Whether an Authorization header carries METRICS_TOKEN as a bearer token"""
+    expected = f"Bearer {settings.METRICS_TOKEN}".encode()
+    return bool(settings.METRICS_TOKEN) and hmac.compare_digest((authorization or "").encode(), expected)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Metrics in the Prometheus text format, aggregated over all workers in multiprocess mode"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_process_dead():
+    """Drop this worker's live gauges (in-progress requests, pool, loaded models) from the aggregate"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
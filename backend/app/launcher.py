@@ -0,0 +1,276 @@
+"""Pre-forking production launcher: loads the model once, then forks the uvicorn workers"""
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Callable, Dict, Any, List, Optional
+import numpy as np
+import psutil
+from .core.config import settings
+from .ml.inference_server import LAUNCHER_PID_ENV
+
+RESPAWN_DELAY_SECONDS = 1.0  # Between a worker exiting and its replacement, so a crash loop doesn't spin
+STOP_SIGNALS = {signal.SIGTERM, signal.SIGINT}
+
+def sample_image(seed: int = 0) -> np.ndarray:
+    """Random BGR image the size of a periapical radiograph, for warm-up and measurement"""
+    return np.random.default_rng(seed).integers(0, 256, size=(768, 1024, 3), dtype=np.uint8)
+
+def preload_model() -> float:
+    """Load the default model version and make sure it has run an inference
+    
+    Returns:
+        Load and warm-up time in ms
+    """
+    from .ml.model_loader import model_loader
+    from .ml.predictor import CariesDetector
+    
+    start_time = time.perf_counter()
+    model_loader.load_model()
+    if not model_loader.get_stats()["last_warmup"]:
+        CariesDetector().detect(sample_image())
+    return (time.perf_counter() - start_time) * 1000
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Listening socket created before forking; every worker accepts on it"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def memory_report(processes: Dict[int, str]) -> List[Dict[str, Any]]:
+    """Shared (PSS) and private (USS) memory of each process, in MB
+    
+    Args:
+        processes: Process label by pid; processes that have exited are skipped
+    """
+    rows = []
+    for pid, label in processes.items():
+        try:
+            info = psutil.Process(pid).memory_full_info()
+        except psutil.Error:
+            continue
+        uss = getattr(info, "uss", None)
+        pss = getattr(info, "pss", None)  # Linux only
+        rows.append({
+            "process": label,
+            "pid": pid,
+            "rss_mb": round(info.rss / (1024 * 1024), 1),
+            "pss_mb": round(pss / (1024 * 1024), 1) if pss is not None else None,
+            "uss_mb": round(uss / (1024 * 1024), 1) if uss is not None else None,
+            "shared_mb": round((info.rss - uss) / (1024 * 1024), 1) if uss is not None else None
+        })
+    return rows
+
+def format_memory_report(rows: List[Dict[str, Any]]) -> str:
+    """Memory report as a text table, with totals"""
+    def cell(value):
+        return "-" if value is None else f"{value:.1f}"
+    
+    lines = [f"{'process':<10} {'pid':>8} {'rss_mb':>9} {'pss_mb':>9} {'uss_mb':>9} {'shared_mb':>10}"]
+    for row in rows:
+        lines.append(
+            f"{row['process']:<10} {row['pid']:>8} {cell(row['rss_mb']):>9} {cell(row['pss_mb']):>9} "
+            f"{cell(row['uss_mb']):>9} {cell(row['shared_mb']):>10}"
+        )
+    
+    total_pss = sum(row["pss_mb"] for row in rows if row["pss_mb"] is not None)
+    total_rss = sum(row["rss_mb"] for row in rows)
+    lines.append(f"Total PSS {total_pss:.1f} MB (sum of RSS {total_rss:.1f} MB)")
+    return "\n".join(lines)
+
+def _after_fork():
+    """Reset state a worker must not share with the launcher"""
+    from .core.database import engine
+    from .ml.model_loader import model_loader
+    
+    for signum in (signal.SIGTERM, signal.SIGUSR1, signal.SIGCHLD):
+        signal.signal(signum, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+    
+    gc.enable()
+    # Pooled connections belong to the launcher; open new ones in this process
+    engine.dispose(close=False)
+    model_loader.after_fork()
+
+class Launcher:
+    """Forks workers running target(index) and restarts any that exit until stopped"""
+    
+    def __init__(self, workers: int, target: Callable[[int], None]):
+        self.workers = workers
+        self.target = target
+        self.children: Dict[int, int] = {}  # Worker index by pid
+        self.stopping = False
+    
+    def spawn(self, index: int) -> int:
+        # A stop arriving before the child is recorded would never reach it
+        signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                _after_fork()
+                self.target(index)
+            except SystemExit as exc:
+                exit_code = exc.code if isinstance(exc.code, int) else 1
+            except BaseException:
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(exit_code)
+        
+        self.children[pid] = index
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+        return pid
+    
+    def stop(self, signum: Optional[int] = None, frame=None):
+        """Ask every worker to shut down gracefully"""
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    def processes(self) -> Dict[int, str]:
+        """This process and its workers, labelled for memory_report"""
+        processes = {os.getpid(): "launcher"}
+        for pid, index in sorted(self.children.items(), key=lambda item: item[1]):
+            processes[pid] = f"worker-{index}"
+        return processes
+    
+    def print_memory_report(self, signum: Optional[int] = None, frame=None):
+        print(format_memory_report(memory_report(self.processes())), flush=True)
+    
+    def run(self):
+        """Start the workers and supervise them until SIGTERM/SIGINT"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGUSR1, self.print_memory_report)
+        for index in range(self.workers):
+            self.spawn(index)
+        
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = self.children.pop(pid, None)
+            if index is None or self.stopping:
+                continue
+            
+            print(f"Worker {index} (pid {pid}) exited with code {os.waitstatus_to_exitcode(status)}; restarting")
+            time.sleep(RESPAWN_DELAY_SECONDS)
+            if not self.stopping:
+                self.spawn(index)
+
+def _serve(sock: socket.socket, host: str, port: int) -> Callable[[int], None]:
+    def target(index: int):
+        import uvicorn
+        from .main import app
+        
+        config = uvicorn.Config(app, host=host, port=port, timeout_graceful_shutdown=30)
+        uvicorn.Server(config).run(sockets=[sock])
+    return target
+
+def _measure(ready_fd: int, preloaded: bool) -> Callable[[int], None]:
+    def target(index: int):
+        from .ml.model_loader import model_loader
+        from .ml.predictor import CariesDetector
+        
+        # What a worker holds after serving its first detection
+        if not preloaded:
+            model_loader.load_model()
+        CariesDetector().detect(sample_image(index + 1))
+        gc.collect()
+        os.write(ready_fd, b".")
+        signal.pause()
+    return target
+
+def measure(workers: int, preloaded: bool) -> Dict[str, Any]:
+    """Fork workers that each run one detection, then report their memory
+    
+    Returns:
+        Per-process rows from memory_report and the total PSS
+    """
+    read_fd, write_fd = os.pipe()
+    launcher = Launcher(workers, _measure(write_fd, preloaded))
+    for index in range(workers):
+        launcher.spawn(index)
+    
+    ready = 0
+    while ready < workers:
+        chunk = os.read(read_fd, workers - ready)
+        if not chunk:
+            break
+        ready += len(chunk)
+    rows = memory_report(launcher.processes())
+    
+    launcher.stop()
+    for pid in list(launcher.children):
+        os.waitpid(pid, 0)
+    os.close(read_fd)
+    os.close(write_fd)
+    return {
+        "preloaded": preloaded,
+        "workers": workers,
+        "processes": rows,
+        "total_pss_mb": round(sum(row["pss_mb"] or 0 for row in rows), 1)
+    }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m app.launcher", description="Preload the model and fork the API workers")
+    parser.add_argument("--workers", type=int, default=settings.WEB_WORKERS)
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--no-preload", dest="preload", action="store_false", default=settings.WEB_PRELOAD_MODEL,
+                        help="Fork without loading the model; each worker loads its own on first use")
+    parser.add_argument("--measure", action="store_true",
+                        help="Report shared and private memory per worker after one detection each, then exit")
+    args = parser.parse_args(argv)
+    
+    # Objects freed in the launcher leave holes in pages the workers share;
+    # collect once before forking instead (see the gc.freeze documentation)
+    gc.disable()
+    os.environ[LAUNCHER_PID_ENV] = str(os.getpid())  # A shared inference server exits with the launcher, not a worker
+    from .main import app  # noqa: F401 - import everything the workers need before forking
+    from .core.database import engine
+    from .api.v1.detection import detection_service
+    
+    if args.preload and detection_service.inference_pool is not None:
+        print("Inference runs in worker processes or the shared inference server; not preloading the model")
+        args.preload = False
+    if args.preload and args.workers < 2:
+        # A single worker has no one to share the pages with; keep lazy loading
+        print("One worker; not preloading the model")
+        args.preload = False
+    if args.preload:
+        print(f"Model preloaded and warmed up in {preload_model():.0f} ms")
+    
+    engine.dispose()
+    gc.collect()
+    gc.freeze()
+    
+    if args.measure:
+        result = measure(args.workers, args.preload)
+        print(format_memory_report(result["processes"]))
+        print(json.dumps(result))
+        return
+    
+    sock = bind_socket(args.host, args.port)
+    print(f"Serving on {args.host}:{args.port} with {args.workers} workers (launcher pid {os.getpid()})")
+    Launcher(args.workers, _serve(sock, args.host, args.port)).run()
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from .core.config import settings
 from .core.database import Base, engine
+from .core import metrics
 from .api.v1 import api_router
 from .ml.model_loader import model_loader
 import os
+import time
+from typing import Optional
 
 # ---------------------------------------------------------
 # Create database tables
@@ -67,6 +70,37 @@ async def options_handler(request: Request):
         }
     )
 
+# ---------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------
+if settings.METRICS_ENABLED:
+    metrics.instrument_engine(engine)
+    
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        """Per-route latency and in-flight requests (streaming responses count until their first byte)"""
+        in_progress = metrics.HTTP_REQUESTS_IN_PROGRESS.labels(request.method)
+        in_progress.inc()
+        start_time = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            in_progress.dec()
+            metrics.HTTP_REQUEST_SECONDS.labels(
+                request.method, metrics.route_template(request), str(status_code)
+            ).observe(time.perf_counter() - start_time)
+    
+    if settings.METRICS_TOKEN:
+        @app.get("/metrics", include_in_schema=False)
+        async def prometheus_metrics(authorization: Optional[str] = Header(None)):
+            if not metrics.scrape_authorized(authorization):
+                return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+            content, content_type = metrics.render_metrics()
+            return Response(content=content, media_type=content_type)
+
 # ---------------------------------------------------------
 # Static file serving
 # ---------------------------------------------------------
@@ -95,6 +129,9 @@ app.include_router(api_router, prefix="/api/v1")
 @app.on_event("startup")
 async def startup_event():
     print("✅ API started successfully!")
+    if model_loader.get_stats()["loaded"]:
+        print("✅ Model preloaded by the launcher (python -m app.launcher)")
+        return
     print("⚠️ Model will load on first detection request (lazy loading)")
     # Model preloading disabled to reduce memory usage on Render free tier
     # The model will load automatically when first detection is requested
@@ -102,6 +139,16 @@ async def startup_event():
     # model_loader.load_model()
     # print("Model loaded successfully!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    from .api.v1.detection import detection_service
+    
+    # Stop inference worker processes, if any
+    if detection_service.inference_pool is not None:
+        detection_service.inference_pool.shutdown()
+    
+    metrics.mark_process_dead()
+
 # ---------------------------------------------------------
 # Health & Root Endpoints
 # ---------------------------------------------------------
@@ -0,0 +1,105 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Any
+import numpy as np
+
+class MicroBatchScheduler:
+    """Coalesce concurrent single-image detections into batched forward passes
+    
+    Callers block in submit() while a worker thread collects requests for up to
+    max_wait_ms (or until max_batch_size is reached) and runs them through
+    CariesDetector.detect_batch in one model.predict call.
+    """
+    
+    def __init__(self, detector, max_batch_size: int = 8, max_wait_ms: float = 20.0):
+        self.detector = detector
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_size_counts: Dict[int, int] = {}
+    
+    def _ensure_worker(self):
+        """Start the batching thread on first use"""
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="detection-batcher", daemon=True
+                )
+                self._worker.start()
+    
+    def submit(self, image: np.ndarray) -> Dict[str, Any]:
+        """Queue a decoded image for detection and wait for its result
+        
+        Returns:
+            Dictionary with 'results', 'processing_time_ms', 'batch_size'
+            and 'model_version'
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((image, future))
+        return future.result()
+    
+    def _collect_batch(self) -> list:
+        """Block for the first request, then gather more until the window closes"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            images = [image for image, _ in batch]
+            
+            try:
+                detection_results = self.detector.detect_batch(images)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            self._record_batch(len(batch))
+            
+            # Attribute the shared forward pass evenly to each request
+            processing_time_ms = detection_results["processing_time_ms"] / len(batch)
+            for (_, future), result in zip(batch, detection_results["results"]):
+                future.set_result({
+                    "results": [result],
+                    "processing_time_ms": processing_time_ms,
+                    "batch_size": len(batch),
+                    "model_version": detection_results["model_version"]
+                })
+    
+    def _record_batch(self, batch_size: int):
+        with self._stats_lock:
+            self._batch_size_counts[batch_size] = self._batch_size_counts.get(batch_size, 0) + 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get achieved batch size statistics"""
+        with self._stats_lock:
+            counts = dict(self._batch_size_counts)
+        
+        total_batches = sum(counts.values())
+        total_requests = sum(size * count for size, count in counts.items())
+        
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000,
+            "queue_depth": self._queue.qsize(),
+            "total_batches": total_batches,
+            "total_requests": total_requests,
+            "average_batch_size": total_requests / total_batches if total_batches else 0.0,
+            "batch_size_counts": {str(size): counts[size] for size in sorted(counts)}
+        }
@@ -0,0 +1,98 @@
+"""Thread counts and CPU affinity for the inference path"""
+import os
+import sys
+from typing import Any, Dict, List
+from ..core.config import settings
+from .process_pool import parse_cpu_sets
+
+# Setting name -> pid it was applied in; forked children apply it again
+_applied: Dict[str, int] = {}
+
+def _first_time(name: str) -> bool:
+    pid = os.getpid()
+    if _applied.get(name) == pid:
+        return False
+    _applied[name] = pid
+    return True
+
+def inference_cpus() -> List[int]:
+    """CPUs listed in INFERENCE_CPU_AFFINITY ("0-3", "0,2,4"), empty to leave affinity alone"""
+    if not settings.INFERENCE_CPU_AFFINITY.strip():
+        return []
+    return parse_cpu_sets(settings.INFERENCE_CPU_AFFINITY.replace(";", ","), 1)[0]
+
+def intra_op_threads() -> int:
+    """Threads per forward pass: INFERENCE_INTRA_OP_THREADS, else one per pinned CPU, else 0 (library default)"""
+    if settings.INFERENCE_INTRA_OP_THREADS > 0:
+        return settings.INFERENCE_INTRA_OP_THREADS
+    return len(inference_cpus())
+
+def pin_process(cpus: List[int]):
+    """Restrict every thread of this process, and the threads it starts later, to cpus"""
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return
+    _applied["affinity"] = os.getpid()
+    # sched_setaffinity applies to one thread on Linux, so existing threads are pinned one by one
+    try:
+        thread_ids = [int(tid) for tid in os.listdir("/proc/self/task")]
+    except OSError:
+        thread_ids = [0]
+    for thread_id in thread_ids:
+        try:
+            os.sched_setaffinity(thread_id, cpus)
+        except ProcessLookupError:
+            pass  # Thread exited meanwhile
+
+def configure_affinity():
+    """Pin a process dedicated to inference (the inference server) to INFERENCE_CPU_AFFINITY; never call it in an API worker"""
+    if _first_time("affinity"):
+        pin_process(inference_cpus())
+
+def configure_torch():
+    """Apply the intra-op and inter-op thread counts to torch"""
+    if not _first_time("torch"):
+        return
+    import torch
+    
+    threads = intra_op_threads()
+    if threads > 0:
+        torch.set_num_threads(threads)
+    interop_threads = settings.INFERENCE_INTER_OP_THREADS
+    if interop_threads > 0 and torch.get_num_interop_threads() != interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # Only possible before the inter-op pool starts
+            print("torch inter-op threads already started; INFERENCE_INTER_OP_THREADS not applied")
+
+def onnx_session_options():
+    """onnxruntime SessionOptions with the configured thread counts"""
+    import onnxruntime as ort
+    
+    options = ort.SessionOptions()
+    threads = intra_op_threads()
+    if threads > 0:
+        options.intra_op_num_threads = threads
+    if settings.INFERENCE_INTER_OP_THREADS > 0:
+        options.inter_op_num_threads = settings.INFERENCE_INTER_OP_THREADS
+    return options
+
+def configure_opencv():
+    """Apply OPENCV_THREADS (0 runs OpenCV calls on the calling thread, -1 keeps its default)"""
+    if settings.OPENCV_THREADS < 0 or not _first_time("opencv"):
+        return
+    import cv2
+    
+    cv2.setNumThreads(settings.OPENCV_THREADS)
+
+def get_stats() -> Dict[str, Any]:
+    """Thread counts and affinity in effect in this process (None where a library is not loaded yet)"""
+    torch = sys.modules.get("torch")
+    cv2 = sys.modules.get("cv2")
+    return {
+        "cpu_count": os.cpu_count(),
+        "affinity": sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None,
+        "torch_threads": torch.get_num_threads() if torch else None,
+        "torch_interop_threads": torch.get_num_interop_threads() if torch else None,
+        "opencv_threads": cv2.getNumThreads() if cv2 else None
+    }
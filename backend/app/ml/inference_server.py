@@ -0,0 +1,484 @@
+"""Single inference process shared by every API worker on a host"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Dict, Any, Optional
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+LAUNCHER_PID_ENV = "APP_LAUNCHER_PID"  # Set by app.launcher for the workers it forks
+
+def server_authkey(secret_key: str) -> bytes:
+    """Connection key derived from SECRET_KEY, so only processes with the app's settings can connect"""
+    return hashlib.sha256(b"inference-server:" + secret_key.encode()).digest()
+
+class SharedImageRing:
+    """Fixed-size image slots in one shared memory segment, owned by an API worker process"""
+    
+    def __init__(self, slots: int, slot_bytes: int):
+        self.slot_bytes = slot_bytes
+        self.memory = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+    
+    @property
+    def name(self) -> str:
+        return self.memory.name
+    
+    def fits(self, image: np.ndarray) -> bool:
+        return image.nbytes <= self.slot_bytes
+    
+    @contextmanager
+    def slot(self, image: np.ndarray):
+        """Copy image into a free slot (waiting for one if all are taken) and yield its byte offset"""
+        slot = self._free.get()
+        try:
+            offset = slot * self.slot_bytes
+            target = np.ndarray(image.shape, dtype=image.dtype, buffer=self.memory.buf, offset=offset)
+            target[...] = image
+            del target  # Release the buffer export, or close() fails
+            yield offset
+        finally:
+            self._free.put(slot)
+    
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+def start_server(address: str) -> subprocess.Popen:
+    """Start a detached server process; of several started at once, only the one holding the start-up lock stays"""
+    # Outlive the calling worker, which its launcher or uvicorn supervisor may restart
+    if os.environ.get(LAUNCHER_PID_ENV):
+        watch_pid = int(os.environ[LAUNCHER_PID_ENV])
+    else:
+        parent = multiprocessing.parent_process()
+        watch_pid = parent.pid if parent is not None else os.getpid()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.ml.inference_server", "--address", address, "--watch-pid", str(watch_pid)],
+        cwd=BACKEND_DIR,
+        start_new_session=True
+    )
+    threading.Thread(target=process.wait, daemon=True).start()  # Reap it when it exits
+    return process
+
+class InferenceServerClient:
+    """Run detections in the shared inference server, with the same interface as InferencePool"""
+    
+    def __init__(
+        self,
+        address: str,
+        authkey: bytes,
+        slots: int = 4,
+        slot_mb: float = 16,
+        autostart: bool = True,
+        connect_timeout: float = 30.0
+    ):
+        self.address = address
+        self.authkey = authkey
+        self.slots = slots
+        self.slot_bytes = int(slot_mb * 1024 * 1024)
+        self.autostart = autostart
+        self.connect_timeout = connect_timeout
+        self._ring = None
+        self._ring_lock = threading.Lock()
+        self._connections = queue.LifoQueue()  # Idle connections, reused across requests
+        self._executor = ThreadPoolExecutor(max_workers=slots, thread_name_prefix="inference-client")
+        self._stats_lock = threading.Lock()
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._shared_memory_requests = 0
+    
+    def _get_ring(self) -> SharedImageRing:
+        """Create this process's shared memory on first use"""
+        with self._ring_lock:
+            if self._ring is None:
+                self._ring = SharedImageRing(self.slots, self.slot_bytes)
+            return self._ring
+    
+    def _connect(self, start: bool = True) -> Connection:
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            pass
+        
+        deadline = time.monotonic() + self.connect_timeout
+        started = False
+        while True:
+            try:
+                return Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if not start or time.monotonic() > deadline:
+                    raise RuntimeError(f"Inference server at {self.address} is not running")
+                if self.autostart and not started:
+                    start_server(self.address)
+                    started = True
+                time.sleep(0.1)
+    
+    def _request(self, message: Dict[str, Any], start: bool = True) -> Dict[str, Any]:
+        """Send one request and wait for the reply, reconnecting once if the server was restarted"""
+        for attempt in range(2):
+            connection = self._connect(start)
+            try:
+                connection.send(message)
+                reply = connection.recv()
+            except (EOFError, OSError):
+                connection.close()
+                if attempt:
+                    raise RuntimeError("Lost the connection to the inference server")
+                continue
+            self._connections.put(connection)
+            if "error" in reply:
+                raise RuntimeError(f"Inference server: {reply['error']}")
+            return reply
+    
+    def _detect(self, image_path: str, image_bytes: Optional[bytes], tiled: bool, render_annotated: bool) -> Dict[str, Any]:
+        from ..core.config import settings
+        from .model_loader import model_loader
+        from .preprocessor import ImagePreprocessor
+        from .renderer import AnnotationRenderer
+        from ..utils.timing import StageTimer
+        
+        timer = StageTimer()
+        with timer.stage("decode"):
+            if image_bytes is not None:
+                image = ImagePreprocessor.decode(image_bytes)
+            else:
+                image = ImagePreprocessor.load(image_path)
+        
+        # The server follows this worker's default version (hot swaps happen in the API)
+        version = model_loader.default_version
+        request = {"op": "detect", "model_version": version, "model_path": model_loader.get_version_path(version), "tiled": tiled}
+        ring = self._get_ring()
+        if ring.fits(image):
+            with ring.slot(image) as offset:
+                reply = self._request({
+                    **request, "shm": ring.name, "pid": os.getpid(), "offset": offset, "shape": image.shape, "dtype": image.dtype.str
+                })
+            with self._stats_lock:
+                self._shared_memory_requests += 1
+        else:
+            # Larger than a slot: send the pixels over the socket instead
+            reply = self._request({**request, "image": image})
+        
+        for name, stage_ms in reply["timings"].items():
+            timer.add(name, stage_ms)
+        
+        annotated = None
+        if render_annotated:
+            with timer.stage("render"):
+                annotated = AnnotationRenderer.encode(
+                    AnnotationRenderer.render(image, reply["detections"]),
+                    settings.ANNOTATED_IMAGE_FORMAT,
+                    settings.ANNOTATED_IMAGE_QUALITY
+                )
+        
+        return {
+            "detections": reply["detections"],
+            "annotated": annotated,
+            "processing_time_ms": reply["processing_time_ms"],
+            "model_version": reply["model_version"],
+            "timings": timer.timings,
+            "busy_seconds": reply["busy_seconds"],
+            "pid": reply["pid"],
+            "cpus": []
+        }
+    
+    def submit(
+        self,
+        image_path: str,
+        image_bytes: Optional[bytes] = None,
+        tiled: bool = False,
+        render_annotated: bool = True
+    ) -> Future:
+        """Queue an image for detection in the server (see InferencePool.submit)"""
+        future = self._executor.submit(self._detect, image_path, image_bytes, tiled, render_annotated)
+        with self._stats_lock:
+            self._submitted += 1
+        future.add_done_callback(self._record)
+        return future
+    
+    def detect(self, *args, **kwargs) -> Dict[str, Any]:
+        """Run a detection in the server and wait for it (see submit)"""
+        return self.submit(*args, **kwargs).result()
+    
+    def _record(self, future: Future):
+        with self._stats_lock:
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+    
+    def shutdown(self):
+        """Close this worker's connections and shared memory; the server keeps running for other workers"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._ring_lock:
+            if self._ring is not None:
+                try:
+                    self._request({"op": "release", "shm": self._ring.name}, start=False)
+                except RuntimeError:
+                    pass  # Server already gone
+                self._ring.close()
+                self._ring = None
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get this worker's request counts and the server's own stats"""
+        try:
+            server = self._request({"op": "stats"}, start=False)
+        except RuntimeError:
+            server = None
+        with self._stats_lock:
+            return {
+                "mode": "server",
+                "address": self.address,
+                "workers": 1,
+                "in_flight": self._submitted - self._completed - self._failed,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "shared_memory_requests": self._shared_memory_requests,
+                "server": server
+            }
+
+def _pid_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class InferenceServer:
+    """Serve detections for API workers from the one model copy in this process"""
+    
+    def __init__(self, address: str, authkey: bytes, detector=None, scheduler=None):
+        from ..core.config import settings
+        from .batch_scheduler import MicroBatchScheduler
+        from .predictor import CariesDetector
+        
+        self.address = address
+        self.authkey = authkey
+        self.detector = detector or CariesDetector()
+        if scheduler is None and settings.DETECTION_BATCHING_ENABLED:
+            scheduler = MicroBatchScheduler(
+                self.detector,
+                max_batch_size=settings.DETECTION_MAX_BATCH_SIZE,
+                max_wait_ms=settings.DETECTION_BATCH_WAIT_MS
+            )
+        self.scheduler = scheduler
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+        self._segment_owners: Dict[str, int] = {}
+        self._segments_lock = threading.Lock()
+        self._version_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._clients = 0
+        self._requests = 0
+        self._failed = 0
+        self._busy_seconds = 0.0
+    
+    def _attach(self, name: str, owner_pid: int) -> shared_memory.SharedMemory:
+        """Map a worker's shared memory, once per segment"""
+        with self._segments_lock:
+            memory = self._segments.get(name)
+            if memory is not None:
+                return memory
+            memory = shared_memory.SharedMemory(name=name)
+            # The worker owns the segment; don't let this process's tracker unlink it on exit
+            resource_tracker.unregister(memory._name, "shared_memory")
+            self._segments[name] = memory
+            self._segment_owners[name] = owner_pid
+            dead = [segment for segment, pid in self._segment_owners.items() if not _pid_exists(pid)]
+        # Workers that crashed never sent release
+        for segment in dead:
+            self._detach(segment)
+        return memory
+    
+    def _detach(self, name: str):
+        """Drop the mapping of a segment its worker has removed"""
+        with self._segments_lock:
+            memory = self._segments.pop(name, None)
+            self._segment_owners.pop(name, None)
+        if memory is not None:
+            try:
+                memory.close()
+            except BufferError:
+                pass  # Still referenced by a request in flight; released with it
+    
+    def _detect(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from .model_loader import model_loader
+        from .postprocessor import ResultProcessor
+        from ..utils.timing import StageTimer
+        
+        start_time = time.time()
+        timer = StageTimer()
+        
+        with self._version_lock:
+            if request["model_version"] != model_loader.default_version:
+                model_loader.register_version(request["model_version"], request["model_path"])
+                model_loader.set_default_version(request["model_version"])
+        
+        image = request.get("image")
+        if image is None:
+            try:
+                memory = self._attach(request["shm"], request["pid"])
+            except FileNotFoundError:
+                raise RuntimeError(f"Shared memory {request['shm']} does not exist")
+            image = np.ndarray(request["shape"], dtype=np.dtype(request["dtype"]), buffer=memory.buf, offset=request["offset"])
+        
+        with timer.stage("inference"):
+            if request["tiled"]:
+                detection_results = self.detector.detect_tiled(image)
+            elif self.scheduler is not None:
+                detection_results = self.scheduler.submit(image)
+            else:
+                detection_results = self.detector.detect(image)
+        with timer.stage("postprocess"):
+            detections = ResultProcessor().process_results(detection_results["results"], image.shape)
+        
+        return {
+            "detections": detections,
+            "processing_time_ms": detection_results["processing_time_ms"],
+            "model_version": detection_results["model_version"],
+            "timings": timer.timings,
+            "busy_seconds": time.time() - start_time,
+            "pid": os.getpid()
+        }
+    
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer one request: detect, stats, ping or release (a worker's segment is gone)"""
+        op = request.get("op")
+        if op == "detect":
+            try:
+                reply = self._detect(request)
+            except Exception as e:
+                with self._stats_lock:
+                    self._requests += 1
+                    self._failed += 1
+                return {"error": f"{type(e).__name__}: {e}"}
+            with self._stats_lock:
+                self._requests += 1
+                self._busy_seconds += reply["busy_seconds"]
+            return reply
+        if op == "stats":
+            return self.get_stats()
+        if op == "ping":
+            return {"pid": os.getpid()}
+        if op == "release":
+            self._detach(request["shm"])
+            return {}
+        return {"error": f"Unknown operation {op!r}"}
+    
+    def _serve_connection(self, connection: Connection):
+        with self._stats_lock:
+            self._clients += 1
+        try:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    break
+                connection.send(self.handle(request))
+        finally:
+            connection.close()
+            with self._stats_lock:
+                self._clients -= 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        from .model_loader import model_loader
+        
+        with self._stats_lock:
+            uptime = time.monotonic() - self._started_at
+            stats = {
+                "pid": os.getpid(),
+                "connections": self._clients,
+                "requests": self._requests,
+                "failed": self._failed,
+                "utilization": self._busy_seconds / uptime if uptime else 0.0,
+                "shared_memory_segments": len(self._segments),
+                "rss_mb": model_loader.get_process_rss_mb()
+            }
+        if self.scheduler is not None:
+            stats["batching"] = self.scheduler.get_stats()
+        return stats
+    
+    def serve_forever(self, watch_pid: Optional[int] = None):
+        """Accept API worker connections, one thread each"""
+        # Left behind by a server that crashed; the caller holds the start-up lock
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        listener = Listener(self.address, family="AF_UNIX", authkey=self.authkey)
+        os.chmod(self.address, 0o600)
+        if watch_pid:
+            threading.Thread(target=self._exit_with, args=(watch_pid,), daemon=True).start()
+        print(f"Inference server listening on {self.address} (pid {os.getpid()})")
+        
+        try:
+            while True:
+                try:
+                    connection = listener.accept()
+                except (EOFError, OSError, multiprocessing.AuthenticationError) as e:
+                    print(f"Rejected inference server connection: {e}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+        finally:
+            listener.close()
+    
+    def _exit_with(self, pid: int, interval: float = 2.0):
+        """Stop when the API process that started the server exits"""
+        while _pid_exists(pid):
+            time.sleep(interval)
+        print(f"Process {pid} exited; stopping the inference server")
+        try:
+            os.unlink(self.address)
+        except OSError:
+            pass
+        os._exit(0)
+
+def main() -> int:
+    from ..core.config import settings
+    
+    parser = argparse.ArgumentParser(prog="python -m app.ml.inference_server", description=__doc__)
+    parser.add_argument("--address", default=settings.INFERENCE_SERVER_SOCKET, help="Unix socket path")
+    parser.add_argument("--watch-pid", type=int, help="Exit when this process exits")
+    parser.add_argument("--preload", action="store_true", help="Load the model before accepting requests")
+    args = parser.parse_args()
+    
+    import fcntl
+    
+    # One server per socket: later ones (e.g. started by several workers at once) leave
+    lock_file = open(f"{args.address}.lock", "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        print(f"An inference server is already running on {args.address}")
+        return 0
+    
+    # Before the model load and the server's threads, so all of them stay on these CPUs
+    from .cpu import configure_affinity
+    
+    configure_affinity()
+    server = InferenceServer(args.address, server_authkey(settings.SECRET_KEY))
+    if args.preload:
+        from .model_loader import model_loader
+        
+        model_loader.load_model()
+    server.serve_forever(args.watch_pid)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
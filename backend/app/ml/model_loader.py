@@ -1,29 +1,501 @@
-from ultralytics import YOLO
-import torch
+import ctypes
+import gc
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import psutil
 from ..core.config import settings
+from ..core.metrics import (
+    MODEL_LOADED,
+    MODEL_LOAD_SECONDS,
+    MODEL_UNLOADS,
+    MODEL_WARMUP_INFERENCE_SECONDS,
+    MODEL_WARMUP_SECONDS
+)
+from . import cpu
+from .onnx_backend import file_hash
+
+def resolve_model_path(model_path: str) -> str:
+    """Absolute path of a .pt file under MODELS_DIR; ValueError for anything else (the file is unpickled on load)"""
+    models_dir = os.path.realpath(settings.MODELS_DIR)
+    path = os.path.realpath(os.path.join(models_dir, model_path))
+    if os.path.commonpath([models_dir, path]) != models_dir or not path.endswith(".pt"):
+        raise ValueError(f"Model files must be .pt files under {settings.MODELS_DIR}")
+    if not os.path.isfile(path):
+        raise ValueError(f"Model file not found: {model_path}")
+    return path
+
+def parse_warmup_shapes(spec: str) -> List[Tuple[int, int]]:
+    """(width, height) of each warm-up image in a "1280x960,640x840" spec"""
+    shapes = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        width, sep, height = part.lower().partition("x")
+        if not sep or not width.strip().isdigit() or not height.strip().isdigit():
+            raise ValueError(f"Invalid warm-up shape {part!r}, expected WIDTHxHEIGHT")
+        shapes.append((int(width), int(height)))
+    return shapes
 
 class ModelLoader:
+    """Registry of model versions with a switchable default
+    
+    Versions are loaded lazily. Inferences hold a reference through acquire(),
+    so switching the default never pulls a model out from under a running
+    detection: the old version is only released once its last user finishes.
+    """
     _instance = None
-    _model = None
     
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(ModelLoader, cls).__new__(cls)
+            instance = super(ModelLoader, cls).__new__(cls)
+            instance._lock = threading.RLock()  # Registry bookkeeping
+            instance._load_lock = threading.Lock()  # Serializes slow model loads
+            instance._paths = {}
+            instance._models = {}
+            instance._refcounts = {}
+            instance._retired = set()
+            instance._last_used = {}
+            instance._loaded_hashes = {}  # Weights hash of each loaded version, taken at load
+            instance._file_hashes = {}  # (path, size, mtime) -> weights hash
+            instance._watchdog = None
+            instance._preloaded = set()  # Versions a launcher worker shares copy-on-write with the launcher
+            instance._load_count = 0
+            instance._unload_count = 0
+            instance._last_load_duration_ms = None
+            instance._last_warmup = None
+            instance._last_unload_reason = None
+            instance._registry_lock = threading.Lock()
+            instance._registry_stamp = None  # (inode, mtime, size) of the MODEL_REGISTRY_FILE last applied
+            instance._unload_generation = None
+            
+            default_version = settings.MODEL_VERSION or os.path.splitext(os.path.basename(settings.MODEL_PATH))[0]
+            instance.register_version(default_version, settings.MODEL_PATH)
+            instance._default_version = default_version
+            
+            # Extra versions as "name=path,name=path"
+            for entry in filter(None, (e.strip() for e in settings.MODEL_VERSIONS.split(","))):
+                version, _, path = entry.partition("=")
+                instance.register_version(version.strip(), path.strip())
+            
+            cls._instance = instance
         return cls._instance
     
-    def load_model(self):
-        """Load YOLOv8 model"""
-        if self._model is None:
-            device = 'cuda' if torch.cuda.is_available() else 'cpu'
-            print(f"Loading model on device: {device}")
-            self._model = YOLO(settings.MODEL_PATH)
-            self._model.to(device)
-        return self._model
-    
-    def get_model(self):
-        """Get loaded model"""
-        if self._model is None:
-            return self.load_model()
-        return self._model
+    @property
+    def default_version(self) -> str:
+        self.sync_registry()
+        return self._default_version
+    
+    def publish_registry(self, unload: bool = False):
+        """Write the versions and the default to MODEL_REGISTRY_FILE for the other API workers
+        
+        Args:
+            unload: Also have every other process unload its models
+        """
+        self.sync_registry()
+        with self._lock:
+            generation = (self._unload_generation or 0) + (1 if unload else 0)
+            state = {"versions": dict(self._paths), "default": self._default_version, "unload_generation": generation}
+        
+        path = settings.MODEL_REGISTRY_FILE
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(temp_path, path)
+        with self._registry_lock:
+            self._registry_stamp = self._registry_file_stamp()
+            self._unload_generation = generation
+    
+    @staticmethod
+    def _registry_file_stamp() -> Optional[Tuple[int, int, int]]:
+        """Changes on every publish: each one replaces the file (new inode), even within one mtime tick"""
+        try:
+            stat = os.stat(settings.MODEL_REGISTRY_FILE)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def sync_registry(self):
+        """Apply registry changes another process published (a stat per call while nothing changed)"""
+        stamp = self._registry_file_stamp()
+        if stamp is None or stamp == self._registry_stamp or not self._registry_lock.acquire(blocking=False):
+            return
+        try:
+            with open(settings.MODEL_REGISTRY_FILE) as f:
+                state = json.load(f)
+            for version, path in state.get("versions", {}).items():
+                try:
+                    self.register_version(version, path)
+                except ValueError as e:
+                    print(f"Model registry: {e}")
+            # Not preloaded here (this may be the event loop); the next detection loads it
+            if state.get("default") in self._paths and state["default"] != self._default_version:
+                self.set_default_version(state["default"], preload=False)
+            # Only recorded on the first read, so a new worker keeps the model it was forked with
+            generation = state.get("unload_generation", 0)
+            if self._unload_generation is not None and generation > self._unload_generation:
+                self.unload_model(reason="admin")
+            self._unload_generation = generation
+        except (OSError, ValueError) as e:
+            print(f"Model registry: could not apply {settings.MODEL_REGISTRY_FILE}: {e}")
+        finally:
+            self._registry_stamp = stamp
+            self._registry_lock.release()
+    
+    def register_version(self, version: str, model_path: str):
+        """Make a model version available for loading"""
+        with self._lock:
+            if version in self._models and self._paths.get(version) != model_path:
+                raise ValueError(f"Model version {version} is loaded from a different path")
+            self._paths[version] = model_path
+            self._refcounts.setdefault(version, 0)
+    
+    def get_version_path(self, version: Optional[str] = None) -> str:
+        """Weights path registered for a version (the default if omitted)"""
+        version = version or self._default_version
+        with self._lock:
+            if version not in self._paths:
+                raise ValueError(f"Unknown model version: {version}")
+            return self._paths[version]
+    
+    def weights_hash(self, version: Optional[str] = None) -> str:
+        """Short hash of the weights a version serves: those it was loaded from, else the file on disk"""
+        version = version or self._default_version
+        with self._lock:
+            if version in self._models and version in self._loaded_hashes:
+                return self._loaded_hashes[version]
+        return self._file_hash(self.get_version_path(version))
+    
+    def _file_hash(self, path: str) -> str:
+        """SHA-256 prefix of a weights file, recomputed only when its size or mtime changes"""
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        digest = self._file_hashes.get(key)
+        if digest is None:
+            digest = file_hash(path)[:16]
+            self._file_hashes[key] = digest
+        return digest
+    
+    def load_model(self, version: Optional[str] = None):
+        """Load a model version (the default if omitted) with the configured inference backend
+        
+        Guarded by a lock so concurrent first requests load a single copy.
+        Loading does not hold the registry lock, so in-flight inferences on
+        other versions are not blocked by a slow load.
+        """
+        version = version or self._default_version
+        model = self._models.get(version)
+        if model is not None:
+            return model
+        
+        with self._load_lock:
+            with self._lock:
+                if version not in self._paths:
+                    raise ValueError(f"Unknown model version: {version}")
+                model_path = self._paths[version]
+            
+            model = self._models.get(version)
+            if model is None:
+                weights_hash = self._file_hash(model_path)
+                start_time = time.time()
+                if settings.INFERENCE_BACKEND == "onnx":
+                    model = self._load_onnx_model(model_path)
+                elif settings.INFERENCE_BACKEND == "onnx_int8":
+                    model = self._load_onnx_model(model_path, quantized=True)
+                else:
+                    model = self._load_ultralytics_model(model_path)
+                load_duration_ms = (time.time() - start_time) * 1000
+                
+                # Warm up before publishing the model, so requests keep waiting on the load lock instead
+                warmup = self._warm_up(model) if settings.MODEL_WARMUP_ENABLED else None
+                
+                with self._lock:
+                    self._last_load_duration_ms = load_duration_ms
+                    self._last_warmup = warmup
+                    self._load_count += 1
+                    self._last_used[version] = time.monotonic()
+                    self._loaded_hashes[version] = weights_hash
+                    self._models[version] = model
+                MODEL_LOAD_SECONDS.labels(settings.INFERENCE_BACKEND).observe(load_duration_ms / 1000)
+                MODEL_LOADED.labels(version).set(1)
+                print(f"Model {version} loaded in {load_duration_ms:.0f} ms")
+                if warmup:
+                    print(
+                        f"Model {version} warmed up in {warmup['duration_ms']:.0f} ms "
+                        f"(first inference {warmup['first_inference_ms']:.0f} ms, "
+                        f"steady state {warmup['steady_inference_ms']:.0f} ms)"
+                    )
+                self._start_watchdog()
+            return model
+    
+    @staticmethod
+    def _load_ultralytics_model(model_path: str):
+        """Load the PyTorch model through ultralytics, prepared for inference only
+        
+        Conv+BatchNorm pairs are fused and gradients disabled here rather than
+        by ultralytics on the first predict; predict itself runs under
+        torch.inference_mode.
+        """
+        from ultralytics import YOLO
+        import torch
+        
+        cpu.configure_torch()
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        print(f"Loading model on device: {device} ({torch.get_num_threads()} threads)")
+        model = YOLO(model_path)
+        model.to(device)
+        model.fuse(verbose=False)
+        model.model.eval()
+        model.model.requires_grad_(False)
+        if settings.MODEL_CHANNELS_LAST:
+            model.model.to(memory_format=torch.channels_last)
+        return model
+    
+    @staticmethod
+    def _load_onnx_model(model_path: str, quantized: bool = False):
+        """Load the ONNX export of the model into onnxruntime (CPU only)
+        
+        With quantized=True the INT8 model produced by app.ml.quantization is
+        served; if it does not exist yet a dynamic INT8 model is created.
+        """
+        from .onnx_backend import OnnxCariesModel, export_onnx
+        
+        onnx_path = export_onnx(model_path, imgsz=settings.ONNX_INPUT_SIZE)
+        if quantized:
+            from .quantization import quantize_model, quantized_model_path
+            
+            int8_path = quantized_model_path(onnx_path)
+            if not os.path.exists(int8_path):
+                print("No INT8 model found, creating one with dynamic quantization...")
+                quantize_model(onnx_path, int8_path, mode="dynamic")
+            onnx_path = int8_path
+        print(f"Loading ONNX model on device: cpu ({onnx_path})")
+        return OnnxCariesModel(onnx_path, imgsz=settings.ONNX_INPUT_SIZE, session_options=cpu.onnx_session_options())
+    
+    @staticmethod
+    def _warm_up(model) -> Optional[dict]:
+        """Run dummy inferences at each configured shape
+        
+        The first forward pass at an input shape is several times slower than
+        the next: allocator pools grow, oneDNN/onnxruntime pick kernels and
+        ultralytics builds its predictor.
+        
+        Returns:
+            Total time and the first and last inference time at the first
+            shape, in ms (None if no shape is configured)
+        """
+        shapes = parse_warmup_shapes(settings.MODEL_WARMUP_SHAPES)
+        if not shapes:
+            return None
+        
+        start_time = time.perf_counter()
+        latencies = []
+        for i, (width, height) in enumerate(shapes):
+            image = np.full((height, width, 3), 114, dtype=np.uint8)  # Letterbox grey
+            for _ in range(max(1, settings.MODEL_WARMUP_RUNS)):
+                run_start = time.perf_counter()
+                model.predict(
+                    source=image,
+                    conf=settings.CONFIDENCE_THRESHOLD,
+                    iou=settings.IOU_THRESHOLD,
+                        verbose=False
+                )
+                if i == 0:
+                    latencies.append(time.perf_counter() - run_start)
+        duration = time.perf_counter() - start_time
+        
+        MODEL_WARMUP_SECONDS.labels(settings.INFERENCE_BACKEND).observe(duration)
+        MODEL_WARMUP_INFERENCE_SECONDS.labels(settings.INFERENCE_BACKEND, "first").observe(latencies[0])
+        MODEL_WARMUP_INFERENCE_SECONDS.labels(settings.INFERENCE_BACKEND, "steady").observe(latencies[-1])
+        return {
+            "duration_ms": duration * 1000,
+            "shapes": [f"{width}x{height}" for width, height in shapes],
+            "first_inference_ms": latencies[0] * 1000,
+            "steady_inference_ms": latencies[-1] * 1000
+        }
+    
+    def get_model(self, version: Optional[str] = None):
+        """Get loaded model, reloading it if it was unloaded"""
+        version = version or self._default_version
+        self._last_used[version] = time.monotonic()
+        return self.load_model(version)
+    
+    @contextmanager
+    def acquire(self, version: Optional[str] = None):
+        """Hold a model version for the duration of an inference
+        
+        Yields:
+            (version, model)
+        """
+        self.sync_registry()
+        with self._lock:
+            version = version or self._default_version
+            self._refcounts[version] = self._refcounts.get(version, 0) + 1
+        try:
+            model = self.get_model(version)
+            yield version, model
+        finally:
+            with self._lock:
+                self._refcounts[version] -= 1
+                release = version in self._retired and self._refcounts[version] == 0
+            if release:
+                self._release_version(version)
+    
+    def set_default_version(self, version: str, preload: bool = True) -> str:
+        """Atomically switch the default model version
+        
+        With preload the new version is loaded before the switch so no
+        request pays the cold start. Returns the previous default, which is
+        released as soon as its in-flight inferences finish.
+        """
+        if version not in self._paths:
+            raise ValueError(f"Unknown model version: {version}")
+        
+        if preload:
+            self.load_model(version)
+        
+        with self._lock:
+            previous = self._default_version
+            self._default_version = version
+            self._retired.discard(version)
+            if previous == version:
+                return previous
+            self._retired.add(previous)
+            release = self._refcounts.get(previous, 0) == 0
+        
+        if release:
+            self._release_version(previous)
+        return previous
+    
+    def _release_version(self, version: str):
+        """Unload a retired version once nothing references it"""
+        with self._lock:
+            if self._refcounts.get(version, 0) > 0 or version == self._default_version:
+                return
+            self._retired.discard(version)
+        self.unload_model(version, reason="retired")
+    
+    def unload_model(self, version: Optional[str] = None, reason: str = "manual") -> bool:
+        """Drop a model version (all versions if omitted) and return its memory to the OS
+        
+        Inferences already running keep their own reference and finish normally.
+        """
+        with self._lock:
+            versions = [version] if version else list(self._models)
+            unloaded = [v for v in versions if self._models.pop(v, None) is not None]
+            if not unloaded:
+                return False
+            self._preloaded.difference_update(unloaded)
+            self._unload_count += len(unloaded)
+            self._last_unload_reason = reason
+        
+        for version in unloaded:
+            MODEL_LOADED.labels(version).set(0)
+        MODEL_UNLOADS.labels(reason).inc(len(unloaded))
+        self._release_memory()
+        print(f"Model {', '.join(unloaded)} unloaded ({reason})")
+        return True
+    
+    @staticmethod
+    def _release_memory():
+        """Collect garbage, empty torch caches and trim the C heap"""
+        gc.collect()
+        if "torch" in sys.modules:
+            torch = sys.modules["torch"]
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        try:
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError):
+            pass  # Not glibc
+    
+    @staticmethod
+    def get_process_rss_mb() -> float:
+        """Resident memory of this process in MB"""
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    
+    def _start_watchdog(self):
+        """Start the idle/memory watchdog thread once, if either limit is configured"""
+        if not (settings.MODEL_IDLE_TTL_MINUTES or settings.MODEL_MEMORY_LIMIT_MB):
+            return
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._watchdog = threading.Thread(target=self._watch, name="model-watchdog", daemon=True)
+            self._watchdog.start()
+    
+    def _watch(self):
+        while True:
+            time.sleep(settings.MODEL_WATCHDOG_INTERVAL_SECONDS)
+            self._evict_unused()
+    
+    def _evict_unused(self):
+        """Unload versions idle past MODEL_IDLE_TTL_MINUTES or over MODEL_MEMORY_LIMIT_MB"""
+        now = time.monotonic()
+        for version in list(self._models):
+            # Unloading a preloaded version frees nothing; the launcher keeps the pages
+            if self._refcounts.get(version, 0) > 0 or version in self._preloaded:
+                continue
+            
+            idle_seconds = now - self._last_used.get(version, now)
+            if settings.MODEL_IDLE_TTL_MINUTES and idle_seconds > settings.MODEL_IDLE_TTL_MINUTES * 60:
+                self.unload_model(version, reason="idle")
+            elif (
+                settings.MODEL_MEMORY_LIMIT_MB
+                and idle_seconds > settings.MODEL_WATCHDOG_INTERVAL_SECONDS  # Don't evict mid-burst
+                and self._private_memory_mb() > settings.MODEL_MEMORY_LIMIT_MB
+            ):
+                self.unload_model(version, reason="memory_pressure")
+    
+    def _private_memory_mb(self) -> float:
+        """Memory an unload could free: USS in a launcher worker, whose RSS counts the launcher's pages, else RSS"""
+        if not self._preloaded:
+            return self.get_process_rss_mb()
+        return psutil.Process().memory_full_info().uss / (1024 * 1024)
+    
+    def after_fork(self):
+        """Re-arm the watchdog and loaded gauge in a worker forked with models already loaded, which stay loaded"""
+        now = time.monotonic()
+        self._preloaded = set(self._models)
+        for version in list(self._models):
+            self._last_used[version] = now
+            MODEL_LOADED.labels(version).set(1)
+        if self._models:
+            self._start_watchdog()
+    
+    def get_stats(self) -> dict:
+        """Get model registry and lifecycle statistics"""
+        self.sync_registry()
+        now = time.monotonic()
+        with self._lock:
+            versions = [
+                {
+                    "version": version,
+                    "path": path,
+                    "default": version == self._default_version,
+                    "loaded": version in self._models,
+                    "weights_hash": self._loaded_hashes.get(version) if version in self._models else None,
+                    "in_flight": self._refcounts.get(version, 0),
+                    "retired": version in self._retired,
+                    "idle_seconds": now - self._last_used[version] if version in self._last_used else None
+                }
+                for version, path in self._paths.items()
+            ]
+        
+        return {
+            "default_version": self._default_version,
+            "loaded": self._default_version in self._models,
+            "backend": settings.INFERENCE_BACKEND,
+            "load_count": self._load_count,
+            "unload_count": self._unload_count,
+            "last_load_duration_ms": self._last_load_duration_ms,
+            "last_warmup": self._last_warmup,
+            "last_unload_reason": self._last_unload_reason,
+            "process_rss_mb": self.get_process_rss_mb(),
+            "cpu": cpu.get_stats(),
+            "versions": versions
+        }
 
 model_loader = ModelLoader()
\ No newline at end of file
@@ -0,0 +1,217 @@
+import ast
+import hashlib
+import os
+import shutil
+from typing import List, Tuple, Union
+import numpy as np
+
+# Offset added per class so a single NMS pass never suppresses across classes
+MAX_WH = 7680
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def export_onnx(model_path: str, imgsz: int = 640) -> str:
+    """Export a YOLOv8 .pt model to ONNX once and cache it next to the weights
+    
+    The cached file name includes the weights hash, so replacing the .pt
+    file triggers a fresh export instead of serving a stale graph.
+    """
+    stem, _ = os.path.splitext(model_path)
+    onnx_path = f"{stem}.{file_hash(model_path)[:12]}.onnx"
+    if os.path.exists(onnx_path):
+        return onnx_path
+    
+    # ultralytics is only needed for the one-off export
+    from ultralytics import YOLO
+    
+    print(f"Exporting {model_path} to ONNX...")
+    exported = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    shutil.move(exported, onnx_path)
+    return onnx_path
+
+def letterbox(image: np.ndarray, size: int = 640, color: int = 114) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """Resize keeping aspect ratio and pad to a size x size square
+    
+    Returns:
+        Padded image, scale gain and (pad_x, pad_y)
+    """
+    import cv2
+    
+    height, width = image.shape[:2]
+    gain = min(size / height, size / width)
+    new_width, new_height = int(round(width * gain)), int(round(height * gain))
+    pad_x, pad_y = (size - new_width) / 2, (size - new_height) / 2
+    
+    if (width, height) != (new_width, new_height):
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(color, color, color))
+    return image, gain, (pad_x, pad_y)
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression on xyxy boxes, returns kept indices by descending score"""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    order = scores.argsort()[::-1]
+    
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        
+        inter_w = (np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest])).clip(0)
+        inter_h = (np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest])).clip(0)
+        inter = inter_w * inter_h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        
+        order = rest[iou <= iou_threshold]
+    
+    return np.array(keep, dtype=np.int64)
+
+def postprocess_output(
+    output: np.ndarray,
+    conf_threshold: float,
+    iou_threshold: float,
+    max_det: int = 300
+) -> np.ndarray:
+    """Decode one raw YOLOv8 output of shape (4 + num_classes, num_anchors)
+    
+    Returns:
+        Array of shape (n, 6) with x1, y1, x2, y2, confidence, class_id
+    """
+    predictions = output.T
+    class_scores = predictions[:, 4:]
+    class_ids = class_scores.argmax(axis=1)
+    confidences = class_scores[np.arange(len(class_scores)), class_ids]
+    
+    mask = confidences > conf_threshold
+    predictions, confidences, class_ids = predictions[mask], confidences[mask], class_ids[mask]
+    if len(predictions) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    
+    cx, cy, w, h = predictions[:, 0], predictions[:, 1], predictions[:, 2], predictions[:, 3]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    
+    keep = nms(boxes + class_ids[:, None] * MAX_WH, confidences, iou_threshold)[:max_det]
+    return np.concatenate(
+        [boxes[keep], confidences[keep, None], class_ids[keep, None].astype(np.float32)],
+        axis=1
+    ).astype(np.float32)
+
+class OnnxBoxes:
+    """Minimal stand-in for ultralytics Boxes backed by NumPy arrays"""
+    
+    def __init__(self, data: np.ndarray):
+        self.data = data
+    
+    @property
+    def xyxy(self) -> np.ndarray:
+        return self.data[:, :4]
+    
+    @property
+    def conf(self) -> np.ndarray:
+        return self.data[:, 4]
+    
+    @property
+    def cls(self) -> np.ndarray:
+        return self.data[:, 5]
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def __iter__(self):
+        for i in range(len(self.data)):
+            yield OnnxBoxes(self.data[i:i + 1])
+
+class OnnxResults:
+    """Minimal stand-in for ultralytics Results"""
+    
+    def __init__(self, path: str, orig_img: np.ndarray, boxes: np.ndarray, names: dict):
+        self.path = path
+        self.orig_img = orig_img
+        self.orig_shape = orig_img.shape[:2]
+        self.boxes = OnnxBoxes(boxes)
+        self.names = names
+
+class OnnxCariesModel:
+    """YOLOv8 caries model served by onnxruntime on CPU
+    
+    predict() accepts the same arguments CariesDetector passes to the
+    ultralytics model, so the two backends are interchangeable.
+    """
+    
+    def __init__(self, onnx_path: str, imgsz: int = 640, session_options=None):
+        import onnxruntime as ort
+        
+        self.session = ort.InferenceSession(onnx_path, sess_options=session_options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = imgsz
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = self._parse_names(metadata.get("names"))
+    
+    @staticmethod
+    def _parse_names(raw: str) -> dict:
+        """Parse the class names ultralytics stores in the ONNX metadata"""
+        if not raw:
+            return {}
+        try:
+            return {int(k): v for k, v in ast.literal_eval(raw).items()}
+        except (ValueError, SyntaxError):
+            return {}
+    
+    def predict(
+        self,
+        source: Union[str, np.ndarray, List[Union[str, np.ndarray]]],
+        conf: float = 0.25,
+        iou: float = 0.45,
+        batch: int = None,
+        max_det: int = 300,
+        verbose: bool = False
+    ) -> List[OnnxResults]:
+        """Run detection on image paths or decoded BGR arrays (one or a list)"""
+        import cv2
+        
+        sources = [source] if isinstance(source, (str, np.ndarray)) else list(source)
+        
+        paths, images = [], []
+        for i, src in enumerate(sources):
+            if isinstance(src, str):
+                image = cv2.imread(src)
+                if image is None:
+                    raise ValueError(f"Could not read image from {src}")
+                paths.append(src)
+            else:
+                image = src
+                paths.append(f"image{i}.jpg")
+            images.append(image)
+        
+        # Letterbox, BGR -> RGB, HWC -> CHW, scale to 0-1
+        blobs, transforms = [], []
+        for image in images:
+            padded, gain, pad = letterbox(image, self.imgsz)
+            blobs.append(padded[:, :, ::-1].transpose(2, 0, 1))
+            transforms.append((gain, pad))
+        blob = np.ascontiguousarray(np.stack(blobs), dtype=np.float32) / 255.0
+        
+        outputs = self.session.run(None, {self.input_name: blob})[0]
+        
+        results = []
+        for path, image, output, (gain, (pad_x, pad_y)) in zip(paths, images, outputs, transforms):
+            detections = postprocess_output(output, conf, iou, max_det)
+            
+            # Map boxes back to original image coordinates
+            detections[:, [0, 2]] = ((detections[:, [0, 2]] - pad_x) / gain).clip(0, image.shape[1])
+            detections[:, [1, 3]] = ((detections[:, [1, 3]] - pad_y) / gain).clip(0, image.shape[0])
+            
+            results.append(OnnxResults(path, image, detections, self.names))
+        
+        return results
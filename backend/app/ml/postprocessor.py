@@ -43,47 +43,137 @@ class ResultProcessor:
         }
         return recommendations.get((severity, caries_type), "Dental consultation recommended")
     
-    def process_results(self, results, image_shape: tuple) -> List[Dict[str, Any]]:
-        """Process YOLOv8 results"""
-        detections = []
-        
+    def process_results(self, results, image_shape: tuple) -> "DetectionColumns":
+        """Process YOLOv8 results into columnar findings, computed per column instead of per box"""
+        xyxy, confidence, class_id = [], [], []
         for result in results:
             boxes = result.boxes
-            
-            for box in boxes:
-                bbox = box.xyxy[0].tolist()
-                confidence = float(box.conf[0])
-                class_id = int(box.cls[0])
-                
-                # Calculate area
-                width = bbox[2] - bbox[0]
-                height = bbox[3] - bbox[1]
-                area = width * height
-                
-                # Determine severity and location
-                severity = self.classify_severity(confidence, area)
-                location = self.determine_location(bbox, image_shape)
-                
-                # Simplified caries type based on class_id
-                caries_types = {0: "enamel", 1: "dentin", 2: "pulp"}
-                caries_type = caries_types.get(class_id, "enamel")
-                
-                detection = {
-                    "class_id": class_id,
-                    "confidence": confidence,
-                    "bbox": {
-                        "x": bbox[0],
-                        "y": bbox[1],
-                        "width": width,
-                        "height": height
-                    },
-                    "severity": severity,
-                    "caries_type": caries_type,
-                    "location": location,
-                    "area_mm2": area,  # This should be calibrated in production
-                    "treatment_recommendation": self.generate_treatment_recommendation(severity, caries_type)
-                }
-                
-                detections.append(detection)
+            xyxy.append(to_numpy(boxes.xyxy).reshape(-1, 4).astype(np.float64))
+            confidence.append(to_numpy(boxes.conf).reshape(-1).astype(np.float64))
+            class_id.append(to_numpy(boxes.cls).reshape(-1).astype(np.int64))
+        
+        xyxy = np.concatenate(xyxy) if xyxy else np.zeros((0, 4))
+        confidence = np.concatenate(confidence) if confidence else np.zeros(0)
+        class_id = np.concatenate(class_id) if class_id else np.zeros(0, dtype=np.int64)
+        
+        y_center = (xyxy[:, 1] + xyxy[:, 3]) / 2
+        
+        # Same thresholds as classify_severity / determine_location
+        severity = np.select([confidence >= 0.8, confidence >= 0.6], [2, 1], default=0)
+        location = np.select(
+            [y_center < image_shape[0] / 3, y_center > 2 * image_shape[0] / 3], [0, 2], default=1
+        )
+        # Unknown classes fall back to enamel
+        caries_type = np.where((class_id >= 0) & (class_id < len(CARIES_TYPES)), class_id, 0)
         
-        return detections
+        return DetectionColumns(
+            class_id=class_id,
+            confidence=confidence,
+            xyxy=xyxy,
+            area=(xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1]),
+            severity=SEVERITIES[severity],
+            caries_type=CARIES_TYPES[caries_type],
+            location=LOCATIONS[location],
+            treatment_recommendation=RECOMMENDATIONS[severity * len(CARIES_TYPES) + caries_type]
+        )
+
+def to_numpy(values) -> np.ndarray:
+    """Convert a torch tensor or array-like to a NumPy array"""
+    if hasattr(values, "cpu"):
+        values = values.cpu().numpy()
+    return np.asarray(values)
+
+SEVERITIES = np.array(["mild", "moderate", "severe"], dtype=object)
+CARIES_TYPES = np.array(["enamel", "dentin", "pulp"], dtype=object)
+LOCATIONS = np.array(["occlusal", "interproximal", "apical"], dtype=object)
+
+# Indexed by severity * len(CARIES_TYPES) + caries_type
+RECOMMENDATIONS = np.array([
+    ResultProcessor.generate_treatment_recommendation(severity, caries_type)
+    for severity in SEVERITIES
+    for caries_type in CARIES_TYPES
+], dtype=object)
+
+class DetectionColumns:
+    """Findings for one image as NumPy columns, one row per finding"""
+    def __init__(self, class_id, confidence, xyxy, area, severity, caries_type, location, treatment_recommendation):
+        self.class_id = class_id
+        self.confidence = confidence
+        self.xyxy = xyxy
+        self.area = area
+        self.severity = severity
+        self.caries_type = caries_type
+        self.location = location
+        self.treatment_recommendation = treatment_recommendation
+    
+    def __len__(self) -> int:
+        return len(self.confidence)
+    
+    @property
+    def width(self) -> np.ndarray:
+        return self.xyxy[:, 2] - self.xyxy[:, 0]
+    
+    @property
+    def height(self) -> np.ndarray:
+        return self.xyxy[:, 3] - self.xyxy[:, 1]
+    
+    @classmethod
+    def from_dicts(cls, findings: List[Dict[str, Any]]) -> "DetectionColumns":
+        """Columns from stored findings, e.g. to reuse an earlier detection's results"""
+        caries_types = CARIES_TYPES.tolist()
+        xyxy = np.array([
+            [f["bbox"]["x"], f["bbox"]["y"], f["bbox"]["x"] + f["bbox"]["width"], f["bbox"]["y"] + f["bbox"]["height"]]
+            for f in findings
+        ], dtype=np.float64).reshape(-1, 4)
+        
+        def column(key: str) -> np.ndarray:
+            values = np.empty(len(findings), dtype=object)
+            values[:] = [f[key] for f in findings]
+            return values
+        
+        return cls(
+            class_id=np.array(
+                [caries_types.index(f["caries_type"]) if f["caries_type"] in caries_types else 0 for f in findings],
+                dtype=np.int64
+            ),
+            confidence=np.array([f["confidence"] for f in findings], dtype=np.float64),
+            xyxy=xyxy,
+            area=np.array([f["area_mm2"] for f in findings], dtype=np.float64),
+            severity=column("severity"),
+            caries_type=column("caries_type"),
+            location=column("location"),
+            treatment_recommendation=column("treatment_recommendation")
+        )
+    
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Build one dict per finding, with plain Python values"""
+        return [
+            {
+                "class_id": class_id,
+                "confidence": confidence,
+                "bbox": {
+                    "x": x,
+                    "y": y,
+                    "width": width,
+                    "height": height
+                },
+                "severity": severity,
+                "caries_type": caries_type,
+                "location": location,
+                "area_mm2": area,  # This should be calibrated in production
+                "treatment_recommendation": recommendation
+            }
+            for class_id, confidence, x, y, width, height, area, severity, caries_type, location, recommendation in zip(
+                self.class_id.tolist(),
+                self.confidence.tolist(),
+                self.xyxy[:, 0].tolist(),
+                self.xyxy[:, 1].tolist(),
+                self.width.tolist(),
+                self.height.tolist(),
+                self.area.tolist(),
+                self.severity.tolist(),
+                self.caries_type.tolist(),
+                self.location.tolist(),
+                self.treatment_recommendation.tolist()
+            )
+        ]
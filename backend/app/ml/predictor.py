@@ -1,32 +1,123 @@
 import time
 from typing import List, Dict, Any
+import numpy as np
 from .model_loader import model_loader
+from .onnx_backend import OnnxResults
+from .postprocessor import to_numpy
+from .tiling import make_tiles, merge_tile_detections
 from ..core.config import settings
+from ..core.metrics import INFERENCE_BATCH_SIZE, INFERENCE_SECONDS
 
 class CariesDetector:
     def __init__(self):
-        self.model = model_loader.get_model()
         self.conf_threshold = settings.CONFIDENCE_THRESHOLD
         self.iou_threshold = settings.IOU_THRESHOLD
     
-    def detect(self, image_path: str, save_dir: str) -> Dict[str, Any]:
-        """Perform caries detection"""
-        start_time = time.time()
-        
-        # Run inference
-        results = self.model.predict(
-            source=image_path,
-            conf=self.conf_threshold,
-            iou=self.iou_threshold,
-            save=True,
-            project=save_dir,
-            name="detection",
-            exist_ok=True
+    def detect(self, image: np.ndarray) -> Dict[str, Any]:
+        """Perform caries detection on a decoded BGR image"""
+        # Hold the current default model version for the whole inference
+        with model_loader.acquire() as (model_version, model):
+            start_time = time.time()
+            
+            # Run inference
+            results = model.predict(
+                source=image,
+                conf=self.conf_threshold,
+                iou=self.iou_threshold,
+                verbose=False
+            )
+            
+            processing_time = (time.time() - start_time) * 1000  # Convert to ms
+        
+        self._record_metrics("single", processing_time, 1)
+        
+        return {
+            "results": list(results),
+            "processing_time_ms": processing_time,
+            "model_version": model_version
+        }
+    
+    def detect_batch(self, images: List[np.ndarray]) -> Dict[str, Any]:
+        """Perform caries detection on several decoded images in a single forward pass
+        
+        Returns one result per input image, in input order.
+        """
+        # Hold the current default model version for the whole inference
+        with model_loader.acquire() as (model_version, model):
+            start_time = time.time()
+            
+            # Run batched inference
+            results = model.predict(
+                source=list(images),
+                conf=self.conf_threshold,
+                iou=self.iou_threshold,
+                batch=len(images),
+                verbose=False
+            )
+            
+            processing_time = (time.time() - start_time) * 1000  # Convert to ms
+        
+        self._record_metrics("batch", processing_time, len(images))
+        
+        return {
+            "results": list(results),
+            "processing_time_ms": processing_time,
+            "model_version": model_version
+        }
+    
+    def detect_tiled(self, image: np.ndarray) -> Dict[str, Any]:
+        """Perform caries detection on overlapping tiles of a large image
+        
+        Tiles run as one batch at (close to) native resolution, so small
+        lesions are not lost to downscaling. Boxes are mapped back to image
+        coordinates and merged into a single result.
+        """
+        tiles = make_tiles(
+            *image.shape[:2],
+            tile_size=settings.TILE_SIZE,
+            overlap=settings.TILE_OVERLAP,
+            max_tiles=settings.TILE_MAX_COUNT
         )
+        crops = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+        
+        # Hold the current default model version for the whole inference
+        with model_loader.acquire() as (model_version, model):
+            start_time = time.time()
+            
+            # Run all tiles in one batch
+            results = list(model.predict(
+                source=crops,
+                conf=self.conf_threshold,
+                iou=self.iou_threshold,
+                batch=len(crops),
+                verbose=False
+            ))
+            
+            # Shift tile boxes to image coordinates and merge duplicates from overlaps
+            detections = []
+            for (x1, y1, _, _), result in zip(tiles, results):
+                boxes = to_numpy(result.boxes.data).reshape(-1, 6).astype(np.float32)
+                boxes[:, [0, 2]] += x1
+                boxes[:, [1, 3]] += y1
+                detections.append(boxes)
+            merged = merge_tile_detections(
+                np.concatenate(detections),
+                method=settings.TILE_MERGE_METHOD,
+                match_threshold=settings.TILE_MATCH_THRESHOLD
+            )
+            
+            processing_time = (time.time() - start_time) * 1000  # Convert to ms
         
-        processing_time = (time.time() - start_time) * 1000  # Convert to ms
+        self._record_metrics("tiled", processing_time, len(tiles))
         
         return {
-            "results": results,
-            "processing_time_ms": processing_time
-        }
\ No newline at end of file
+            "results": [OnnxResults(path="", orig_img=image, boxes=merged, names=results[0].names)],
+            "processing_time_ms": processing_time,
+            "model_version": model_version,
+            "tile_count": len(tiles)
+        }
+    
+    @staticmethod
+    def _record_metrics(mode: str, processing_time_ms: float, batch_size: int):
+        INFERENCE_SECONDS.labels(mode).observe(processing_time_ms / 1000)
+        INFERENCE_BATCH_SIZE.labels(mode).observe(batch_size)
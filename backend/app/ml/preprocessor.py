@@ -1,15 +1,41 @@
-import cv2
 import numpy as np
-from PIL import Image
+from typing import Union
+from .cpu import configure_opencv
 
 class ImagePreprocessor:
     @staticmethod
-    def preprocess(image_path: str, target_size: tuple = (640, 640)):
-        """Preprocess image for YOLOv8"""
-        # Read image
+    def decode(image_bytes: bytes) -> np.ndarray:
+        """Decode encoded image bytes (JPEG/PNG/BMP) into a BGR array"""
+        import cv2
+        
+        configure_opencv()
+        image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Could not decode image")
+        return image
+    
+    @staticmethod
+    def load(image_path: str) -> np.ndarray:
+        """Read an image file into a BGR array"""
+        import cv2
+        
+        configure_opencv()
         image = cv2.imread(image_path)
         if image is None:
             raise ValueError(f"Could not read image from {image_path}")
+        return image
+    
+    @staticmethod
+    def preprocess(image: Union[str, np.ndarray], target_size: tuple = (640, 640)):
+        """Preprocess image for YOLOv8
+        
+        Accepts an already decoded array or a path to read.
+        """
+        import cv2
+        
+        # Read image
+        if isinstance(image, str):
+            image = ImagePreprocessor.load(image)
         
         # Resize
         image = cv2.resize(image, target_size)
@@ -27,4 +53,6 @@ class ImagePreprocessor:
     @staticmethod
     def save_preprocessed(image: np.ndarray, output_path: str):
         """Save preprocessed image"""
+        import cv2
+        
         cv2.imwrite(output_path, image)
\ No newline at end of file
@@ -0,0 +1,206 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+# Per-worker state, set by _init_worker in each child process
+_worker_cpus: List[int] = []
+
+def parse_cpu_sets(spec: str, workers: int) -> List[List[int]]:
+    """CPU sets for each worker
+    
+    spec is "0-1;2-3" (one set per worker, ';' between workers, ',' and '-'
+    within a set). When empty, the CPUs this process may run on are split
+    into equal contiguous chunks.
+    """
+    if spec.strip():
+        cpu_sets = []
+        for worker_spec in spec.split(";"):
+            cpus = []
+            for part in filter(None, (p.strip() for p in worker_spec.split(","))):
+                first, _, last = part.partition("-")
+                cpus.extend(range(int(first), int(last or first) + 1))
+            cpu_sets.append(cpus)
+        if len(cpu_sets) < workers:
+            raise ValueError(f"INFERENCE_WORKER_CPUS lists {len(cpu_sets)} CPU sets for {workers} workers")
+        return cpu_sets[:workers]
+    
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    chunk = max(1, len(available) // workers)
+    return [available[i * chunk:(i + 1) * chunk] or available for i in range(workers)]
+
+def _init_worker(cpu_sets):
+    """Pin the worker to its CPU set before torch/onnxruntime create their thread pools"""
+    from .cpu import pin_process
+    
+    global _worker_cpus
+    _worker_cpus = cpu_sets.get()
+    pin_process(_worker_cpus)
+    os.environ["OMP_NUM_THREADS"] = str(max(1, len(_worker_cpus)))
+
+def _detect(
+    model_version: str,
+    model_path: str,
+    image_path: str,
+    image_bytes: Optional[bytes],
+    tiled: bool,
+    render_annotated: bool
+) -> Dict[str, Any]:
+    """Decode, detect, postprocess and render one image inside a worker process"""
+    from ..core.config import settings
+    from .model_loader import model_loader
+    from .predictor import CariesDetector
+    from .preprocessor import ImagePreprocessor
+    from .postprocessor import ResultProcessor
+    from .renderer import AnnotationRenderer
+    from ..utils.timing import StageTimer
+    
+    start_time = time.time()
+    timer = StageTimer()
+    
+    # Follow the parent's default version (hot swaps happen in the parent)
+    if model_version != model_loader.default_version:
+        model_loader.register_version(model_version, model_path)
+        model_loader.set_default_version(model_version)
+    
+    with timer.stage("decode"):
+        if image_bytes is not None:
+            image = ImagePreprocessor.decode(image_bytes)
+        else:
+            image = ImagePreprocessor.load(image_path)
+    
+    detector = CariesDetector()
+    with timer.stage("inference"):
+        detection_results = detector.detect_tiled(image) if tiled else detector.detect(image)
+    with timer.stage("postprocess"):
+        detections = ResultProcessor().process_results(detection_results["results"], image.shape)
+    
+    annotated = None
+    if render_annotated:
+        with timer.stage("render"):
+            annotated = AnnotationRenderer.encode(
+                AnnotationRenderer.render(image, detections),
+                settings.ANNOTATED_IMAGE_FORMAT,
+                settings.ANNOTATED_IMAGE_QUALITY
+            )
+    
+    return {
+        "detections": detections,
+        "annotated": annotated,
+        "processing_time_ms": detection_results["processing_time_ms"],
+        "model_version": detection_results["model_version"],
+        "timings": timer.timings,
+        "busy_seconds": time.time() - start_time,
+        "pid": os.getpid(),
+        "cpus": _worker_cpus
+    }
+
+class InferencePool:
+    """Run detections in worker processes, each with its own model copy
+    
+    Keeps the forward pass (and the GIL-bound pre/postprocessing around it)
+    out of the API process, so the event loop stays responsive while a
+    detection runs. Workers are started with spawn and pinned to disjoint
+    CPU sets.
+    """
+    
+    def __init__(self, workers: int, cpu_spec: str = ""):
+        self.workers = workers
+        self.cpu_sets = parse_cpu_sets(cpu_spec, workers)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._started_at = None
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._busy_seconds = 0.0
+        self._worker_tasks: Dict[int, Dict[str, Any]] = {}
+    
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        """Start the worker processes on first use"""
+        with self._executor_lock:
+            if self._executor is None:
+                context = multiprocessing.get_context("spawn")  # fork is unsafe with torch threads
+                cpu_sets = context.Queue()
+                for cpus in self.cpu_sets:
+                    cpu_sets.put(cpus)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(cpu_sets,)
+                )
+                self._started_at = time.monotonic()
+            return self._executor
+    
+    def submit(
+        self,
+        image_path: str,
+        image_bytes: Optional[bytes] = None,
+        tiled: bool = False,
+        render_annotated: bool = True
+    ) -> Future:
+        """Queue an image for detection in a worker
+        
+        The future resolves to a dictionary with 'detections' (ResultProcessor
+        output), 'annotated' (encoded image bytes or None),
+        'processing_time_ms', 'model_version' and 'timings' (milliseconds per
+        stage inside the worker).
+        """
+        from .model_loader import model_loader
+        
+        version = model_loader.default_version
+        future = self._ensure_executor().submit(
+            _detect, version, model_loader.get_version_path(version), image_path, image_bytes, tiled, render_annotated
+        )
+        with self._stats_lock:
+            self._submitted += 1
+        future.add_done_callback(self._record)
+        return future
+    
+    def detect(self, *args, **kwargs) -> Dict[str, Any]:
+        """Run a detection in a worker and wait for it (see submit)"""
+        return self.submit(*args, **kwargs).result()
+    
+    def _record(self, future: Future):
+        with self._stats_lock:
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+                return
+            output = future.result()
+            self._completed += 1
+            self._busy_seconds += output["busy_seconds"]
+            worker = self._worker_tasks.setdefault(
+                output["pid"], {"cpus": output["cpus"], "tasks": 0, "busy_seconds": 0.0}
+            )
+            worker["tasks"] += 1
+            worker["busy_seconds"] += output["busy_seconds"]
+    
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and worker utilization"""
+        with self._stats_lock:
+            in_flight = self._submitted - self._completed - self._failed
+            uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+            return {
+                "workers": self.workers,
+                "cpu_sets": self.cpu_sets,
+                "in_flight": in_flight,
+                "queue_depth": max(0, in_flight - self.workers),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "utilization": self._busy_seconds / (uptime * self.workers) if uptime else 0.0,
+                "per_worker": {
+                    str(pid): {**worker, "utilization": worker["busy_seconds"] / uptime if uptime else 0.0}
+                    for pid, worker in self._worker_tasks.items()
+                }
+            }
@@ -0,0 +1,62 @@
+"""Image quality gate: cheap checks that turn away unusable captures before inference"""
+import time
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from ..core.config import settings
+
+CLIPPED_LEVEL = 250  # Gray level from which a pixel counts as blown out
+HIGHLIGHT_PERCENTILE = 99  # Brightness of the brightest structures, ignoring a few hot pixels
+
+def _issue(check: str, message: str) -> Dict[str, str]:
+    return {"check": check, "message": message}
+
+def assess_image_quality(gray: np.ndarray, original_size: Tuple[int, int]) -> Dict[str, Any]:
+    """Measure a capture and list the checks it fails, reporting only the root cause
+    
+    Args:
+        gray: 8-bit grayscale copy of the image, at a quarter of its size
+        original_size: (width, height) of the uploaded image
+    
+    Returns:
+        Dictionary with 'passed', 'issues' (each a 'check' name and a message
+        for the dentist), 'metrics' and 'elapsed_ms'
+    """
+    import cv2
+    
+    start_time = time.perf_counter()
+    width, height = original_size
+    histogram = np.bincount(gray.ravel(), minlength=256)
+    cumulative = np.cumsum(histogram)
+    metrics = {
+        "width": int(width),
+        "height": int(height),
+        "contrast": round(float(gray.std()), 2),
+        "clipped_fraction": round(float(histogram[CLIPPED_LEVEL:].sum() / gray.size), 4),
+        "highlight_level": int(np.searchsorted(cumulative, gray.size * HIGHLIGHT_PERCENTILE / 100)),
+        "sharpness": None
+    }
+    
+    issues: List[Dict[str, str]] = []
+    if min(width, height) < settings.QUALITY_MIN_SIDE_PX:
+        issues.append(_issue(
+            "resolution",
+            f"The image is {width}x{height} px; at least {settings.QUALITY_MIN_SIDE_PX} px on the short side is needed"
+        ))
+    if metrics["contrast"] < settings.QUALITY_MIN_CONTRAST:
+        issues.append(_issue("blank", "The image is nearly uniform; check that the sensor or lens was not covered"))
+    elif metrics["clipped_fraction"] > settings.QUALITY_MAX_CLIPPED_FRACTION:
+        issues.append(_issue("overexposed", "Large parts of the image are blown out; reduce exposure or flash"))
+    elif metrics["highlight_level"] < settings.QUALITY_MIN_HIGHLIGHT_LEVEL:
+        issues.append(_issue("underexposed", "The image is too dark; increase exposure"))
+    else:
+        # Variance of the Laplacian: edges and fine detail are what blur removes
+        metrics["sharpness"] = round(float(cv2.Laplacian(gray, cv2.CV_64F).var()), 2)
+        if metrics["sharpness"] < settings.QUALITY_MIN_SHARPNESS:
+            issues.append(_issue("blur", "The image is blurred; hold the camera or sensor still and refocus"))
+    
+    return {
+        "passed": not issues,
+        "issues": issues,
+        "metrics": metrics,
+        "elapsed_ms": round((time.perf_counter() - start_time) * 1000, 3)
+    }
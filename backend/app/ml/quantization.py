@@ -0,0 +1,307 @@
+"""
+INT8 post-training quantization for the ONNX caries model
+
+Usage (from backend/):
+    python -m app.ml.quantization --model models/best.pt --mode static \
+        --calibration-dir uploads --eval-dir uploads --report quantization_report.json
+
+Produces <model>.<hash>.int8.onnx next to the FP32 export, which the
+"onnx_int8" inference backend serves, and a report comparing it with
+the FP32 model (box agreement, mAP@0.5 against FP32 detections, p50/p95
+latency and peak RSS).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import time
+from typing import List, Dict, Any, Optional
+import cv2
+import numpy as np
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    QuantFormat,
+    QuantType,
+    quantize_dynamic,
+    quantize_static,
+)
+from .onnx_backend import export_onnx, letterbox
+from ..utils.validation import ALLOWED_EXTENSIONS
+
+def quantized_model_path(onnx_path: str) -> str:
+    """Path of the INT8 model that belongs to an FP32 ONNX export"""
+    stem, _ = os.path.splitext(onnx_path)
+    return f"{stem}.int8.onnx"
+
+def list_images(folder: str, limit: Optional[int] = None) -> List[str]:
+    """Sorted image files in a folder"""
+    paths = sorted(
+        os.path.join(folder, name)
+        for name in os.listdir(folder)
+        if os.path.splitext(name)[1].lower() in ALLOWED_EXTENSIONS
+    )
+    return paths[:limit] if limit else paths
+
+class ImageFolderCalibrationReader(CalibrationDataReader):
+    """Feed letterboxed images from a folder to the static quantizer"""
+    
+    def __init__(self, input_name: str, image_paths: List[str], imgsz: int = 640):
+        self.input_name = input_name
+        self.image_paths = iter(image_paths)
+        self.imgsz = imgsz
+    
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        for path in self.image_paths:
+            image = cv2.imread(path)
+            if image is None:
+                continue
+            padded, _, _ = letterbox(image, self.imgsz)
+            blob = padded[:, :, ::-1].transpose(2, 0, 1)[None]
+            return {self.input_name: np.ascontiguousarray(blob, dtype=np.float32) / 255.0}
+        return None
+
+def quantize_model(
+    onnx_path: str,
+    output_path: Optional[str] = None,
+    mode: str = "dynamic",
+    calibration_dir: Optional[str] = None,
+    max_calibration_images: int = 100,
+    imgsz: int = 640
+) -> str:
+    """Quantize an FP32 ONNX model to INT8
+    
+    Args:
+        mode: "dynamic" (weights only, no data needed) or "static"
+            (weights and activations, calibrated on calibration_dir)
+    
+    Returns:
+        Path of the INT8 model
+    """
+    output_path = output_path or quantized_model_path(onnx_path)
+    
+    if mode == "dynamic":
+        quantize_dynamic(onnx_path, output_path, weight_type=QuantType.QUInt8)
+    elif mode == "static":
+        if not calibration_dir:
+            raise ValueError("Static quantization requires a calibration image folder")
+        image_paths = list_images(calibration_dir, max_calibration_images)
+        if not image_paths:
+            raise ValueError(f"No calibration images found in {calibration_dir}")
+        
+        import onnxruntime as ort
+        session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        reader = ImageFolderCalibrationReader(session.get_inputs()[0].name, image_paths, imgsz)
+        del session
+        
+        quantize_static(
+            onnx_path,
+            output_path,
+            reader,
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8
+        )
+    else:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+    
+    return output_path
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between two sets of xyxy boxes"""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = (bottom_right - top_left).clip(0).prod(axis=2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+def compare_detections(
+    reference: List[np.ndarray],
+    candidate: List[np.ndarray],
+    iou_threshold: float = 0.5
+) -> Dict[str, Any]:
+    """Compare candidate detections against reference detections per image
+    
+    Both lists hold one (n, 6) array of x1, y1, x2, y2, confidence, class_id
+    per image. The reference detections are treated as ground truth.
+    """
+    records = []  # (class_id, confidence, is_true_positive)
+    ground_truth_counts: Dict[int, int] = {}
+    matched_ious = []
+    
+    for ref, cand in zip(reference, candidate):
+        for cls in ref[:, 5].astype(int):
+            ground_truth_counts[cls] = ground_truth_counts.get(cls, 0) + 1
+        
+        ious = box_iou(cand[:, :4], ref[:, :4]) if len(cand) and len(ref) else np.zeros((len(cand), len(ref)))
+        used = np.zeros(len(ref), dtype=bool)
+        for i in np.argsort(-cand[:, 4]):
+            same_class = ref[:, 5] == cand[i, 5]
+            candidates = np.where(same_class & ~used, ious[i], 0.0)
+            j = int(candidates.argmax()) if len(candidates) else -1
+            is_match = j >= 0 and candidates[j] >= iou_threshold
+            if is_match:
+                used[j] = True
+                matched_ious.append(float(candidates[j]))
+            records.append((int(cand[i, 5]), float(cand[i, 4]), is_match))
+    
+    # Average precision per class (all-point interpolation)
+    average_precisions = {}
+    for cls, total in ground_truth_counts.items():
+        class_records = sorted((r for r in records if r[0] == cls), key=lambda r: -r[1])
+        tp = np.cumsum([r[2] for r in class_records]) if class_records else np.zeros(0)
+        fp = np.cumsum([not r[2] for r in class_records]) if class_records else np.zeros(0)
+        recall = np.concatenate([[0.0], tp / total, [1.0]])
+        precision = np.concatenate([[1.0], tp / np.maximum(tp + fp, 1), [0.0]])
+        precision = np.maximum.accumulate(precision[::-1])[::-1]
+        average_precisions[cls] = float(np.sum((recall[1:] - recall[:-1]) * precision[1:]))
+    
+    total_matches = len(matched_ious)
+    total_reference = sum(ground_truth_counts.values())
+    total_candidate = len(records)
+    
+    return {
+        "reference_boxes": total_reference,
+        "candidate_boxes": total_candidate,
+        "matched_boxes": total_matches,
+        "precision": total_matches / total_candidate if total_candidate else 1.0,
+        "recall": total_matches / total_reference if total_reference else 1.0,
+        "mean_matched_iou": float(np.mean(matched_ious)) if matched_ious else None,
+        "map50": float(np.mean(list(average_precisions.values()))) if average_precisions else None,
+        "ap50_per_class": {str(cls): ap for cls, ap in sorted(average_precisions.items())}
+    }
+
+def _benchmark_worker(onnx_path, image_paths, conf, iou, imgsz, warmup, queue):
+    """Run one model over the images in a fresh process so peak RSS is its own"""
+    from .onnx_backend import OnnxCariesModel
+    
+    model = OnnxCariesModel(onnx_path, imgsz=imgsz)
+    for path in image_paths[:warmup]:
+        model.predict(path, conf=conf, iou=iou)
+    
+    detections, latencies = [], []
+    for path in image_paths:
+        start_time = time.perf_counter()
+        result = model.predict(path, conf=conf, iou=iou)[0]
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        detections.append(result.boxes.data)
+    
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    queue.put((detections, latencies, peak_rss_mb))
+
+def benchmark_model(onnx_path: str, image_paths: List[str], conf: float, iou: float, imgsz: int, warmup: int = 2) -> Dict[str, Any]:
+    """Latency, peak RSS and detections of one model"""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(
+        target=_benchmark_worker,
+        args=(onnx_path, image_paths, conf, iou, imgsz, warmup, queue)
+    )
+    process.start()
+    detections, latencies, peak_rss_mb = queue.get()
+    process.join()
+    
+    return {
+        "detections": detections,
+        "latency_ms": {
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            "mean": float(np.mean(latencies))
+        },
+        "peak_rss_mb": peak_rss_mb,
+        "model_size_mb": os.path.getsize(onnx_path) / (1024 * 1024)
+    }
+
+def build_report(
+    fp32_path: str,
+    int8_path: str,
+    image_dir: str,
+    conf: float = 0.25,
+    iou: float = 0.45,
+    imgsz: int = 640,
+    max_images: Optional[int] = None
+) -> Dict[str, Any]:
+    """Compare the INT8 model with the FP32 model on a local image folder"""
+    image_paths = list_images(image_dir, max_images)
+    if not image_paths:
+        raise ValueError(f"No evaluation images found in {image_dir}")
+    
+    fp32 = benchmark_model(fp32_path, image_paths, conf, iou, imgsz)
+    int8 = benchmark_model(int8_path, image_paths, conf, iou, imgsz)
+    
+    return {
+        "images": len(image_paths),
+        "conf_threshold": conf,
+        "iou_threshold": iou,
+        "fp32": {"path": fp32_path, **{k: v for k, v in fp32.items() if k != "detections"}},
+        "int8": {"path": int8_path, **{k: v for k, v in int8.items() if k != "detections"}},
+        "agreement": compare_detections(fp32["detections"], int8["detections"])
+    }
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Human-readable summary of a quantization report"""
+    agreement = report["agreement"]
+    lines = [
+        f"Images evaluated: {report['images']}",
+        "",
+        f"{'':<8}{'p50 ms':>10}{'p95 ms':>10}{'peak RSS MB':>14}{'size MB':>10}",
+    ]
+    for name in ("fp32", "int8"):
+        stats = report[name]
+        lines.append(
+            f"{name:<8}{stats['latency_ms']['p50']:>10.1f}{stats['latency_ms']['p95']:>10.1f}"
+            f"{stats['peak_rss_mb']:>14.1f}{stats['model_size_mb']:>10.1f}"
+        )
+    map50 = agreement["map50"]
+    lines += [
+        "",
+        f"Box agreement: {agreement['matched_boxes']}/{agreement['reference_boxes']} FP32 boxes matched "
+        f"(precision {agreement['precision']:.3f}, recall {agreement['recall']:.3f})",
+        f"mAP@0.5 vs FP32: {map50:.3f}" if map50 is not None else "mAP@0.5 vs FP32: n/a (no FP32 detections)",
+    ]
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize the caries model to INT8 and report accuracy/latency")
+    parser.add_argument("--model", default="models/best.pt", help="Path to the FP32 .pt model")
+    parser.add_argument("--mode", choices=["dynamic", "static"], default="static")
+    parser.add_argument("--calibration-dir", default="uploads", help="Images used to calibrate static quantization")
+    parser.add_argument("--max-calibration-images", type=int, default=100)
+    parser.add_argument("--eval-dir", default="uploads", help="Images used for the comparison report")
+    parser.add_argument("--max-eval-images", type=int, default=None)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--iou", type=float, default=0.45)
+    parser.add_argument("--report", default="quantization_report.json", help="Where to write the JSON report")
+    args = parser.parse_args()
+    
+    fp32_path = export_onnx(args.model, imgsz=args.imgsz)
+    int8_path = quantize_model(
+        fp32_path,
+        mode=args.mode,
+        calibration_dir=args.calibration_dir,
+        max_calibration_images=args.max_calibration_images,
+        imgsz=args.imgsz
+    )
+    print(f"INT8 model written to {int8_path}")
+    
+    report = build_report(
+        fp32_path,
+        int8_path,
+        args.eval_dir,
+        conf=args.conf,
+        iou=args.iou,
+        imgsz=args.imgsz,
+        max_images=args.max_eval_images
+    )
+    report["mode"] = args.mode
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    
+    print(format_report(report))
+    print(f"Report written to {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import numpy as np
+from .postprocessor import DetectionColumns
+
+class AnnotationRenderer:
+    """Draw caries findings onto an image and encode it in memory"""
+    
+    # BGR colors per severity
+    SEVERITY_COLORS = {
+        "mild": (80, 200, 255),      # amber
+        "moderate": (0, 140, 255),   # orange
+        "severe": (40, 40, 220),     # red
+    }
+    DEFAULT_COLOR = (255, 200, 0)
+    
+    @classmethod
+    def render(cls, image: np.ndarray, detections: DetectionColumns) -> np.ndarray:
+        """Draw boxes and labels from ResultProcessor output onto a copy of the image"""
+        import cv2
+        
+        annotated = image.copy()
+        height, width = annotated.shape[:2]
+        
+        # Scale line width and font with the image so panoramics stay readable
+        thickness = max(2, round(max(height, width) / 500))
+        font_scale = max(0.5, max(height, width) / 1600)
+        
+        for (x1, y1, x2, y2), severity, caries_type, confidence in zip(
+            detections.xyxy.astype(np.int64).tolist(),
+            detections.severity.tolist(),
+            detections.caries_type.tolist(),
+            detections.confidence.tolist()
+        ):
+            color = cls.SEVERITY_COLORS.get(severity, cls.DEFAULT_COLOR)
+            
+            cv2.rectangle(annotated, (x1, y1), (x2, y2), color, thickness, cv2.LINE_AA)
+            
+            label = f"{caries_type} {severity} {confidence:.2f}"
+            (text_width, text_height), baseline = cv2.getTextSize(
+                label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, max(1, thickness - 1)
+            )
+            # Put the label above the box, or inside it when the box touches the top edge
+            label_top = y1 - text_height - baseline if y1 - text_height - baseline >= 0 else y1
+            cv2.rectangle(
+                annotated,
+                (x1, label_top),
+                (x1 + text_width, label_top + text_height + baseline),
+                color,
+                cv2.FILLED
+            )
+            cv2.putText(
+                annotated,
+                label,
+                (x1, label_top + text_height),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                font_scale,
+                (255, 255, 255),
+                max(1, thickness - 1),
+                cv2.LINE_AA
+            )
+        
+        return annotated
+    
+    @staticmethod
+    def encode(image: np.ndarray, image_format: str = "jpg", quality: int = 85) -> bytes:
+        """Encode an image to JPEG or WebP bytes"""
+        import cv2
+        
+        image_format = image_format.lower().lstrip(".")
+        if image_format in ("jpg", "jpeg"):
+            params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+            extension = ".jpg"
+        elif image_format == "webp":
+            params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+            extension = ".webp"
+        else:
+            raise ValueError(f"Unsupported annotated image format: {image_format}")
+        
+        success, buffer = cv2.imencode(extension, image, params)
+        if not success:
+            raise ValueError(f"Could not encode image as {image_format}")
+        return buffer.tobytes()
\ No newline at end of file
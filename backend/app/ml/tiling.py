@@ -0,0 +1,103 @@
+import math
+from typing import List, Tuple
+import numpy as np
+from .onnx_backend import nms
+
+def tile_starts(length: int, tile_size: int, stride: int) -> List[int]:
+    """Evenly spaced tile offsets along one axis, the last tile flush with the edge"""
+    if length <= tile_size:
+        return [0]
+    count = math.ceil((length - tile_size) / stride) + 1
+    return np.linspace(0, length - tile_size, count).round().astype(int).tolist()
+
+def make_tiles(
+    height: int,
+    width: int,
+    tile_size: int = 640,
+    overlap: float = 0.2,
+    max_tiles: int = 24
+) -> List[Tuple[int, int, int, int]]:
+    """Cover an image with overlapping square tiles
+    
+    When the image would need more than max_tiles tiles the tile size is
+    grown until it fits, so latency stays bounded at the cost of some
+    downscaling inside each tile.
+    
+    Returns:
+        List of (x1, y1, x2, y2) tile windows
+    """
+    while True:
+        stride = max(1, int(tile_size * (1 - overlap)))
+        xs = tile_starts(width, tile_size, stride)
+        ys = tile_starts(height, tile_size, stride)
+        if len(xs) * len(ys) <= max_tiles or tile_size >= max(height, width):
+            break
+        tile_size = int(tile_size * 1.25)
+    
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in ys
+        for x in xs
+    ]
+
+def intersection_over_smaller(box: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Overlap of one xyxy box with many, relative to the smaller box of each pair
+    
+    Unlike IoU this is close to 1 when a box cut off at a tile edge lies
+    inside the full box seen by the neighbouring tile.
+    """
+    inter_w = (np.minimum(box[2], others[:, 2]) - np.maximum(box[0], others[:, 0])).clip(0)
+    inter_h = (np.minimum(box[3], others[:, 3]) - np.maximum(box[1], others[:, 1])).clip(0)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    other_areas = (others[:, 2] - others[:, 0]) * (others[:, 3] - others[:, 1])
+    return inter_w * inter_h / (np.minimum(area, other_areas) + 1e-9)
+
+def weighted_box_fusion(detections: np.ndarray, match_threshold: float) -> np.ndarray:
+    """Class-aware weighted box fusion
+    
+    Boxes of the same class overlapping the highest scoring remaining box
+    are fused into one box whose coordinates are the confidence-weighted
+    average; the fused confidence is the highest of the cluster so a lesion
+    split across tiles keeps its severity.
+    """
+    order = detections[:, 4].argsort()[::-1]
+    detections = detections[order]
+    
+    fused = []
+    remaining = np.arange(len(detections))
+    while remaining.size > 0:
+        top = detections[remaining[0]]
+        candidates = detections[remaining]
+        match = (candidates[:, 5] == top[5]) & (intersection_over_smaller(top, candidates) > match_threshold)
+        cluster = candidates[match]
+        
+        weights = cluster[:, 4:5]
+        box = (cluster[:, :4] * weights).sum(axis=0) / weights.sum()
+        fused.append(np.concatenate([box, [cluster[:, 4].max(), top[5]]]))
+        remaining = remaining[~match]
+    
+    return np.array(fused, dtype=np.float32)
+
+def merge_tile_detections(
+    detections: np.ndarray,
+    method: str = "wbf",
+    match_threshold: float = 0.5
+) -> np.ndarray:
+    """Merge boxes from overlapping tiles, already in global coordinates
+    
+    Args:
+        detections: Array of shape (n, 6) with x1, y1, x2, y2, confidence, class_id
+        method: "wbf" (weighted box fusion) or "nms"
+        match_threshold: IoU for NMS, intersection over the smaller box for WBF
+    """
+    if len(detections) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    
+    if method == "wbf":
+        return weighted_box_fusion(detections, match_threshold)
+    if method == "nms":
+        # Offset boxes per class so one pass never suppresses across classes
+        offset = detections[:, :4].max() + 1
+        keep = nms(detections[:, :4] + detections[:, 5:6] * offset, detections[:, 4], match_threshold)
+        return detections[keep].astype(np.float32)
+    raise ValueError(f"Unknown tile merge method: {method}")
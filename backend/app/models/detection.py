@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Integer, Float, Text, DateTime, ForeignKey, Enum
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, BigInteger, Float, Text, DateTime, ForeignKey, Enum
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
@@ -16,6 +16,7 @@ class DetectionStatus(str, enum.Enum):
     pending = "pending"
     completed = "completed"
     reviewed = "reviewed"
+    failed = "failed"  # Background detection job did not complete
 
 class Detection(Base):
     __tablename__ = "detections"
@@ -35,6 +36,11 @@ class Detection(Base):
     total_teeth_detected = Column(Integer, default=0)
     total_caries_detected = Column(Integer, default=0)
     processing_time_ms = Column(Float)
+    timings = Column(JSONB)  # Milliseconds per stage (upload_save, decode, inference, ...), see StageTimer
+    model_version = Column(String)  # Model registry version that produced the findings
+    inference_key = Column(String, index=True)  # Image hash + model version, weights and backend + thresholds, see InferenceCache
+    image_phash = Column(BigInteger)  # Perceptual hash of the original image, see perceptual_hash
+    duplicate_of_id = Column(UUID(as_uuid=True), ForeignKey("detections.id"))  # Earlier near-duplicate upload
     confidence_threshold = Column(Float)
     status = Column(Enum(DetectionStatus), default=DetectionStatus.pending)
     notes = Column(Text)
@@ -37,6 +37,9 @@ class DetectionResponse(BaseModel):
     total_teeth_detected: int
     total_caries_detected: int
     processing_time_ms: float
+    model_version: Optional[str] = None
+    duplicate_of_id: Optional[UUID] = None
+    timings: Optional[dict] = None
     confidence_threshold: float
     status: str
     notes: Optional[str]
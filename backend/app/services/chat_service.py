@@ -3,6 +3,7 @@ import requests
 from typing import Optional, Dict, Any
 from sqlalchemy.orm import Session
 from ..core.config import settings
+from ..core.metrics import UPSTREAM_ERRORS, track_upstream
 from ..models.detection import Detection
 from ..models.chat import ChatMessage
 from ..models.user import User
@@ -125,15 +126,19 @@ Provide a helpful, simple explanation. End with encouraging them to see their de
             logger.info(f"Calling Groq API: {settings.GROQ_API_URL}")
             logger.info(f"Using model: {settings.GROQ_MODEL}")
             
-            response = requests.post(
-                settings.GROQ_API_URL,
-                json=payload,
-                headers=headers,
-                timeout=30
-            )
+            with track_upstream("groq", "chat_completion"):
+                response = requests.post(
+                    settings.GROQ_API_URL,
+                    json=payload,
+                    headers=headers,
+                    timeout=30
+                )
             
             logger.info(f"Groq API Response Status: {response.status_code}")
             
+            if response.status_code != 200:
+                UPSTREAM_ERRORS.labels("groq", "chat_completion").inc()
+            
             if response.status_code == 401:
                 logger.error("Groq API returned 401 - Invalid API key")
                 return "Authentication failed. Please check your Groq API key."
@@ -1,9 +1,11 @@
 from cloudinary import config as cloudinary_config
 from cloudinary.uploader import upload, destroy
 from cloudinary.utils import cloudinary_url
-from typing import Optional, Dict
+from typing import Optional, Dict, Union
+from io import BytesIO
 import os
 from ..core.config import settings
+from ..core.metrics import track_upstream
 
 class CloudinaryService:
     """Service for managing image uploads to Cloudinary"""
@@ -17,29 +19,30 @@ class CloudinaryService:
             secure=True
         )
     
-    def upload_image(self, file_path: str, folder: str = "dental-caries") -> Dict[str, str]:
+    def upload_image(self, file: Union[str, bytes], folder: str = "dental-caries") -> Dict[str, str]:
         """
         Upload an image to Cloudinary
         
         Args:
-            file_path: Local path to the image file
+            file: Local path to the image file, or encoded image bytes
             folder: Cloudinary folder to store the image
             
         Returns:
             Dictionary containing url, public_id, and secure_url
         """
         try:
-            result = upload(
-                file_path,
-                folder=folder,
-                resource_type="image",
-                overwrite=False,
-                format="jpg",
-                transformation=[
-                    {'quality': "auto:good"},
-                    {'fetch_format': "auto"}
-                ]
-            )
+            with track_upstream("cloudinary", "upload"):
+                result = upload(
+                    BytesIO(file) if isinstance(file, bytes) else file,
+                    folder=folder,
+                    resource_type="image",
+                    overwrite=False,
+                    format="jpg",
+                    transformation=[
+                        {'quality': "auto:good"},
+                        {'fetch_format': "auto"}
+                    ]
+                )
             
             return {
                 "url": result.get("secure_url"),
@@ -55,9 +58,9 @@ class CloudinaryService:
         """Upload original dental image"""
         return self.upload_image(file_path, folder="dental-caries/original")
     
-    def upload_annotated_image(self, file_path: str) -> Dict[str, str]:
-        """Upload AI-annotated dental image"""
-        return self.upload_image(file_path, folder="dental-caries/annotated")
+    def upload_annotated_image(self, file: Union[str, bytes]) -> Dict[str, str]:
+        """Upload AI-annotated dental image (path or encoded bytes)"""
+        return self.upload_image(file, folder="dental-caries/annotated")
     
     def delete_image(self, public_id: str) -> bool:
         """
@@ -70,7 +73,8 @@ class CloudinaryService:
             True if deletion was successful, False otherwise
         """
         try:
-            result = destroy(public_id)
+            with track_upstream("cloudinary", "destroy"):
+                result = destroy(public_id)
             return result.get("result") == "ok"
         except Exception as e:
             print(f"Failed to delete image from Cloudinary: {str(e)}")
@@ -0,0 +1,33 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+FINAL_STAGES = ("done", "failed")  # A job's stages end with one of these
+
+class DetectionJobTracker:
+    """In-process stage history of background detections; the detections table holds their outcome"""
+    
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def update(self, job_id, stage: str, error: Optional[str] = None):
+        """Record a stage transition"""
+        with self._lock:
+            job = self._jobs.setdefault(str(job_id), {"stage": None, "error": None, "history": []})
+            job["stage"] = stage
+            job["error"] = error
+            job["history"].append({"stage": stage, "at": datetime.now(timezone.utc).isoformat()})
+            self._jobs.move_to_end(str(job_id))
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+    
+    def get(self, job_id) -> Optional[dict]:
+        """Current stage, error and stage history of a job, or None if unknown here"""
+        with self._lock:
+            job = self._jobs.get(str(job_id))
+            if job is None:
+                return None
+            return {"stage": job["stage"], "error": job["error"], "history": list(job["history"])}
@@ -1,21 +1,59 @@
+from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from ..models.detection import Detection, DetectionStatus
+from ..models.detection import Detection, DetectionStatus, ImageType
 from ..models.caries import CariesFinding, DetectionHistory
 from ..schemas.detection import DetectionCreate
 from ..ml.predictor import CariesDetector
+from ..ml.batch_scheduler import MicroBatchScheduler
+from ..ml.model_loader import model_loader
+from ..ml.process_pool import InferencePool
+from ..ml.inference_server import InferenceServerClient, server_authkey
 from ..ml.preprocessor import ImagePreprocessor
-from ..ml.postprocessor import ResultProcessor
-from typing import List
+from ..ml.postprocessor import DetectionColumns, ResultProcessor
+from ..ml.renderer import AnnotationRenderer
+from .inference_cache import InferenceCache
+from .detection_jobs import DetectionJobTracker
+from typing import Callable, ContextManager, List, Optional
 from uuid import UUID, uuid4
 from datetime import datetime
 import os
+import time
+import numpy as np
 from ..core.config import settings
+from ..utils.image_utils import hamming_distances
+from ..utils.logger import logger
+from ..utils.timing import StageTimer
 
 class DetectionService:
     def __init__(self):
         self.detector = CariesDetector()
         self.preprocessor = ImagePreprocessor()
         self.postprocessor = ResultProcessor()
+        self.renderer = AnnotationRenderer()
+        self.inference_pool = None
+        self.scheduler = None
+        if settings.INFERENCE_SERVER_ENABLED:
+            # Same interface as the worker pool, backed by the host's shared inference server
+            self.inference_pool = InferenceServerClient(
+                settings.INFERENCE_SERVER_SOCKET,
+                server_authkey(settings.SECRET_KEY),
+                slots=settings.INFERENCE_SERVER_SLOTS,
+                slot_mb=settings.INFERENCE_SERVER_SLOT_MB,
+                autostart=settings.INFERENCE_SERVER_AUTOSTART,
+                connect_timeout=settings.INFERENCE_SERVER_CONNECT_TIMEOUT_SECONDS
+            )
+        elif settings.INFERENCE_WORKERS > 0:
+            self.inference_pool = InferencePool(settings.INFERENCE_WORKERS, settings.INFERENCE_WORKER_CPUS)
+        elif settings.DETECTION_BATCHING_ENABLED:
+            self.scheduler = MicroBatchScheduler(
+                self.detector,
+                max_batch_size=settings.DETECTION_MAX_BATCH_SIZE,
+                max_wait_ms=settings.DETECTION_BATCH_WAIT_MS
+            )
+        self.inference_cache = None
+        if settings.INFERENCE_CACHE_ENABLED:
+            self.inference_cache = InferenceCache(max_entries=settings.INFERENCE_CACHE_SIZE)
+        self.jobs = DetectionJobTracker()
     
     @staticmethod
     def generate_detection_id() -> str:
@@ -29,61 +67,590 @@ class DetectionService:
         patient_id: UUID,
         dentist_id: UUID,
         detection_data: DetectionCreate,
-        original_image_cloudinary: dict = None
+        original_image_cloudinary: dict = None,
+        image_bytes: bytes = None,
+        render_annotated: bool = True,
+        image_hash: str = None,
+        image_phash: int = None,
+        near_duplicate: Detection = None,
+        reuse_near_duplicate: bool = False
     ) -> Detection:
-        """Process dental caries detection"""
-        # Preprocess image
-        preprocessed = self.preprocessor.preprocess(image_path)
+        """Process dental caries detection
+        
+        The image is decoded once (from image_bytes when given, otherwise from
+        image_path) and the array is used for inference and annotation.
+        Set render_annotated=False when the client does not need an annotated image.
+        
+        With image_hash (see ImageService.save_upload_file), a re-upload of an
+        image already analysed with the same model and thresholds reuses the
+        stored findings and annotated image instead of running inference.
+        
+        near_duplicate (see find_near_duplicate) is recorded on the new
+        detection; with reuse_near_duplicate=True its findings are reused too.
+        
+        Milliseconds per stage (the upload stages from original_image_cloudinary
+        'timings', then decode, inference, postprocess, render,
+        annotated_upload and db_flush) are stored on the detection's timings
+        and logged together with db_commit.
+        """
+        analysis = self._analyze_upload(
+            db=db,
+            image_path=image_path,
+            detection_data=detection_data,
+            image_bytes=image_bytes,
+            render_annotated=render_annotated,
+            image_hash=image_hash,
+            near_duplicate=near_duplicate,
+            reuse_near_duplicate=reuse_near_duplicate
+        )
+        
+        db_detection = self._create_detection_record(
+            db=db,
+            image_path=image_path,
+            patient_id=patient_id,
+            dentist_id=dentist_id,
+            detection_data=detection_data,
+            original_image_cloudinary=original_image_cloudinary,
+            image_phash=image_phash,
+            duplicate_of_id=near_duplicate.id if near_duplicate is not None else None,
+            **analysis
+        )
+        
+        timer = StageTimer(dict(db_detection.timings))
+        with timer.stage("db_commit"):
+            db.commit()
+        self._log_timings(db_detection.detection_id, timer)
+        db.refresh(db_detection)
+        return db_detection
+    
+    def create_pending_detection(
+        self,
+        db: Session,
+        image_path: str,
+        patient_id: UUID,
+        dentist_id: UUID,
+        detection_data: DetectionCreate,
+        original_image_cloudinary: dict = None,
+        image_phash: int = None,
+        duplicate_of_id: UUID = None
+    ) -> Detection:
+        """Insert a pending detection for an upload that run_detection_job completes later"""
+        db_detection = self._new_detection(
+            image_path=image_path,
+            patient_id=patient_id,
+            dentist_id=dentist_id,
+            detection_data=detection_data,
+            original_image_cloudinary=original_image_cloudinary,
+            image_phash=image_phash,
+            duplicate_of_id=duplicate_of_id
+        )
+        db.add(db_detection)
+        db.commit()
+        db.refresh(db_detection)
+        
+        self.jobs.update(db_detection.id, "queued")
+        return db_detection
+    
+    def run_detection_job(
+        self,
+        session_factory: Callable[[], ContextManager[Session]],
+        detection_id: UUID,
+        detection_data: DetectionCreate,
+        image_bytes: bytes = None,
+        render_annotated: bool = True,
+        image_hash: str = None,
+        near_duplicate_id: UUID = None,
+        reuse_near_duplicate: bool = False
+    ):
+        """Complete a pending detection in the background
+        
+        The request's session is closed once the 202 response has been sent,
+        so session_factory opens a new one the way the request's was opened.
+        Stage transitions are reported to self.jobs; on error the detection
+        is marked failed.
+        """
+        with session_factory() as db:
+            db_detection = db.query(Detection).filter(Detection.id == detection_id).first()
+            if db_detection is None:
+                self.jobs.update(detection_id, "failed", error="Detection not found")
+                return
+            
+            try:
+                near_duplicate = None
+                if near_duplicate_id is not None:
+                    near_duplicate = db.query(Detection).filter(Detection.id == near_duplicate_id).first()
+                
+                analysis = self._analyze_upload(
+                    db=db,
+                    image_path=db_detection.original_image_path,
+                    detection_data=detection_data,
+                    image_bytes=image_bytes,
+                    render_annotated=render_annotated,
+                    image_hash=image_hash,
+                    near_duplicate=near_duplicate,
+                    reuse_near_duplicate=reuse_near_duplicate,
+                    on_stage=lambda stage: self.jobs.update(detection_id, stage)
+                )
+                self._complete_detection_record(db, db_detection, **analysis)
+                timer = StageTimer(dict(db_detection.timings))
+                with timer.stage("db_commit"):
+                    db.commit()
+                self._log_timings(db_detection.detection_id, timer)
+                self.jobs.update(detection_id, "done")
+            except Exception as e:
+                db.rollback()
+                db.query(Detection).filter(Detection.id == detection_id).update({"status": DetectionStatus.failed})
+                db.commit()
+                self.jobs.update(detection_id, "failed", error=str(e))
+    
+    def get_job_status(self, db: Session, detection_id: UUID) -> dict:
+        """Status of a detection job, with its current stage when it ran in this process"""
+        detection = self.get_detection(db, detection_id)
+        job = self.jobs.get(detection.id)
+        if job is None:
+            # Created synchronously or by another worker process
+            stage = {
+                DetectionStatus.pending: "queued",
+                DetectionStatus.failed: "failed"
+            }.get(detection.status, "done")
+            job = {"stage": stage, "error": None, "history": []}
+        
+        return {
+            "id": str(detection.id),
+            "detection_id": detection.detection_id,
+            "status": detection.status.value if detection.status else None,
+            **job
+        }
+    
+    def _analyze_upload(
+        self,
+        db: Session,
+        image_path: str,
+        detection_data: DetectionCreate,
+        image_bytes: bytes = None,
+        render_annotated: bool = True,
+        image_hash: str = None,
+        near_duplicate: Detection = None,
+        reuse_near_duplicate: bool = False,
+        on_stage: Callable[[str], None] = None
+    ) -> dict:
+        """Get findings and the annotated image for an upload, from the caches or by running inference
+        
+        Returns:
+            Dictionary with 'detections', 'annotated_path', 'annotated_cloudinary',
+            'processing_time_ms', 'model_version', 'inference_key' and 'timings'
+        """
+        on_stage = on_stage or (lambda stage: None)
+        timer = StageTimer()
+        tiled = self._use_tiling(detection_data)
+        
+        # Look for an identical earlier upload
+        cached = None
+        if image_hash and self.inference_cache is not None:
+            model_version = model_loader.default_version
+            inference_key = self.inference_cache.make_key(
+                image_hash, model_version, tiled, model_loader.weights_hash(model_version)
+            )
+            with timer.stage("cache_lookup"):
+                cached = self.inference_cache.get(db, inference_key)
+        
+        # Otherwise reuse a near-duplicate (re-exported, re-compressed, cropped) when asked to
+        if cached is None and near_duplicate is not None and reuse_near_duplicate:
+            cached = InferenceCache.entry_from_detection(near_duplicate)
+            model_version = near_duplicate.model_version
+            inference_key = None
+        
+        if cached is not None:
+            start_time = time.time()
+            detections = cached["detections"]
+            annotated_path, annotated_cloudinary = None, None
+            if render_annotated:
+                annotated_path, annotated_cloudinary = cached["annotated_path"], cached["annotated_cloudinary"]
+                if annotated_path is None and annotated_cloudinary is None:
+                    # The earlier upload was analysed without an annotated image
+                    on_stage("uploading")
+                    with timer.stage("decode"):
+                        image = self._decode_image(image_path, image_bytes)
+                    annotated_path, annotated_cloudinary = self._store_annotated_image(image, detections, timer)
+                    if inference_key is not None:
+                        self.inference_cache.put(inference_key, detections, annotated_path, annotated_cloudinary)
+            processing_time_ms = (time.time() - start_time) * 1000
+        elif self.inference_pool is not None:
+            # Decoding, inference, postprocessing and rendering run in a worker process
+            on_stage("inference")
+            start_time = time.perf_counter()
+            output = self.inference_pool.detect(image_path, image_bytes, tiled, render_annotated)
+            self._add_worker_timings(timer, output, (time.perf_counter() - start_time) * 1000)
+            on_stage("uploading")
+            model_version = output["model_version"]
+            processing_time_ms = output["processing_time_ms"]
+            detections = output["detections"]
+            annotated_path, annotated_cloudinary = self._store_worker_annotation(output, timer)
+        else:
+            on_stage("preprocessing")
+            with timer.stage("decode"):
+                image = self._decode_image(image_path, image_bytes)
+            
+            # Perform detection, coalesced with concurrent requests when batching is enabled
+            on_stage("inference")
+            with timer.stage("inference"):
+                if tiled:
+                    detection_results = self.detector.detect_tiled(image)
+                elif self.scheduler is not None:
+                    detection_results = self.scheduler.submit(image)
+                else:
+                    detection_results = self.detector.detect(image)
+            
+            on_stage("uploading")
+            model_version = detection_results["model_version"]
+            processing_time_ms = detection_results["processing_time_ms"]
+            detections, annotated_path, annotated_cloudinary = self._analyze_result(
+                image, detection_results["results"][0], render_annotated, timer
+            )
+        
+        # Remember fresh findings for later re-uploads
+        if cached is None:
+            inference_key = None
+            if image_hash:
+                inference_key = InferenceCache.make_key(
+                    image_hash, model_version, tiled, model_loader.weights_hash(model_version)
+                )
+                if self.inference_cache is not None:
+                    self.inference_cache.put(inference_key, detections, annotated_path, annotated_cloudinary)
+        
+        return {
+            "detections": detections,
+            "annotated_path": annotated_path,
+            "annotated_cloudinary": annotated_cloudinary,
+            "processing_time_ms": processing_time_ms,
+            "model_version": model_version,
+            "inference_key": inference_key,
+            "timings": timer.timings
+        }
+    
+    def process_batch_detection(
+        self,
+        db: Session,
+        uploads: List[dict],
+        patient_id: UUID,
+        dentist_id: UUID,
+        detection_data: DetectionCreate,
+        render_annotated: bool = True
+    ) -> List[Detection]:
+        """Process a series of images for one patient with a single batched inference
         
-        # Perform detection
-        results_dir = os.path.join(settings.RESULTS_DIR, str(uuid4()))
-        os.makedirs(results_dir, exist_ok=True)
+        Args:
+            uploads: Results of ImageService.save_upload_file, one per image
         
-        detection_results = self.detector.detect(image_path, results_dir)
+        Returns:
+            Detection records in the same order as uploads, committed in one transaction
+        """
+        tiled = self._use_tiling(detection_data)
+        timers = [StageTimer() for _ in uploads]  # Upload stages come from each upload's timings
         
-        # Get annotated image path
-        annotated_path = os.path.join(results_dir, "detection", os.path.basename(image_path))
+        if self.inference_pool is not None:
+            # Spread the series over the worker processes
+            futures = [
+                self.inference_pool.submit(upload["local_path"], upload.get("content"), tiled, render_annotated)
+                for upload in uploads
+            ]
+            outputs = [future.result() for future in futures]
+            for timer, output in zip(timers, outputs):
+                timer.timings.update(output["timings"])
+            analyzed = [
+                (output["detections"], *self._store_worker_annotation(output, timer))
+                for output, timer in zip(outputs, timers)
+            ]
+            model_version = outputs[-1]["model_version"]
+            processing_time_ms = sum(output["processing_time_ms"] for output in outputs) / len(outputs)
+        else:
+            images = []
+            for upload, timer in zip(uploads, timers):
+                with timer.stage("decode"):
+                    images.append(self._decode_image(upload["local_path"], upload.get("content")))
+            
+            start_time = time.perf_counter()
+            if tiled:
+                # Each panoramic is already a batch of tiles
+                tiled_results = [self.detector.detect_tiled(image) for image in images]
+                detection_results = {
+                    "results": [r["results"][0] for r in tiled_results],
+                    "processing_time_ms": sum(r["processing_time_ms"] for r in tiled_results),
+                    "model_version": tiled_results[-1]["model_version"]
+                }
+            else:
+                # Perform detection for the whole series at once
+                detection_results = self.detector.detect_batch(images)
+            
+            # Attribute the shared forward pass evenly to each image
+            inference_ms = (time.perf_counter() - start_time) * 1000 / len(images)
+            for timer in timers:
+                timer.add("inference", inference_ms)
+            processing_time_ms = detection_results["processing_time_ms"] / len(images)
+            model_version = detection_results["model_version"]
+            analyzed = [
+                self._analyze_result(image, result, render_annotated, timer)
+                for image, result, timer in zip(images, detection_results["results"], timers)
+            ]
         
-        # Upload annotated image to Cloudinary if it exists
-        annotated_cloudinary = None
-        if os.path.exists(annotated_path) and settings.CLOUDINARY_CLOUD_NAME:
+        db_detections = []
+        for upload, timer, (detections, annotated_path, annotated_cloudinary) in zip(uploads, timers, analyzed):
+            # Recorded so later single uploads of the same image can reuse these findings
+            inference_key = None
+            if upload.get("content_hash"):
+                inference_key = InferenceCache.make_key(
+                    upload["content_hash"], model_version, tiled, model_loader.weights_hash(model_version)
+                )
+            
+            db_detection = self._create_detection_record(
+                db=db,
+                image_path=upload["local_path"],
+                detections=detections,
+                annotated_path=annotated_path,
+                annotated_cloudinary=annotated_cloudinary,
+                processing_time_ms=processing_time_ms,
+                model_version=model_version,
+                patient_id=patient_id,
+                dentist_id=dentist_id,
+                detection_data=detection_data,
+                original_image_cloudinary=upload,
+                inference_key=inference_key,
+                image_phash=upload.get("phash"),
+                timings=timer.timings
+            )
+            db_detections.append(db_detection)
+        
+        commit_timer = StageTimer()
+        with commit_timer.stage("db_commit"):
+            db.commit()
+        for db_detection in db_detections:
+            self._log_timings(db_detection.detection_id, StageTimer(dict(db_detection.timings)))
+        logger.info(f"Batch of {len(db_detections)} detections committed in {commit_timer.total_ms()} ms")
+        for db_detection in db_detections:
+            db.refresh(db_detection)
+        return db_detections
+    
+    @staticmethod
+    def find_near_duplicate(db: Session, patient_id: UUID, image_phash: int) -> Optional[Detection]:
+        """Find the patient's earlier upload most similar to an image
+        
+        Only the (id, perceptual hash) pairs of this patient are read, from a
+        partial index, and compared in one vectorized pass, so the lookup cost
+        does not grow with the total number of stored images. Pending and
+        failed detections have no findings to reuse and are not candidates.
+        
+        Returns:
+            The closest detection within NEAR_DUPLICATE_MAX_DISTANCE bits, or None
+        """
+        if image_phash is None:
+            return None
+        
+        candidates = db.query(Detection.id, Detection.image_phash).filter(
+            Detection.patient_id == patient_id,
+            Detection.image_phash.isnot(None),
+            Detection.status.in_([DetectionStatus.completed, DetectionStatus.reviewed])
+        ).all()
+        if not candidates:
+            return None
+        
+        ids, hashes = zip(*candidates)
+        distances = hamming_distances(image_phash, np.array(hashes, dtype=np.int64))
+        closest = int(distances.argmin())
+        if distances[closest] > settings.NEAR_DUPLICATE_MAX_DISTANCE:
+            return None
+        return db.query(Detection).filter(Detection.id == ids[closest]).first()
+    
+    @staticmethod
+    def _use_tiling(detection_data: DetectionCreate) -> bool:
+        """Panoramic radiographs are too large to detect small lesions in a single downscaled pass"""
+        return settings.TILED_INFERENCE_ENABLED and detection_data.image_type == ImageType.panoramic
+    
+    def _decode_image(self, image_path: str, image_bytes: bytes = None) -> np.ndarray:
+        """Decode upload bytes if we still have them, otherwise read the saved file"""
+        if image_bytes is not None:
+            return self.preprocessor.decode(image_bytes)
+        return self.preprocessor.load(image_path)
+    
+    def _analyze_result(
+        self,
+        image: np.ndarray,
+        result,
+        render_annotated: bool = True,
+        timer: StageTimer = None
+    ) -> tuple:
+        """Turn a model result into findings and, if requested, a stored annotated image
+        
+        Returns:
+            (findings, annotated local_path or None, annotated cloudinary result or None)
+        """
+        timer = timer or StageTimer()
+        with timer.stage("postprocess"):
+            detections = self.postprocessor.process_results([result], image.shape)
+        
+        annotated_path, annotated_cloudinary = None, None
+        if render_annotated:
+            annotated_path, annotated_cloudinary = self._store_annotated_image(image, detections, timer)
+        return detections, annotated_path, annotated_cloudinary
+    
+    def _store_annotated_image(self, image: np.ndarray, detections: DetectionColumns, timer: StageTimer = None) -> tuple:
+        """Render findings onto the image, encode it in memory and store it
+        
+        The encoded buffer goes straight to Cloudinary when it is configured;
+        it is only written under RESULTS_DIR when there is no Cloudinary or the
+        upload fails.
+        
+        Returns:
+            (local_path or None, cloudinary result or None)
+        """
+        timer = timer or StageTimer()
+        with timer.stage("render"):
+            annotated = self.renderer.encode(
+                self.renderer.render(image, detections),
+                settings.ANNOTATED_IMAGE_FORMAT,
+                settings.ANNOTATED_IMAGE_QUALITY
+            )
+        with timer.stage("annotated_upload"):
+            return self._store_annotated_bytes(annotated)
+    
+    def _store_worker_annotation(self, output: dict, timer: StageTimer = None) -> tuple:
+        """Store the annotated image encoded by an inference worker, if it rendered one"""
+        if output["annotated"] is None:
+            return None, None
+        with (timer or StageTimer()).stage("annotated_upload"):
+            return self._store_annotated_bytes(output["annotated"])
+    
+    @staticmethod
+    def _add_worker_timings(timer: StageTimer, output: dict, elapsed_ms: float):
+        """Add a worker's own stages, and the rest of the round trip as worker_overhead"""
+        for name, stage_ms in output["timings"].items():
+            timer.add(name, stage_ms)
+        timer.add("worker_overhead", max(0.0, elapsed_ms - sum(output["timings"].values())))
+    
+    @staticmethod
+    def _log_timings(detection_id: str, timer: StageTimer):
+        logger.info(f"Detection {detection_id} took {timer.total_ms()} ms: {timer.timings}")
+    
+    @staticmethod
+    def _store_annotated_bytes(annotated: bytes) -> tuple:
+        """Upload an encoded annotated image to Cloudinary, or write it under RESULTS_DIR"""
+        if settings.CLOUDINARY_CLOUD_NAME:
             try:
                 from .cloudinary_service import CloudinaryService
                 cloudinary_service = CloudinaryService()
-                annotated_cloudinary = cloudinary_service.upload_annotated_image(annotated_path)
+                return None, cloudinary_service.upload_annotated_image(annotated)
             except Exception as e:
                 print(f"Warning: Failed to upload annotated image to Cloudinary: {str(e)}")
         
-        # Process results
-        detections = self.postprocessor.process_results(
-            detection_results["results"],
-            preprocessed.shape
+        extension = "webp" if settings.ANNOTATED_IMAGE_FORMAT.lower() == "webp" else "jpg"
+        annotated_path = os.path.join(settings.RESULTS_DIR, f"{uuid4()}.{extension}")
+        with open(annotated_path, "wb") as f:
+            f.write(annotated)
+        return annotated_path, None
+    
+    def _create_detection_record(
+        self,
+        db: Session,
+        image_path: str,
+        detections: DetectionColumns,
+        annotated_path: str,
+        annotated_cloudinary: dict,
+        processing_time_ms: float,
+        model_version: str,
+        patient_id: UUID,
+        dentist_id: UUID,
+        detection_data: DetectionCreate,
+        original_image_cloudinary: dict = None,
+        inference_key: str = None,
+        image_phash: int = None,
+        duplicate_of_id: UUID = None,
+        timings: dict = None
+    ) -> Detection:
+        """Add detection, findings and history rows to the session without committing"""
+        # Create detection record
+        db_detection = self._new_detection(
+            image_path=image_path,
+            patient_id=patient_id,
+            dentist_id=dentist_id,
+            detection_data=detection_data,
+            original_image_cloudinary=original_image_cloudinary,
+            image_phash=image_phash,
+            duplicate_of_id=duplicate_of_id
         )
+        db.add(db_detection)
         
-        # Create detection record
-        db_detection = Detection(
+        self._complete_detection_record(
+            db,
+            db_detection,
+            detections=detections,
+            annotated_path=annotated_path,
+            annotated_cloudinary=annotated_cloudinary,
+            processing_time_ms=processing_time_ms,
+            model_version=model_version,
+            inference_key=inference_key,
+            timings=timings
+        )
+        return db_detection
+    
+    def _new_detection(
+        self,
+        image_path: str,
+        patient_id: UUID,
+        dentist_id: UUID,
+        detection_data: DetectionCreate,
+        original_image_cloudinary: dict = None,
+        image_phash: int = None,
+        duplicate_of_id: UUID = None
+    ) -> Detection:
+        """Build a pending detection for an upload, before any findings exist"""
+        return Detection(
             detection_id=self.generate_detection_id(),
             patient_id=patient_id,
             dentist_id=dentist_id,
             original_image_path=image_path,
-            annotated_image_path=annotated_path if os.path.exists(annotated_path) else None,
             original_image_url=original_image_cloudinary.get("cloudinary_url") if original_image_cloudinary else None,
-            annotated_image_url=annotated_cloudinary.get("url") if annotated_cloudinary else None,
             original_image_public_id=original_image_cloudinary.get("public_id") if original_image_cloudinary else None,
-            annotated_image_public_id=annotated_cloudinary.get("public_id") if annotated_cloudinary else None,
             image_type=detection_data.image_type,
-            total_caries_detected=len(detections),
-            processing_time_ms=detection_results["processing_time_ms"],
+            image_phash=image_phash,
+            duplicate_of_id=duplicate_of_id,
+            timings=dict(original_image_cloudinary.get("timings") or {}) if original_image_cloudinary else {},
             confidence_threshold=settings.CONFIDENCE_THRESHOLD,
-            status=DetectionStatus.completed,
+            status=DetectionStatus.pending,
             notes=detection_data.notes
         )
+    
+    @staticmethod
+    def _complete_detection_record(
+        db: Session,
+        db_detection: Detection,
+        detections: DetectionColumns,
+        annotated_path: str,
+        annotated_cloudinary: dict,
+        processing_time_ms: float,
+        model_version: str,
+        inference_key: str = None,
+        timings: dict = None
+    ):
+        """Fill in a detection's results and add its findings and history rows without committing
         
-        db.add(db_detection)
-        db.flush()
+        timings are added to the upload stages already on the detection,
+        followed by db_flush.
+        """
+        db_detection.annotated_image_path = annotated_path
+        db_detection.annotated_image_url = annotated_cloudinary.get("url") if annotated_cloudinary else None
+        db_detection.annotated_image_public_id = annotated_cloudinary.get("public_id") if annotated_cloudinary else None
+        db_detection.total_caries_detected = len(detections)
+        db_detection.processing_time_ms = processing_time_ms
+        db_detection.model_version = model_version
+        db_detection.inference_key = inference_key
+        db_detection.status = DetectionStatus.completed
+        
+        timer = StageTimer({**(db_detection.timings or {}), **(timings or {})})
+        with timer.stage("db_flush"):
+            db.flush()
+        db_detection.timings = timer.timings
         
-        # Create caries findings
-        for det in detections:
+        # Create caries findings, the only place findings become per-row dicts
+        for det in detections.to_dicts():
             caries = CariesFinding(
                 detection_id=db_detection.id,
                 caries_type=det["caries_type"],
@@ -98,17 +665,13 @@ class DetectionService:
         
         # Create history entry
         history = DetectionHistory(
-            patient_id=patient_id,
+            patient_id=db_detection.patient_id,
             detection_id=db_detection.id,
             action="created",
-            performed_by=dentist_id,
+            performed_by=db_detection.dentist_id,
             changes={"status": DetectionStatus.completed.value}
         )
         db.add(history)
-        
-        db.commit()
-        db.refresh(db_detection)
-        return db_detection
     
     @staticmethod
     def get_detection(db: Session, detection_id: UUID) -> Detection:
@@ -2,6 +2,7 @@
 from typing import Optional
 import requests
 from ..core.config import settings
+from ..core.metrics import UPSTREAM_ERRORS, track_upstream
 import secrets
 import string
 
@@ -28,26 +29,28 @@ class EmailService:
             print(f"Using Resend API")
             
             # Send email via Resend HTTP API
-            response = requests.post(
-                "https://api.resend.com/emails",
-                headers={
-                    "Authorization": f"Bearer {settings.RESEND_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "from": f"{settings.RESEND_FROM_NAME} <{settings.RESEND_FROM_EMAIL}>",
-                    "to": [to_email],
-                    "subject": subject,
-                    "html": html_content
-                },
-                timeout=30
-            )
+            with track_upstream("resend", "send_email"):
+                response = requests.post(
+                    "https://api.resend.com/emails",
+                    headers={
+                        "Authorization": f"Bearer {settings.RESEND_API_KEY}",
+                        "Content-Type": "application/json"
+                    },
+                    json={
+                        "from": f"{settings.RESEND_FROM_NAME} <{settings.RESEND_FROM_EMAIL}>",
+                        "to": [to_email],
+                        "subject": subject,
+                        "html": html_content
+                    },
+                    timeout=30
+                )
             
             if response.status_code == 200:
                 print(f"✅ Email sent successfully to: {to_email}")
                 print(f"Response: {response.json()}")
                 return True
             else:
+                UPSTREAM_ERRORS.labels("resend", "send_email").inc()
                 print(f"❌ Resend API Error: {response.status_code}")
                 print(f"Response: {response.text}")
                 return False
@@ -194,31 +197,33 @@ class EmailService:
                 recipients.append(cc_email)
             
             # Send email via Resend API
-            response = requests.post(
-                "https://api.resend.com/emails",
-                headers={
-                    "Authorization": f"Bearer {settings.RESEND_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "from": f"{settings.RESEND_FROM_NAME} <{settings.RESEND_FROM_EMAIL}>",
-                    "to": recipients,
-                    "subject": f"Dental Detection Report - {detection_id}",
-                    "html": html_body,
-                    "attachments": [
-                        {
-                            "filename": f"Detection_Report_{detection_id}.pdf",
-                            "content": pdf_base64
-                        }
-                    ]
-                },
-                timeout=30
-            )
+            with track_upstream("resend", "send_report"):
+                response = requests.post(
+                    "https://api.resend.com/emails",
+                    headers={
+                        "Authorization": f"Bearer {settings.RESEND_API_KEY}",
+                        "Content-Type": "application/json"
+                    },
+                    json={
+                        "from": f"{settings.RESEND_FROM_NAME} <{settings.RESEND_FROM_EMAIL}>",
+                        "to": recipients,
+                        "subject": f"Dental Detection Report - {detection_id}",
+                        "html": html_body,
+                        "attachments": [
+                            {
+                                "filename": f"Detection_Report_{detection_id}.pdf",
+                                "content": pdf_base64
+                            }
+                        ]
+                    },
+                    timeout=30
+                )
             
             if response.status_code == 200:
                 print(f"✅ Detection report sent successfully to: {to_email}")
                 return True
             else:
+                UPSTREAM_ERRORS.labels("resend", "send_report").inc()
                 print(f"❌ Resend API Error: {response.status_code}")
                 print(f"Response: {response.text}")
                 return False
@@ -1,9 +1,12 @@
+import hashlib
 import os
-import shutil
 from fastapi import UploadFile
 from uuid import uuid4
 from typing import Dict
 from ..core.config import settings
+from ..ml.quality import assess_image_quality
+from ..utils.image_utils import decode_reduced_grayscale, get_image_dimensions, perceptual_hash
+from ..utils.timing import StageTimer
 from .cloudinary_service import CloudinaryService
 
 class ImageService:
@@ -15,23 +18,58 @@ class ImageService:
         Save uploaded file locally and optionally to Cloudinary
         
         Returns:
-            Dictionary with 'local_path' and optionally 'cloudinary_url', 'public_id'
+            Dictionary with 'local_path', the raw upload bytes as 'content' (so the
+            image can be decoded without re-reading the file), their SHA-256 as
+            'content_hash', the image's perceptual hash as 'phash' (None if it
+            cannot be decoded), the quality gate's assessment as 'quality' (None if
+            disabled or not decodable, see app.ml.quality), per-stage milliseconds
+            as 'timings' and optionally 'cloudinary_url', 'public_id'
         """
         # Generate unique filename
         file_ext = os.path.splitext(upload_file.filename)[1]
         filename = f"{uuid4()}{file_ext}"
         file_path = os.path.join(settings.UPLOAD_DIR, filename)
         
+        timer = StageTimer()
+        
         # Save file locally
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
+        with timer.stage("upload_save"):
+            content = await upload_file.read()
+            with open(file_path, "wb") as buffer:
+                buffer.write(content)
+        
+        result = {
+            "local_path": file_path,
+            "content": content,
+            "phash": None,
+            "quality": None,
+            "timings": timer.timings
+        }
+        
+        reduced = None
+        with timer.stage("hashing"):
+            result["content_hash"] = hashlib.sha256(content).hexdigest()
+            try:
+                reduced = decode_reduced_grayscale(content)
+                result["phash"] = perceptual_hash(reduced)
+            except ValueError:
+                pass  # Not decodable; detection reports the error
         
-        result = {"local_path": file_path}
+        if reduced is not None and settings.QUALITY_GATE_ENABLED:
+            with timer.stage("quality_check"):
+                result["quality"] = assess_image_quality(reduced, get_image_dimensions(file_path))
         
-        # Upload to Cloudinary if enabled
-        if upload_to_cloudinary and settings.CLOUDINARY_CLOUD_NAME:
+        if upload_to_cloudinary:
+            self.upload_to_cloudinary(result)
+        
+        return result
+    
+    def upload_to_cloudinary(self, result: Dict[str, str]) -> Dict[str, str]:
+        """Upload a saved file to Cloudinary if enabled, adding 'cloudinary_url' and 'public_id' to result"""
+        if settings.CLOUDINARY_CLOUD_NAME:
             try:
-                cloudinary_result = self.cloudinary_service.upload_original_image(file_path)
+                with StageTimer(result.setdefault("timings", {})).stage("cloudinary_original"):
+                    cloudinary_result = self.cloudinary_service.upload_original_image(result["local_path"])
                 result.update({
                     "cloudinary_url": cloudinary_result["url"],
                     "public_id": cloudinary_result["public_id"]
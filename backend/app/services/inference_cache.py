@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+from sqlalchemy.orm import Session
+from ..models.detection import Detection, DetectionStatus
+from ..ml.postprocessor import DetectionColumns
+from ..core.config import settings
+
+class InferenceCache:
+    """Two-level cache of detection results keyed by upload content
+    
+    Level one is an in-process LRU. Level two is the detections table
+    itself: every detection stores its inference key, so an earlier
+    detection of the same image (by any worker, before any restart) can
+    lend its findings and annotated image to a new record.
+    """
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(image_hash: str, model_version: str, tiled: bool = False, weights_hash: str = "") -> str:
+        """Everything that changes the findings for a given image
+        
+        weights_hash (see ModelLoader.weights_hash) and the inference backend
+        are part of the key, so weights retrained in place under the same
+        version name, or a switch to ONNX or INT8, never reuse old findings.
+        """
+        mode = "tiled" if tiled else "full"
+        return (
+            f"{image_hash}:{model_version}:{weights_hash}:{settings.INFERENCE_BACKEND}:"
+            f"{settings.CONFIDENCE_THRESHOLD}:{settings.IOU_THRESHOLD}:{mode}"
+        )
+    
+    def get(self, db: Session, key: str) -> Optional[dict]:
+        """Look up cached findings, falling back to an earlier detection in the database
+        
+        Returns:
+            Dictionary with 'detections', 'annotated_path' and 'annotated_cloudinary', or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+        
+        # Only unreviewed detections: a reviewed one may carry edited findings
+        previous = db.query(Detection).filter(
+            Detection.inference_key == key,
+            Detection.status == DetectionStatus.completed
+        ).order_by(Detection.created_at.desc()).first()
+        
+        if previous is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        entry = self.entry_from_detection(previous)
+        self.put(key, entry["detections"], entry["annotated_path"], entry["annotated_cloudinary"])
+        with self._lock:
+            self.db_hits += 1
+        return entry
+    
+    @staticmethod
+    def entry_from_detection(detection: Detection) -> dict:
+        """Findings and annotated image of a stored detection, in cache entry form"""
+        return {
+            "detections": DetectionColumns.from_dicts([
+                {
+                    "confidence": finding.confidence_score,
+                    "bbox": finding.bounding_box,
+                    "severity": getattr(finding.severity, "value", finding.severity),
+                    "caries_type": getattr(finding.caries_type, "value", finding.caries_type),
+                    "location": finding.location,
+                    "area_mm2": finding.area_mm2,
+                    "treatment_recommendation": finding.treatment_recommendation
+                }
+                for finding in detection.caries_findings
+            ]),
+            "annotated_path": detection.annotated_image_path,
+            "annotated_cloudinary": {
+                "url": detection.annotated_image_url,
+                "public_id": detection.annotated_image_public_id
+            } if detection.annotated_image_url else None
+        }
+    
+    def put(
+        self,
+        key: str,
+        detections: DetectionColumns,
+        annotated_path: Optional[str] = None,
+        annotated_cloudinary: Optional[dict] = None
+    ):
+        """Remember the findings and annotated image for a key"""
+        with self._lock:
+            self._entries[key] = {
+                "detections": detections,
+                "annotated_path": annotated_path,
+                "annotated_cloudinary": annotated_cloudinary
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses
+            }
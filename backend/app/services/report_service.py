@@ -7,13 +7,11 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from io import BytesIO
 from datetime import datetime
 import requests
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
 from typing import Optional
 from ..models.detection import Detection
 from ..models.patient import Patient
 from ..core.config import settings
+from ..core.metrics import track_upstream
 
 class ReportService:
     """Service for generating PDF reports of detection results"""
@@ -250,8 +248,9 @@ class ReportService:
     
     def _download_image(self, url: str, width: float, height: float) -> Image:
         """Download image from URL and return ReportLab Image object"""
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        with track_upstream("cloudinary", "download"):
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
         
         img_buffer = BytesIO(response.content)
         img = Image(img_buffer, width=width, height=height)
@@ -354,6 +353,11 @@ class ReportService:
     
     def _create_severity_chart(self, severity_counts: dict) -> BytesIO:
         """Create a severity distribution pie chart"""
+        # Imported on first chart: pyplot is the slowest import in the app
+        import matplotlib
+        matplotlib.use('Agg')  # Use non-interactive backend
+        import matplotlib.pyplot as plt
+        
         # Filter out zero counts
         labels = []
         sizes = []
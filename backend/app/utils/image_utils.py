@@ -1,8 +1,11 @@
-from PIL import Image
 import io
+from typing import Union
+import numpy as np
 
 def validate_image(file_content: bytes) -> bool:
     """Validate if file is a valid image"""
+    from PIL import Image
+    
     try:
         img = Image.open(io.BytesIO(file_content))
         img.verify()
@@ -12,5 +15,38 @@ def validate_image(file_content: bytes) -> bool:
 
 def get_image_dimensions(file_path: str) -> tuple:
     """Get image dimensions"""
+    from PIL import Image
+    
     img = Image.open(file_path)
-    return img.size
\ No newline at end of file
+    return img.size
+
+def decode_reduced_grayscale(file_content: bytes) -> np.ndarray:
+    """Grayscale copy of an encoded image at a quarter of its size"""
+    import cv2
+    
+    # JPEGs are decoded at reduced size directly, a fraction of a full decode
+    image = cv2.imdecode(np.frombuffer(file_content, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if image is None:
+        raise ValueError("Could not decode image")
+    return image
+
+def perceptual_hash(file_content: Union[bytes, np.ndarray]) -> int:
+    """64-bit DCT perceptual hash (pHash) of an encoded image
+    
+    Re-exported, re-compressed or slightly cropped copies of an image hash
+    to values a few bits apart. Returned as a signed 64-bit integer so it
+    fits a BIGINT column. Also accepts the image already decoded by
+    decode_reduced_grayscale, which is all the hash needs.
+    """
+    import cv2
+    
+    image = file_content if isinstance(file_content, np.ndarray) else decode_reduced_grayscale(file_content)
+    small = cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low_frequencies = cv2.dct(small)[:8, :8].flatten()
+    bits = low_frequencies > np.median(low_frequencies[1:])  # Ignore the DC term
+    return int.from_bytes(np.packbits(bits).tobytes(), "big", signed=True)
+
+def hamming_distances(image_hash: int, hashes: np.ndarray) -> np.ndarray:
+    """Number of differing bits between one perceptual hash and an array of them"""
+    differing = np.bitwise_xor(np.asarray(hashes, dtype=np.int64), np.int64(image_hash))
+    return np.unpackbits(differing.view(np.uint8)).reshape(-1, 64).sum(axis=1)
@@ -0,0 +1,28 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+class StageTimer:
+    """Accumulate wall-clock milliseconds per named stage
+    
+    Records into the given dictionary when one is passed, so a breakdown can
+    be started in one layer and continued in another.
+    """
+    
+    def __init__(self, timings: Dict[str, float] = None):
+        self.timings = timings if timings is not None else {}
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block, adding to any earlier time for the same stage"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start_time) * 1000)
+    
+    def add(self, name: str, elapsed_ms: float):
+        self.timings[name] = round(self.timings.get(name, 0.0) + elapsed_ms, 3)
+    
+    def total_ms(self) -> float:
+        return round(sum(self.timings.values()), 3)
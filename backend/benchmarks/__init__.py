@@ -0,0 +1,20 @@
+"""
+Benchmarks for the detection pipeline, API, PDF reports and analytics
+
+Usage (from backend/):
+    python -m benchmarks run --output-dir benchmark-results
+    python -m benchmarks run --suites pipeline,report --quick
+    python -m benchmarks compare benchmark-results/<base>.json benchmark-results/<head>.json
+    python -m benchmarks memory --budget-mb 512
+    python -m benchmarks seed --database-url postgresql://localhost/caries_load --reset
+
+Runs without a GPU or network access: the model is a randomly initialized
+YOLOv8n, images are synthetic radiographs, Cloudinary is replaced by an
+in-process stand-in and the database is a temporary SQLite file unless
+--database-url points at a local PostgreSQL. Each run writes a JSON report
+(for compare) and a Markdown summary named after the git commit.
+
+`seed` loads a production-sized dataset (50k patients, ~1M detections, ~5M
+findings by default) with COPY, for benchmarking the analytics, history and
+list endpoints and index changes against realistic table sizes.
+"""
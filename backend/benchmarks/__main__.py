@@ -0,0 +1,200 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import traceback
+from . import environment
+
+SUITES = ("startup", "pipeline", "api", "report", "analytics", "memory")
+MODEL_SUITES = ("pipeline", "api", "memory")
+
+def run(args) -> int:
+    suites = [suite.strip() for suite in args.suites.split(",") if suite.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        print(f"Unknown suites: {', '.join(sorted(unknown))} (choose from {', '.join(SUITES)})")
+        return 2
+    
+    workdir = environment.prepare(args.workdir, args.database_url, args.backend)
+    print(f"Working directory: {workdir}")
+    
+    if set(suites) & set(MODEL_SUITES):
+        from .synthetic import build_tiny_model
+        
+        build_tiny_model(os.environ["MODEL_PATH"], seed=args.seed)
+    
+    environment.quiet_database()
+    
+    results, failed = {}, []
+    for suite in suites:
+        print(f"Running {suite}...")
+        try:
+            module = importlib.import_module(f".suites.{suite}", __package__)
+            results[suite] = module.run(quick=args.quick, cloudinary_latency_ms=args.cloudinary_latency_ms)
+        except Exception:
+            traceback.print_exc()
+            failed.append(suite)
+    
+    from .reporting import write_reports
+    
+    json_path, markdown_path = write_reports(environment.describe(args.backend), results, args.output_dir)
+    print(f"Wrote {json_path} and {markdown_path}")
+    if failed:
+        print(f"Failed suites: {', '.join(failed)}")
+        return 1
+    return 0
+
+def memory(args) -> int:
+    """Run only the memory suite, in a fresh process, and fail if it is over budget"""
+    from .memory import check_budgets
+    
+    workdir = environment.prepare(args.workdir, args.database_url, args.backend)
+    print(f"Working directory: {workdir}")
+    
+    from .synthetic import build_tiny_model
+    
+    build_tiny_model(os.environ["MODEL_PATH"], seed=args.seed)
+    environment.quiet_database()
+    
+    from .suites import memory as memory_suite
+    from .reporting import write_reports
+    
+    results = {"memory": memory_suite.run(quick=args.quick, iterations=args.iterations)}
+    json_path, markdown_path = write_reports(environment.describe(args.backend), results, args.output_dir)
+    print(f"Wrote {json_path} and {markdown_path}")
+    
+    violations = check_budgets(results["memory"], args.budget_mb, args.max_growth_kb)
+    if results["memory"]["errors"]:
+        violations.append(f"{results['memory']['errors']} requests failed")
+    for violation in violations:
+        print(violation)
+    return 1 if violations else 0
+
+def threads(args) -> int:
+    """Sweep intra-op and OpenCV thread counts under concurrent uploads and recommend a configuration"""
+    from .threads import sweep
+    
+    workdir = environment.prepare(args.workdir, backend=args.backend)
+    print(f"Working directory: {workdir}")
+    
+    from .synthetic import build_tiny_model
+    
+    build_tiny_model(os.environ["MODEL_PATH"], seed=args.seed)
+    
+    from .reporting import write_reports
+    
+    def counts(spec):
+        return [int(count) for count in spec.split(",") if count.strip()] if spec else []
+    
+    requests = args.requests or (8 if args.quick else 48)
+    results = {"threads": sweep(
+        workdir,
+        concurrency=args.concurrency,
+        requests=requests,
+        intra_op_threads=counts(args.intra_op_threads),
+        opencv_threads=counts(args.opencv_threads),
+        affinity=args.affinity
+    )}
+    json_path, markdown_path = write_reports(environment.describe(args.backend), results, args.output_dir)
+    print(f"Wrote {json_path} and {markdown_path}")
+    print("Recommended:")
+    for name, value in results["threads"]["recommended"].items():
+        print(f"{name}={value}")
+    return 0
+
+def seed(args) -> int:
+    workdir = environment.prepare(args.workdir, args.database_url)
+    environment.quiet_database()
+    
+    from app.core.database import engine
+    from .datagen import DEFAULT_VOLUMES, generate
+    
+    volumes = {key: value for key, value in vars(args).items() if key in DEFAULT_VOLUMES and value is not None}
+    print(f"Seeding {engine.url.render_as_string(hide_password=True)}")
+    summary = generate(engine, volumes, seed=args.seed, chunk_size=args.chunk_size, reset=args.reset)
+    print(json.dumps(summary, indent=2))
+    if not args.database_url:
+        print(f"SQLite database in {workdir}")
+    return 0
+
+def compare(args) -> int:
+    from .reporting import compare as compare_reports, render_comparison
+    
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    
+    rows, regressions = compare_reports(base, head, args.threshold)
+    print(render_comparison(base, head, rows, args.threshold))
+    if regressions:
+        print(f"{len(regressions)} metrics regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = commands.add_parser("run", help="Run benchmark suites and write JSON + Markdown reports")
+    run_parser.add_argument("--suites", default=",".join(SUITES), help="Comma-separated subset of " + ", ".join(SUITES))
+    run_parser.add_argument("--quick", action="store_true", help="Fewer repeats and smaller data, for a smoke run")
+    run_parser.add_argument("--output-dir", default="benchmark-results")
+    run_parser.add_argument("--workdir", help="Scratch directory for uploads, the model and the SQLite database")
+    run_parser.add_argument("--database-url", help="Local PostgreSQL to use instead of a temporary SQLite file")
+    run_parser.add_argument("--backend", default="ultralytics", choices=["ultralytics", "onnx", "onnx_int8"])
+    run_parser.add_argument("--cloudinary-latency-ms", type=float, default=0.0, help="Simulated upload latency")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed for the random model weights")
+    run_parser.set_defaults(handler=run)
+    
+    memory_parser = commands.add_parser("memory", help="Track RSS over repeated detections and reports; exits 1 over budget")
+    memory_parser.add_argument("--iterations", type=int, default=0, help="Measured iterations (default 200, 20 with --quick)")
+    memory_parser.add_argument("--budget-mb", type=float, default=512.0, help="Peak RSS allowed")
+    memory_parser.add_argument("--max-growth-kb", type=float, default=64.0, help="RSS growth per iteration allowed after warm-up")
+    memory_parser.add_argument("--quick", action="store_true")
+    memory_parser.add_argument("--output-dir", default="benchmark-results")
+    memory_parser.add_argument("--workdir")
+    memory_parser.add_argument("--database-url")
+    memory_parser.add_argument("--backend", default="ultralytics", choices=["ultralytics", "onnx", "onnx_int8"])
+    memory_parser.add_argument("--seed", type=int, default=0, help="Seed for the random model weights")
+    memory_parser.set_defaults(handler=memory)
+    
+    threads_parser = commands.add_parser("threads", help="Sweep inference thread counts under concurrent uploads and recommend settings")
+    threads_parser.add_argument("--concurrency", type=int, default=4, help="Uploads in flight")
+    threads_parser.add_argument("--requests", type=int, default=0, help="Timed uploads per configuration (default 48, 8 with --quick)")
+    threads_parser.add_argument("--intra-op-threads", default="", help="Comma-separated counts (default 1, 2, 4, ... up to the CPU count)")
+    threads_parser.add_argument("--opencv-threads", default="-1,0,1", help="Comma-separated counts; -1 is OpenCV's default")
+    threads_parser.add_argument("--affinity", default="", help="INFERENCE_CPU_AFFINITY for every run, e.g. 0-3")
+    threads_parser.add_argument("--quick", action="store_true")
+    threads_parser.add_argument("--output-dir", default="benchmark-results")
+    threads_parser.add_argument("--workdir")
+    threads_parser.add_argument("--backend", default="ultralytics", choices=["ultralytics", "onnx", "onnx_int8"])
+    threads_parser.add_argument("--seed", type=int, default=0, help="Seed for the random model weights")
+    threads_parser.set_defaults(handler=threads)
+    
+    seed_parser = commands.add_parser("seed", help="Load a production-sized synthetic dataset for query benchmarks")
+    seed_parser.add_argument("--database-url", help="Database to seed (default: a SQLite file in --workdir)")
+    seed_parser.add_argument("--workdir", help="Scratch directory for the SQLite database")
+    seed_parser.add_argument("--patients", type=int, help="Number of patients (default 50000)")
+    seed_parser.add_argument("--dentists", type=int)
+    seed_parser.add_argument("--detections-per-patient", type=float)
+    seed_parser.add_argument("--findings-per-detection", type=float)
+    seed_parser.add_argument("--appointments-per-patient", type=float)
+    seed_parser.add_argument("--days", type=int, help="Length of the generated history")
+    seed_parser.add_argument("--chunk-size", type=int, default=1000, help="Patients per transaction")
+    seed_parser.add_argument("--seed", type=int, default=0)
+    seed_parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    seed_parser.set_defaults(handler=seed)
+    
+    compare_parser = commands.add_parser("compare", help="Compare two JSON reports; exits 1 on regressions")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression")
+    compare_parser.set_defaults(handler=compare)
+    
+    args = parser.parse_args()
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Isolated settings for a benchmark run, applied before anything under app is imported"""
+import os
+import platform
+import subprocess
+import tempfile
+from typing import Dict, Any, Optional
+from sqlalchemy import ARRAY, create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+@compiles(ARRAY, "sqlite")
+def _compile_array_sqlite(type_, compiler, **kw):
+    return "JSON"  # Only resources.tags, which no benchmark writes
+
+def _bind_sqlite(database_url: str):
+    """Swap the app's PostgreSQL engine for a SQLite one with the same pool limits"""
+    from app.core import database
+    
+    database.engine = create_engine(
+        database_url,
+        pool_size=10,
+        max_overflow=20,
+        connect_args={"check_same_thread": False}
+    )
+    database.SessionLocal.configure(bind=database.engine)
+
+def prepare(workdir: Optional[str] = None, database_url: Optional[str] = None, backend: str = "ultralytics") -> str:
+    """Point settings at a scratch directory, a benchmark database and the synthetic model
+    
+    Must run before anything under app is imported. Returns the scratch directory.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="caries-benchmark-")
+    database_url = database_url or f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    for name in ("uploads", "results", "models"):
+        os.makedirs(os.path.join(workdir, name), exist_ok=True)
+    
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "SECRET_KEY": "benchmark",
+        "MODEL_PATH": os.path.join(workdir, "models", "tiny-yolov8n.pt"),
+        "MODEL_VERSION": "tiny-yolov8n",
+        "INFERENCE_BACKEND": backend,
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "RESULTS_DIR": os.path.join(workdir, "results"),
+        "CLOUDINARY_CLOUD_NAME": "benchmark",
+        "CLOUDINARY_API_KEY": "benchmark",
+        "CLOUDINARY_API_SECRET": "benchmark",
+        "RESEND_API_KEY": "",
+        "GROQ_API_KEY": ""
+    })
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    if database_url.startswith("sqlite"):
+        _bind_sqlite(database_url)
+    return workdir
+
+def quiet_database():
+    """Turn off SQL echo so statement logging does not dominate the timings"""
+    from app.core.database import engine
+    
+    engine.echo = False
+
+def git_revision() -> Dict[str, Any]:
+    """Commit the benchmarked tree was built from"""
+    def git(*args) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "."))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": "unknown", "dirty": None}
+
+def describe(backend: str) -> Dict[str, Any]:
+    """Machine and library versions, so reports are only compared like for like"""
+    from importlib import metadata
+    from app.core.config import settings
+    
+    versions = {}
+    for package in ("torch", "ultralytics", "onnxruntime", "opencv-python", "numpy", "sqlalchemy", "fastapi", "reportlab"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    
+    return {
+        **git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "inference_backend": backend,
+        "database": settings.DATABASE_URL.split(":", 1)[0],
+        "confidence_threshold": settings.CONFIDENCE_THRESHOLD,
+        "packages": versions
+    }
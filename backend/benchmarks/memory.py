@@ -0,0 +1,115 @@
+"""Resident memory measurement and leak reports for the memory suite"""
+import gc
+import os
+import sys
+import tracemalloc
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+import psutil
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Render's instance size; the budget the memory guard enforces by default
+DEFAULT_BUDGET_MB = 512.0
+DEFAULT_MAX_GROWTH_KB = 64.0  # Per iteration, once warmed up
+
+def rss_mb() -> float:
+    """Current resident memory of this process in MB, after a full collection"""
+    gc.collect()
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+def peak_rss_mb() -> Optional[float]:
+    """Highest resident memory this process has reached, in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def growth_per_iteration_kb(samples_mb: Sequence[float]) -> float:
+    """Least-squares slope of RSS samples taken after each iteration, in KB per iteration
+    
+    Only the second half is fitted: allocator pools, caches and lazily
+    imported modules grow during the first iterations and then level off,
+    while a leak keeps growing.
+    """
+    steady = np.asarray(samples_mb[len(samples_mb) // 2:], dtype=np.float64)
+    if steady.size < 2:
+        return 0.0
+    slope_mb = np.polyfit(np.arange(steady.size), steady, 1)[0]
+    return round(float(slope_mb) * 1024, 3)
+
+class AllocationTracer:
+    """tracemalloc snapshots around a block, reporting the sites whose allocations grew
+    
+    tracemalloc only sees allocations made through Python's allocators
+    (objects, bytes buffers, numpy arrays), not torch or OpenCV internals;
+    RSS covers those.
+    """
+    
+    IGNORED = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+    
+    def __init__(self, frames: int = 8):
+        self.frames = frames
+        self.before = None
+        self.after = None
+    
+    def __enter__(self):
+        gc.collect()
+        tracemalloc.start(self.frames)
+        self.before = tracemalloc.take_snapshot()
+        return self
+    
+    def __exit__(self, *exc_info):
+        gc.collect()
+        self.after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        return False
+    
+    def top_growth(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Allocation sites with the largest net growth, innermost repo frame first"""
+        filters = [tracemalloc.Filter(False, pattern) for pattern in self.IGNORED]
+        before = self.before.filter_traces(filters)
+        after = self.after.filter_traces(filters)
+        
+        sites = []
+        for stat in after.compare_to(before, "traceback"):
+            if stat.size_diff <= 0:
+                continue
+            sites.append({
+                "size_kb": round(stat.size_diff / 1024, 1),
+                "count": stat.count_diff,
+                "site": _describe(stat.traceback)
+            })
+            if len(sites) == limit:
+                break
+        return sites
+
+def _describe(traceback: tracemalloc.Traceback) -> List[str]:
+    """Frames of an allocation traceback, most recent first, with paths shortened to the package"""
+    frames = []
+    for frame in reversed(traceback):
+        filename = frame.filename
+        for marker in (f"{os.sep}site-packages{os.sep}", f"{os.sep}backend{os.sep}"):
+            if marker in filename:
+                filename = filename.split(marker, 1)[1]
+                break
+        frames.append(f"{filename}:{frame.lineno}")
+    return frames
+
+def check_budgets(results: Dict[str, Any], budget_mb: float = DEFAULT_BUDGET_MB, max_growth_kb: float = DEFAULT_MAX_GROWTH_KB) -> List[str]:
+    """Budget violations in memory suite results, as messages (empty if within budget)"""
+    violations = []
+    peak = results.get("peak_rss_mb")
+    if peak is not None and peak > budget_mb:
+        violations.append(f"Peak RSS {peak:.0f} MB is over the {budget_mb:.0f} MB budget")
+    growth = results.get("growth_kb_per_iteration", 0.0)
+    if growth > max_growth_kb:
+        violations.append(
+            f"RSS grows {growth:.0f} KB per iteration after warm-up (limit {max_growth_kb:.0f} KB); "
+            "see leak_sites for where allocations accumulate"
+        )
+    return violations
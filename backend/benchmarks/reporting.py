@@ -0,0 +1,198 @@
+"""JSON and Markdown benchmark reports, and comparison between two runs"""
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Tuple
+
+# Metrics compared between runs, and whether a larger value is better
+COMPARED_METRICS = {"p50_ms": False, "p95_ms": False, "throughput_rps": True, "peak_rss_mb": False, "steady_rss_mb": False, "rss_mb": False}
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Compared metrics of a results tree as {"suite/case/.../metric": value}"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif key in COMPARED_METRICS and isinstance(value, (int, float)):
+            flat[path] = float(value)
+    return flat
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float = 0.1) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Relative change of every metric present in both reports
+    
+    Returns:
+        (rows with metric, base, head and change, metrics that got worse by more than threshold)
+    """
+    base_metrics, head_metrics = flatten(base["results"]), flatten(head["results"])
+    rows, regressions = [], []
+    for metric in sorted(base_metrics.keys() & head_metrics.keys()):
+        before, after = base_metrics[metric], head_metrics[metric]
+        change = (after - before) / before if before else 0.0
+        higher_is_better = COMPARED_METRICS[metric.rsplit("/", 1)[1]]
+        regressed = (-change if higher_is_better else change) > threshold
+        rows.append({"metric": metric, "base": before, "head": after, "change": change, "regressed": regressed})
+        if regressed:
+            regressions.append(metric)
+    return rows, regressions
+
+def render_markdown(report: Dict[str, Any]) -> str:
+    """Human-readable summary of a run"""
+    environment = report["environment"]
+    dirty = " (uncommitted changes)" if environment.get("dirty") else ""
+    lines = [
+        f"# Benchmark {environment['commit']}{dirty}",
+        "",
+        f"- Run at: {report['created_at']}",
+        f"- Python {environment['python']} on {environment['platform']}, {environment['cpu_count']} CPUs",
+        f"- Inference backend: {environment['inference_backend']}, database: {environment['database']}",
+        ""
+    ]
+    
+    results = report["results"]
+    if "startup" in results:
+        startup = results["startup"]
+        heavy = ", ".join(startup["heavy_modules"]) or "none"
+        packages = ", ".join(f"{name} {ms:.0f}" for name, ms in startup["slowest_packages_ms"].items())
+        lines += [
+            "## Cold start (new interpreter importing app.main)",
+            "",
+            f"- Wall time: {startup['cold_start']['p50_ms']:.0f} ms p50, {startup['cold_start']['p95_ms']:.0f} ms p95",
+            f"- RSS after import: {startup['rss_mb']:.0f} MB",
+            f"- Heavy libraries loaded: {heavy}",
+            f"- Slowest packages (self import ms): {packages}",
+            ""
+        ]
+    
+    if "pipeline" in results:
+        pipeline = results["pipeline"]
+        lines += [
+            "## Pipeline (p50 ms)",
+            "",
+            f"Model load: {pipeline['model_load_ms']:.0f} ms",
+            "",
+            "| Image | Size | Decode | Inference | Postprocess | Render | Encode | Total p50 | Total p95 |",
+            "|---|---|---|---|---|---|---|---|---|"
+        ]
+        for image_type, case in pipeline.items():
+            if not isinstance(case, dict):
+                continue
+            stages = case["stages"]
+            tiles = f", {case['tile_count']} tiles" if case["tiled"] else ""
+            lines.append(
+                f"| {image_type} | {case['width']}x{case['height']}{tiles} | "
+                + " | ".join(f"{stages[stage]['p50_ms']:.1f}" for stage in ("decode", "inference", "postprocess", "render", "encode"))
+                + f" | {case['total']['p50_ms']:.1f} | {case['total']['p95_ms']:.1f} |"
+            )
+        lines.append("")
+    
+    if "api" in results:
+        api = results["api"]
+        lines += [
+            f"## API (Cloudinary stand-in latency {api['cloudinary_latency_ms']:.0f} ms)",
+            "",
+            "| Endpoint | Concurrency | Requests/s | p50 ms | p95 ms | Errors |",
+            "|---|---|---|---|---|---|"
+        ]
+        for endpoint, levels in api.items():
+            if not isinstance(levels, dict):
+                continue
+            for level, case in levels.items():
+                lines.append(
+                    f"| {endpoint} | {level.rsplit('_', 1)[1]} | {case['throughput_rps']:.1f} | "
+                    f"{case['latency']['p50_ms']:.1f} | {case['latency']['p95_ms']:.1f} | {case['errors']} |"
+                )
+        lines.append("")
+    
+    if "report" in results:
+        lines += ["## PDF reports", "", "| Findings | p50 ms | p95 ms | Size |", "|---|---|---|---|"]
+        for case_name, case in results["report"].items():
+            lines.append(
+                f"| {case_name.rsplit('_', 1)[1]} | {case['p50_ms']:.1f} | {case['p95_ms']:.1f} | {case['pdf_bytes'] / 1024:.0f} KB |"
+            )
+        lines.append("")
+    
+    if "analytics" in results:
+        analytics = results["analytics"]
+        rows = ", ".join(f"{count} {table}" for table, count in analytics["rows"].items())
+        lines += [
+            "## Analytics queries",
+            "",
+            f"Seeded {rows} in {analytics['seed_ms'] / 1000:.1f} s",
+            "",
+            "| Query | p50 ms | p95 ms |",
+            "|---|---|---|"
+        ]
+        for query, case in analytics.items():
+            if isinstance(case, dict) and "p50_ms" in case:
+                lines.append(f"| {query} | {case['p50_ms']:.1f} | {case['p95_ms']:.1f} |")
+        lines.append("")
+    
+    if "memory" in results:
+        memory = results["memory"]
+        lines += [
+            f"## Memory ({memory['iterations']} detections with 2 PDF reports each)",
+            "",
+            f"- RSS: {memory['baseline_rss_mb']:.0f} MB at start, {memory['warmed_rss_mb']:.0f} MB warmed up, "
+            f"{memory['steady_rss_mb']:.0f} MB at the end, {memory['peak_rss_mb']:.0f} MB peak",
+            f"- Growth after warm-up: {memory['growth_kb_per_iteration']:.1f} KB per iteration",
+            f"- Failed requests: {memory['errors']}",
+            "",
+            f"Largest allocation growth over {memory['traced_iterations']} traced iterations:",
+            "",
+            "| KB | Blocks | Allocated at |",
+            "|---|---|---|"
+        ]
+        for site in memory["leak_sites"]:
+            lines.append(f"| {site['size_kb']:.1f} | {site['count']} | {' ← '.join(site['site'][:3])} |")
+        lines.append("")
+    
+    if "threads" in results:
+        sweep = results["threads"]
+        affinity = f", pinned to CPUs {sweep['affinity']}" if sweep["affinity"] else ""
+        lines += [
+            f"## Inference threads ({sweep['concurrency']} uploads in flight, {sweep['requests']} per configuration{affinity})",
+            "",
+            "| Intra-op threads | OpenCV threads | p50 ms | p95 ms | Requests/s |",
+            "|---|---|---|---|---|"
+        ]
+        for case in sweep["configurations"]:
+            lines.append(
+                f"| {case['intra_op_threads']} | {case['opencv_threads']} | {case['latency']['p50_ms']:.0f} | "
+                f"{case['latency']['p95_ms']:.0f} | {case['throughput_rps']:.2f} |"
+            )
+        recommended = " ".join(f"{name}={value}" for name, value in sweep["recommended"].items())
+        lines += ["", f"Recommended: `{recommended}`", ""]
+    
+    return "\n".join(lines)
+
+def render_comparison(base: Dict[str, Any], head: Dict[str, Any], rows: List[Dict[str, Any]], threshold: float) -> str:
+    lines = [
+        f"# Benchmark {base['environment']['commit']} → {head['environment']['commit']}",
+        "",
+        f"Regression threshold: {threshold:.0%}",
+        "",
+        "| Metric | Base | Head | Change |",
+        "|---|---|---|---|"
+    ]
+    for row in rows:
+        flag = " ⚠️" if row["regressed"] else ""
+        lines.append(f"| {row['metric']} | {row['base']:.2f} | {row['head']:.2f} | {row['change']:+.1%}{flag} |")
+    return "\n".join(lines) + "\n"
+
+def write_reports(environment: Dict[str, Any], results: Dict[str, Any], output_dir: str) -> Tuple[str, str]:
+    """Write <timestamp>-<commit>.json and .md to output_dir
+    
+    Returns:
+        (json path, markdown path)
+    """
+    created_at = datetime.now(timezone.utc)
+    report = {"created_at": created_at.isoformat(), "environment": environment, "results": results}
+    
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.join(output_dir, f"{created_at.strftime('%Y%m%dT%H%M%SZ')}-{environment['commit']}")
+    with open(f"{stem}.json", "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    with open(f"{stem}.md", "w") as f:
+        f.write(render_markdown(report))
+    return f"{stem}.json", f"{stem}.md"
@@ -0,0 +1,152 @@
+"""Seed a benchmark database with a clinic's worth of patients and detections"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+BENCHMARK_DENTIST_EMAIL = "benchmark-dentist@example.com"
+
+def get_or_create_dentist(db: Session):
+    """The user the API benchmark authenticates as"""
+    from app.models import User
+    from app.models.user import UserRole
+    
+    dentist = db.query(User).filter(User.email == BENCHMARK_DENTIST_EMAIL).first()
+    if dentist is None:
+        dentist = User(
+            email=BENCHMARK_DENTIST_EMAIL,
+            password_hash="not-a-real-hash",
+            full_name="Benchmark Dentist",
+            role=UserRole.DENTIST
+        )
+        db.add(dentist)
+        db.commit()
+        db.refresh(dentist)
+    return dentist
+
+def seed_clinic(
+    db: Session,
+    dentist_id: uuid.UUID,
+    patients: int,
+    detections_per_patient: int,
+    findings_per_detection: int,
+    days: int = 180,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """Insert patients (with portal accounts), detections, findings and appointments in bulk
+    
+    Detection and registration dates are spread over the last `days` days so
+    the trend and growth queries have something to group.
+    
+    Returns:
+        Row counts per table and one seeded patient's ids
+    """
+    from app.models import Appointment, CariesFinding, Detection, Patient, User
+    from app.models.appointment import AppointmentStatus
+    from app.models.caries import CariesType, Severity
+    from app.models.detection import DetectionStatus, ImageType
+    from app.models.user import UserRole
+    
+    rng = np.random.default_rng(seed)
+    now = datetime.now(timezone.utc)
+    run_id = uuid.uuid4().hex[:8]
+    
+    def past(size: int):
+        return [now - timedelta(seconds=float(s)) for s in rng.uniform(0, days * 86400, size)]
+    
+    user_ids = [uuid.uuid4() for _ in range(patients)]
+    patient_ids = [uuid.uuid4() for _ in range(patients)]
+    registered = past(patients)
+    db.execute(insert(User), [
+        {
+            "id": user_ids[i],
+            "email": f"patient-{run_id}-{i}@example.com",
+            "password_hash": "not-a-real-hash",
+            "full_name": f"Patient {i}",
+            "role": UserRole.PATIENT,
+            "is_active": True,
+            "created_at": registered[i]
+        }
+        for i in range(patients)
+    ])
+    db.execute(insert(Patient), [
+        {
+            "id": patient_ids[i],
+            "patient_id": f"PAT-{run_id}-{i:06d}",
+            "full_name": f"Patient {i}",
+            "age": int(rng.integers(6, 90)),
+            "gender": str(rng.choice(["male", "female", "other"])),
+            "user_id": user_ids[i],
+            "created_by": dentist_id,
+            "created_at": registered[i]
+        }
+        for i in range(patients)
+    ])
+    
+    total_detections = patients * detections_per_patient
+    detection_ids = [uuid.uuid4() for _ in range(total_detections)]
+    detected_at = past(total_detections)
+    caries_counts = rng.poisson(findings_per_detection, total_detections)
+    image_types = list(ImageType)
+    db.execute(insert(Detection), [
+        {
+            "id": detection_ids[i],
+            "detection_id": f"DET-{run_id}-{i:08d}",
+            "patient_id": patient_ids[i // detections_per_patient],
+            "dentist_id": dentist_id,
+            "original_image_path": f"uploads/{detection_ids[i]}.jpg",
+            "image_type": image_types[i % len(image_types)],
+            "detection_date": detected_at[i],
+            "created_at": detected_at[i],
+            "total_caries_detected": int(caries_counts[i]),
+            "processing_time_ms": float(rng.uniform(80, 400)),
+            "model_version": "tiny-yolov8n",
+            "confidence_threshold": 0.25,
+            "status": DetectionStatus.completed
+        }
+        for i in range(total_detections)
+    ])
+    
+    severities, caries_types = list(Severity), list(CariesType)
+    findings = [
+        {
+            "id": uuid.uuid4(),
+            "detection_id": detection_ids[i],
+            "tooth_number": int(rng.integers(1, 33)),
+            "caries_type": caries_types[int(rng.integers(len(caries_types)))],
+            "severity": severities[int(rng.integers(len(severities)))],
+            "confidence_score": float(rng.uniform(0.25, 0.99)),
+            "bounding_box": {"x": 10.0, "y": 10.0, "width": 40.0, "height": 30.0},
+            "area_mm2": float(rng.uniform(0.5, 12.0)),
+            "location": "occlusal",
+            "treatment_recommendation": "Monitor"
+        }
+        for i in range(total_detections)
+        for _ in range(int(caries_counts[i]))
+    ]
+    if findings:
+        db.execute(insert(CariesFinding), findings)
+    
+    statuses = list(AppointmentStatus)
+    db.execute(insert(Appointment), [
+        {
+            "id": uuid.uuid4(),
+            "patient_id": patient_ids[i],
+            "dentist_id": dentist_id,
+            "appointment_date": (now + timedelta(days=float(rng.uniform(-days, 30)))).replace(tzinfo=None),
+            "status": statuses[i % len(statuses)]
+        }
+        for i in range(patients)
+    ])
+    db.commit()
+    
+    return {
+        "patients": patients,
+        "detections": total_detections,
+        "caries_findings": len(findings),
+        "appointments": patients,
+        "sample_patient_id": patient_ids[0],
+        "sample_patient_user_id": user_ids[0]
+    }
@@ -0,0 +1,28 @@
+"""Summary statistics for timing samples"""
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence
+import numpy as np
+
+def summarize(samples_ms: Sequence[float]) -> Dict[str, float]:
+    """Count, mean and percentiles of a list of millisecond samples"""
+    if not samples_ms:
+        return {"count": 0}
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "count": int(samples.size),
+        "mean_ms": round(float(samples.mean()), 3),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "min_ms": round(float(samples.min()), 3),
+        "max_ms": round(float(samples.max()), 3)
+    }
+
+@contextmanager
+def timed(samples: List[float]):
+    """Append the enclosed block's wall time in milliseconds to samples"""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append((time.perf_counter() - start_time) * 1000)
@@ -0,0 +1 @@
+"""Benchmark suites; each exposes run(quick: bool, **options) -> dict"""
@@ -0,0 +1,45 @@
+"""Analytics and history query time over a seeded clinic"""
+import time
+from typing import Dict, Any, List
+from ..seed import get_or_create_dentist, seed_clinic
+from ..stats import summarize, timed
+
+def run(quick: bool = False, **options) -> Dict[str, Any]:
+    from app.core.database import SessionLocal
+    from app.services.analytics_service import AnalyticsService
+    
+    patients = 200 if quick else 2000
+    repeats = 3 if quick else 10
+    
+    db = SessionLocal()
+    try:
+        dentist = get_or_create_dentist(db)
+        start_time = time.perf_counter()
+        seeded = seed_clinic(db, dentist.id, patients=patients, detections_per_patient=10, findings_per_detection=3)
+        seed_ms = (time.perf_counter() - start_time) * 1000
+        
+        patient_id = seeded["sample_patient_id"]
+        queries = {
+            "detection_trends": lambda: AnalyticsService.get_detection_trends(db, 30),
+            "caries_distribution": lambda: AnalyticsService.get_caries_distribution(db),
+            "patient_growth": lambda: AnalyticsService.get_patient_growth(db, 90),
+            "appointment_stats": lambda: AnalyticsService.get_appointment_stats(db),
+            "health_score": lambda: AnalyticsService.calculate_health_score(db, patient_id),
+            "detection_history": lambda: AnalyticsService.get_detection_history(db, patient_id)
+        }
+        
+        results: Dict[str, Any] = {
+            "rows": {key: value for key, value in seeded.items() if not key.startswith("sample_")},
+            "seed_ms": round(seed_ms, 3)
+        }
+        for name, query in queries.items():
+            query()  # Warm the connection and statement caches
+            samples: List[float] = []
+            for _ in range(repeats):
+                with timed(samples):
+                    query()
+                db.expire_all()  # Don't let the identity map answer later repeats
+            results[name] = summarize(samples)
+        return results
+    finally:
+        db.close()
@@ -0,0 +1,116 @@
+"""Throughput and latency of the FastAPI app at several concurrency levels
+
+Requests go through the full ASGI stack in-process (httpx ASGITransport):
+authentication with a real token, the database and detection on the
+synthetic model. Cloudinary uploads are replaced by a stand-in with a fixed
+latency.
+"""
+import asyncio
+import time
+from typing import Dict, Any, List, Sequence
+from ..seed import get_or_create_dentist, seed_clinic
+from ..stats import summarize
+from ..synthetic import IMAGE_SIZES, encode_jpeg, make_radiograph
+
+CONCURRENCY_LEVELS = (1, 4, 16)
+
+def use_cloudinary_stand_in(latency_ms: float = 0.0):
+    """Replace Cloudinary uploads with a sleep and a fake URL"""
+    from uuid import uuid4
+    from app.services.cloudinary_service import CloudinaryService
+    
+    def upload_image(self, file, folder: str = "dental-caries") -> Dict[str, Any]:
+        time.sleep(latency_ms / 1000)
+        public_id = f"{folder}/{uuid4().hex}"
+        url = f"https://res.cloudinary.invalid/benchmark/{public_id}.jpg"
+        return {"url": url, "public_id": public_id, "secure_url": url, "width": None, "height": None}
+    
+    CloudinaryService.upload_image = upload_image
+
+async def _run_level(client, concurrency: int, requests: Sequence[dict]) -> Dict[str, Any]:
+    """Send requests with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    
+    async def send(request: dict):
+        nonlocal errors
+        async with semaphore:
+            start_time = time.perf_counter()
+            response = await client.request(**request)
+            latencies.append((time.perf_counter() - start_time) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+    
+    start_time = time.perf_counter()
+    await asyncio.gather(*(send(request) for request in requests))
+    elapsed = time.perf_counter() - start_time
+    return {
+        "requests": len(requests),
+        "errors": errors,
+        "throughput_rps": round(len(requests) / elapsed, 3),
+        "latency": summarize(latencies)
+    }
+
+async def _run_all(app, headers: Dict[str, str], endpoints: Dict[str, Any], levels: Sequence[int], per_level: int):
+    import httpx
+    
+    results: Dict[str, Any] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", headers=headers, timeout=None) as client:
+        for name, make_requests in endpoints.items():
+            # One untimed request so model loading and first-use costs are not in the numbers
+            await _run_level(client, 1, make_requests(1))
+            results[name] = {
+                f"concurrency_{level}": await _run_level(client, level, make_requests(max(per_level, level)))
+                for level in levels
+            }
+    return results
+
+def run(quick: bool = False, cloudinary_latency_ms: float = 0.0, **options) -> Dict[str, Any]:
+    from app.main import app
+    from app.core.database import SessionLocal
+    from app.core.security import create_access_token
+    
+    use_cloudinary_stand_in(cloudinary_latency_ms)
+    levels = CONCURRENCY_LEVELS
+    per_level = 16 if quick else 64
+    
+    db = SessionLocal()
+    try:
+        dentist = get_or_create_dentist(db)
+        seeded = seed_clinic(db, dentist.id, patients=50 if quick else 500, detections_per_patient=2, findings_per_detection=2)
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': dentist.email})}"}
+    finally:
+        db.close()
+    
+    patient_id = str(seeded["sample_patient_id"])
+    width, height = IMAGE_SIZES["periapical"]
+    image_seed = iter(range(1_000_000))
+    
+    def detection_uploads(count: int) -> List[dict]:
+        # A new image per request, so the inference cache does not answer them
+        return [
+            {
+                "method": "POST",
+                "url": "/api/v1/detections/",
+                "files": {"file": ("radiograph.jpg", encode_jpeg(make_radiograph(width, height, seed=next(image_seed))), "image/jpeg")},
+                "data": {"patient_id": patient_id, "image_type": "periapical"}
+            }
+            for _ in range(count)
+        ]
+    
+    def patient_detections(count: int) -> List[dict]:
+        return [{"method": "GET", "url": f"/api/v1/detections/patient/{patient_id}"}] * count
+    
+    def patient_list(count: int) -> List[dict]:
+        return [{"method": "GET", "url": "/api/v1/patients/", "params": {"limit": 100}}] * count
+    
+    endpoints = {
+        "create_detection": detection_uploads,
+        "patient_detections": patient_detections,
+        "list_patients": patient_list
+    }
+    results = asyncio.run(_run_all(app, headers, endpoints, levels, per_level))
+    results["cloudinary_latency_ms"] = cloudinary_latency_ms
+    return results
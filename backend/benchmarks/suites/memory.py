@@ -0,0 +1,116 @@
+"""Resident memory across hundreds of detections and PDF reports in one process
+
+Each iteration uploads a new radiograph through the API and downloads two
+PDF reports: one for the new detection (original and annotated images) and
+one for a seeded detection with findings (findings table and severity
+chart). RSS is sampled after every iteration; a shorter second pass under
+tracemalloc reports where allocations accumulate.
+"""
+import asyncio
+import contextlib
+import os
+import time
+from types import SimpleNamespace
+from typing import Dict, Any, List
+from .. import memory
+from ..seed import get_or_create_dentist, seed_clinic
+from ..synthetic import IMAGE_SIZES, encode_jpeg, make_radiograph
+from .api import use_cloudinary_stand_in
+
+def use_image_download_stand_in(data: bytes):
+    """Answer ReportService image downloads with the same JPEG instead of fetching from Cloudinary"""
+    from app.services import report_service
+    
+    class Response:
+        content = data
+        
+        @staticmethod
+        def raise_for_status():
+            pass
+    
+    report_service.requests = SimpleNamespace(get=lambda url, timeout=None: Response())
+
+async def _iterate(app, headers: Dict[str, str], patient_id: str, report_detection_id: str, iterations: int, first_seed: int, samples: List[float]) -> int:
+    """Run iterations, appending RSS after each to samples; returns the number of failed requests"""
+    import httpx
+    
+    width, height = IMAGE_SIZES["periapical"]
+    errors = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", headers=headers, timeout=None) as client:
+        for i in range(iterations):
+            upload = encode_jpeg(make_radiograph(width, height, seed=first_seed + i))
+            response = await client.post(
+                "/api/v1/detections/",
+                files={"file": ("radiograph.jpg", upload, "image/jpeg")},
+                data={"patient_id": patient_id, "image_type": "periapical"}
+            )
+            responses = [response]
+            if response.status_code < 400:
+                responses.append(await client.get(f"/api/v1/reports/detection/{response.json()['id']}/pdf"))
+            responses.append(await client.get(f"/api/v1/reports/detection/{report_detection_id}/pdf"))
+            errors += sum(r.status_code >= 400 for r in responses)
+            del upload, response, responses
+            samples.append(memory.rss_mb())
+    return errors
+
+def run(quick: bool = False, iterations: int = 0, **options) -> Dict[str, Any]:
+    from app.main import app
+    from app.core.database import SessionLocal
+    from app.core.security import create_access_token
+    from app.models import Detection
+    
+    iterations = iterations or (20 if quick else 200)
+    warmup = 3 if quick else 10
+    traced = max(5, iterations // 4)
+    
+    use_cloudinary_stand_in()
+    width, height = IMAGE_SIZES["bitewing"]
+    use_image_download_stand_in(encode_jpeg(make_radiograph(width, height, seed=1)))
+    
+    db = SessionLocal()
+    try:
+        dentist = get_or_create_dentist(db)
+        seeded = seed_clinic(db, dentist.id, patients=5, detections_per_patient=2, findings_per_detection=8)
+        with_findings = (
+            db.query(Detection)
+            .filter(Detection.patient_id == seeded["sample_patient_id"], Detection.total_caries_detected > 0)
+            .first()
+        )
+        with_findings.original_image_url = "https://res.cloudinary.invalid/benchmark/original.jpg"
+        with_findings.annotated_image_url = "https://res.cloudinary.invalid/benchmark/annotated.jpg"
+        report_detection_id = str(with_findings.id)
+        db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': dentist.email})}"}
+    finally:
+        db.close()
+    patient_id = str(seeded["sample_patient_id"])
+    
+    baseline_mb = memory.rss_mb()
+    warmup_samples: List[float] = []
+    samples: List[float] = []
+    # ReportService prints progress for every report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start_time = time.perf_counter()
+        errors = asyncio.run(_iterate(app, headers, patient_id, report_detection_id, warmup, 0, warmup_samples))
+        warmed_mb = memory.rss_mb()
+        errors += asyncio.run(_iterate(app, headers, patient_id, report_detection_id, iterations, warmup, samples))
+        elapsed = time.perf_counter() - start_time
+        peak_mb = memory.peak_rss_mb()
+        
+        with memory.AllocationTracer() as tracer:
+            asyncio.run(_iterate(app, headers, patient_id, report_detection_id, traced, warmup + iterations, []))
+    
+    return {
+        "iterations": iterations,
+        "errors": errors,
+        "seconds": round(elapsed, 1),
+        "baseline_rss_mb": round(baseline_mb, 1),
+        "warmed_rss_mb": round(warmed_mb, 1),
+        "steady_rss_mb": round(samples[-1], 1),
+        "peak_rss_mb": round(peak_mb if peak_mb is not None else max(warmup_samples + samples), 1),
+        "growth_kb_per_iteration": memory.growth_per_iteration_kb(samples),
+        "rss_samples_mb": [round(sample, 1) for sample in samples],
+        "traced_iterations": traced,
+        "leak_sites": tracer.top_growth()
+    }
@@ -0,0 +1,61 @@
+"""Latency of each detection stage on synthetic radiographs of every image type"""
+import time
+from typing import Dict, Any, List
+from ..stats import summarize, timed
+from ..synthetic import IMAGE_SIZES, encode_jpeg, make_radiograph
+
+STAGES = ("decode", "inference", "postprocess", "render", "encode")
+
+def run(quick: bool = False, **options) -> Dict[str, Any]:
+    from app.core.config import settings
+    from app.ml.model_loader import model_loader
+    from app.ml.postprocessor import ResultProcessor
+    from app.ml.predictor import CariesDetector
+    from app.ml.preprocessor import ImagePreprocessor
+    from app.ml.renderer import AnnotationRenderer
+    
+    warmup, repeats = (1, 3) if quick else (3, 20)
+    image_types = ("periapical", "panoramic") if quick else tuple(IMAGE_SIZES)
+    
+    start_time = time.perf_counter()
+    model_loader.load_model()
+    results: Dict[str, Any] = {"model_load_ms": round((time.perf_counter() - start_time) * 1000, 3)}
+    
+    detector = CariesDetector()
+    postprocessor = ResultProcessor()
+    
+    for index, image_type in enumerate(image_types):
+        width, height = IMAGE_SIZES[image_type]
+        data = encode_jpeg(make_radiograph(width, height, seed=index))
+        tiled = settings.TILED_INFERENCE_ENABLED and image_type == "panoramic"
+        
+        samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        totals: List[float] = []
+        for i in range(warmup + repeats):
+            run_samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+            with timed(run_samples["decode"]):
+                image = ImagePreprocessor.decode(data)
+            with timed(run_samples["inference"]):
+                detection_results = detector.detect_tiled(image) if tiled else detector.detect(image)
+            with timed(run_samples["postprocess"]):
+                detections = postprocessor.process_results(detection_results["results"], image.shape)
+            with timed(run_samples["render"]):
+                annotated = AnnotationRenderer.render(image, detections)
+            with timed(run_samples["encode"]):
+                AnnotationRenderer.encode(annotated, settings.ANNOTATED_IMAGE_FORMAT, settings.ANNOTATED_IMAGE_QUALITY)
+            
+            if i >= warmup:
+                for stage in STAGES:
+                    samples[stage].extend(run_samples[stage])
+                totals.append(sum(run_samples[stage][0] for stage in STAGES))
+        
+        results[image_type] = {
+            "width": width,
+            "height": height,
+            "tiled": tiled,
+            "tile_count": detection_results.get("tile_count", 1),
+            "detections": len(detections),
+            "stages": {stage: summarize(samples[stage]) for stage in STAGES},
+            "total": summarize(totals)
+        }
+    return results
@@ -0,0 +1,68 @@
+"""PDF report generation time for detections with different numbers of findings"""
+import contextlib
+import io
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Any, List
+from ..stats import summarize, timed
+
+FINDING_COUNTS = (0, 5, 20)
+
+def _detection(findings: int):
+    """In-memory detection and patient (no image URLs, so nothing is downloaded)"""
+    from app.models import CariesFinding, Detection, Patient
+    from app.models.caries import CariesType, Severity
+    from app.models.detection import DetectionStatus, ImageType
+    
+    patient = Patient(id=uuid.uuid4(), patient_id="PAT-BENCH", full_name="Benchmark Patient", age=42, gender="female")
+    detection = Detection(
+        id=uuid.uuid4(),
+        detection_id="DET-BENCH",
+        patient_id=patient.id,
+        original_image_path="uploads/benchmark.jpg",
+        image_type=ImageType.bitewing,
+        detection_date=datetime.now(timezone.utc),
+        total_caries_detected=findings,
+        processing_time_ms=120.0,
+        model_version="tiny-yolov8n",
+        confidence_threshold=0.25,
+        status=DetectionStatus.completed,
+        notes="Synthetic detection for benchmarking"
+    )
+    severities, caries_types = list(Severity), list(CariesType)
+    detection.caries_findings = [
+        CariesFinding(
+            tooth_number=i % 32 + 1,
+            caries_type=caries_types[i % len(caries_types)],
+            severity=severities[i % len(severities)],
+            confidence_score=0.5 + (i % 5) / 10,
+            bounding_box={"x": 10.0 * i, "y": 20.0, "width": 40.0, "height": 30.0},
+            area_mm2=1.5 + i,
+            location="occlusal",
+            treatment_recommendation="Monitor"
+        )
+        for i in range(findings)
+    ]
+    return detection, patient
+
+def run(quick: bool = False, **options) -> Dict[str, Any]:
+    from app.services.report_service import ReportService
+    
+    warmup, repeats = (1, 3) if quick else (2, 15)
+    service = ReportService()
+    
+    results: Dict[str, Any] = {}
+    for findings in FINDING_COUNTS:
+        detection, patient = _detection(findings)
+        samples: List[float] = []
+        # ReportService prints progress for every report
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(warmup + repeats):
+                run_samples: List[float] = []
+                with timed(run_samples):
+                    pdf = service.generate_detection_report(detection, patient, include_images=False)
+                if i >= warmup:
+                    samples.extend(run_samples)
+        
+        results[f"findings_{findings}"] = {**summarize(samples), "pdf_bytes": len(pdf)}
+    return results
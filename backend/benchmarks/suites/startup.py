@@ -0,0 +1,74 @@
+"""Cold start: a fresh interpreter importing app.main, and what it loads
+
+ML, image and PDF libraries should only be imported on first use; idle
+instances that never run a detection or build a report should not pay for
+them in start-up time or memory.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, Any, List
+from ..environment import BACKEND_DIR
+from ..stats import summarize
+
+# Libraries app.main must not import
+HEAVY_MODULES = ("torch", "ultralytics", "onnxruntime", "cv2", "matplotlib", "reportlab", "PIL")
+
+PROBE = """
+import json, sys
+from benchmarks import environment
+environment.prepare({workdir!r})
+import app.main
+import psutil
+print(json.dumps({{
+    "rss_mb": psutil.Process().memory_info().rss / (1024 * 1024),
+    "heavy_modules": sorted(name for name in {heavy!r} if name in sys.modules)
+}}))
+"""
+
+def _package_times(importtime_log: str) -> Dict[str, float]:
+    """Self import time per top-level package, in ms, from `python -X importtime` output"""
+    totals: Dict[str, float] = defaultdict(float)
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1000
+    return dict(totals)
+
+def probe(workdir: str) -> Dict[str, Any]:
+    """Import app.main in a new interpreter
+    
+    Returns:
+        Wall time of the whole process, its RSS after the import, the heavy
+        modules it loaded and the self import time per package
+    """
+    start_time = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(workdir=workdir, heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    wall_ms = (time.perf_counter() - start_time) * 1000
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {**result, "wall_ms": wall_ms, "package_ms": _package_times(completed.stderr)}
+
+def run(quick: bool = False, **options) -> Dict[str, Any]:
+    repeats = 3 if quick else 10
+    workdir = tempfile.mkdtemp(prefix="caries-startup-")
+    
+    # The first run also pays for writing bytecode and creating the database
+    probe(workdir)
+    probes: List[Dict[str, Any]] = [probe(workdir) for _ in range(repeats)]
+    
+    packages = probes[0]["package_ms"]
+    slowest = sorted(packages, key=packages.get, reverse=True)[:10]
+    return {
+        "cold_start": summarize([p["wall_ms"] for p in probes]),
+        "rss_mb": round(sorted(p["rss_mb"] for p in probes)[len(probes) // 2], 1),
+        "heavy_modules": probes[0]["heavy_modules"],
+        "slowest_packages_ms": {name: round(packages[name], 1) for name in slowest}
+    }
@@ -0,0 +1,67 @@
+"""Synthetic radiographs and a randomly initialized detector"""
+import os
+from typing import Dict, Tuple
+import cv2
+import numpy as np
+
+# (width, height) of the image types the API accepts
+IMAGE_SIZES: Dict[str, Tuple[int, int]] = {
+    "periapical": (640, 840),
+    "bitewing": (1280, 960),
+    "intraoral": (1600, 1200),
+    "panoramic": (2900, 1400)
+}
+
+CLASS_NAMES = {0: "enamel", 1: "dentin", 2: "pulp"}
+
+def make_radiograph(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """Grayscale BGR image with smooth background, bright tooth-like blobs and sensor noise"""
+    rng = np.random.default_rng(seed)
+    
+    # Soft tissue background: low-frequency noise
+    small = rng.normal(60, 25, (max(2, height // 32), max(2, width // 32))).astype(np.float32)
+    image = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    
+    # Teeth: bright ellipses in one or two rows, with darker lesions
+    rows = 2 if width > 2 * height else 1
+    teeth_per_row = max(2, width // max(1, height // 2))
+    for row in range(rows):
+        center_y = height * (row + 1) / (rows + 1)
+        for i in range(teeth_per_row):
+            center = (int(width * (i + 0.5) / teeth_per_row), int(center_y + rng.normal(0, height * 0.02)))
+            axes = (int(width / teeth_per_row * 0.4), int(height / (rows + 1) * 0.45))
+            cv2.ellipse(image, center, axes, rng.uniform(-10, 10), 0, 360, float(rng.uniform(170, 220)), -1)
+            if rng.random() < 0.3:
+                lesion = (center[0] + int(rng.normal(0, axes[0] / 3)), center[1] + int(rng.normal(0, axes[1] / 3)))
+                cv2.circle(image, lesion, max(3, axes[0] // 6), float(rng.uniform(80, 120)), -1)
+    
+    image = cv2.GaussianBlur(image, (0, 0), 2) + rng.normal(0, 6, image.shape).astype(np.float32)
+    gray = np.clip(image, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+def encode_jpeg(image: np.ndarray, quality: int = 90) -> bytes:
+    success, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not success:
+        raise ValueError("Could not encode synthetic radiograph")
+    return buffer.tobytes()
+
+def build_tiny_model(path: str, seed: int = 0) -> str:
+    """Save a randomly initialized YOLOv8n with the caries classes as an ultralytics checkpoint
+    
+    Same architecture and input pipeline as a trained model, so timings are
+    representative; the findings are meaningless. Reused if path exists.
+    """
+    if os.path.exists(path):
+        return path
+    
+    import torch
+    from ultralytics.nn.tasks import DetectionModel
+    
+    torch.manual_seed(seed)
+    model = DetectionModel("yolov8n.yaml", nc=len(CLASS_NAMES), verbose=False)
+    model.names = dict(CLASS_NAMES)
+    model.eval()
+    
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    torch.save({"model": model, "train_args": {"imgsz": 640}}, path)
+    return path
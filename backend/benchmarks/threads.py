@@ -0,0 +1,133 @@
+"""Thread-count sweep for the inference path
+
+Each combination of intra-op and OpenCV thread counts runs in a fresh
+process (torch fixes some pool sizes on first use): concurrent uploads go
+through decode, micro-batched inference, postprocessing, rendering and
+encoding, as in the API. The recommendation is the combination with the
+lowest p95 latency among those within 5% of the best throughput.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence
+from .environment import BACKEND_DIR
+from .stats import summarize
+from .synthetic import IMAGE_SIZES, encode_jpeg, make_radiograph
+
+THROUGHPUT_TOLERANCE = 0.05
+
+PROBE = """
+import json
+from benchmarks import environment
+environment.prepare({workdir!r})
+from benchmarks.threads import measure
+print(json.dumps(measure({concurrency}, {requests})))
+"""
+
+def default_thread_counts(cpus: Optional[int] = None) -> List[int]:
+    """1, 2, 4, ... up to the CPUs this process may use, plus that count itself"""
+    if cpus is None:
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    counts, count = [], 1
+    while count < cpus:
+        counts.append(count)
+        count *= 2
+    return counts + [cpus]
+
+def measure(concurrency: int, requests: int) -> Dict[str, Any]:
+    """Run requests uploads with concurrency in flight, in this process, with its thread settings"""
+    from app.core.config import settings
+    from app.ml import cpu
+    from app.ml.batch_scheduler import MicroBatchScheduler
+    from app.ml.model_loader import model_loader
+    from app.ml.postprocessor import ResultProcessor
+    from app.ml.predictor import CariesDetector
+    from app.ml.preprocessor import ImagePreprocessor
+    from app.ml.renderer import AnnotationRenderer
+    
+    cpu.configure_affinity()  # This process only runs inference, like the inference server
+    model_loader.load_model()
+    scheduler = MicroBatchScheduler(
+        CariesDetector(),
+        max_batch_size=settings.DETECTION_MAX_BATCH_SIZE,
+        max_wait_ms=settings.DETECTION_BATCH_WAIT_MS
+    )
+    postprocessor = ResultProcessor()
+    image_types = ("periapical", "bitewing")
+    uploads = [encode_jpeg(make_radiograph(*IMAGE_SIZES[image_types[i % 2]], seed=i)) for i in range(8)]
+    
+    def handle(data: bytes) -> float:
+        start_time = time.perf_counter()
+        image = ImagePreprocessor.decode(data)
+        detection_results = scheduler.submit(image)
+        detections = postprocessor.process_results(detection_results["results"], image.shape)
+        annotated = AnnotationRenderer.render(image, detections)
+        AnnotationRenderer.encode(annotated, settings.ANNOTATED_IMAGE_FORMAT, settings.ANNOTATED_IMAGE_QUALITY)
+        return (time.perf_counter() - start_time) * 1000
+    
+    # One untimed round so every thread has run each stage once
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(handle, uploads[:concurrency]))
+        start_time = time.perf_counter()
+        latencies = list(executor.map(handle, (uploads[i % len(uploads)] for i in range(requests))))
+        elapsed = time.perf_counter() - start_time
+    
+    return {
+        "latency": summarize(latencies),
+        "throughput_rps": round(requests / elapsed, 3),
+        "threads": cpu.get_stats()
+    }
+
+def probe(workdir: str, intra_op_threads: int, opencv_threads: int, concurrency: int, requests: int, affinity: str = "") -> Dict[str, Any]:
+    """measure() in a new interpreter with the given thread settings"""
+    env = dict(
+        os.environ,
+        INFERENCE_INTRA_OP_THREADS=str(intra_op_threads),
+        OPENCV_THREADS=str(opencv_threads),
+        INFERENCE_CPU_AFFINITY=affinity
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(workdir=workdir, concurrency=concurrency, requests=requests)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def recommend(configurations: List[Dict[str, Any]], tolerance: float = THROUGHPUT_TOLERANCE) -> Dict[str, Any]:
+    """Lowest p95 latency among the configurations within tolerance of the best throughput"""
+    best_throughput = max(c["throughput_rps"] for c in configurations)
+    candidates = [c for c in configurations if c["throughput_rps"] >= best_throughput * (1 - tolerance)]
+    return min(candidates, key=lambda c: (c["latency"]["p95_ms"], c["intra_op_threads"]))
+
+def sweep(
+    workdir: str,
+    concurrency: int = 4,
+    requests: int = 32,
+    intra_op_threads: Sequence[int] = (),
+    opencv_threads: Sequence[int] = (-1, 0, 1),
+    affinity: str = "",
+    progress=print
+) -> Dict[str, Any]:
+    configurations = []
+    for intra in intra_op_threads or default_thread_counts():
+        for opencv in opencv_threads:
+            result = probe(workdir, intra, opencv, concurrency, requests, affinity)
+            configurations.append({"intra_op_threads": intra, "opencv_threads": opencv, **result})
+            progress(
+                f"intra-op {intra}, OpenCV {opencv}: {result['latency']['p50_ms']:.0f} ms p50, "
+                f"{result['latency']['p95_ms']:.0f} ms p95, {result['throughput_rps']:.2f} requests/s"
+            )
+    
+    best = recommend(configurations)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "affinity": affinity or None,
+        "configurations": configurations,
+        "recommended": {
+            "INFERENCE_INTRA_OP_THREADS": best["intra_op_threads"],
+            "OPENCV_THREADS": best["opencv_threads"]
+        }
+    }
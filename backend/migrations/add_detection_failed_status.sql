@@ -0,0 +1,12 @@
+-- Background detection jobs can fail after their pending row was created
+
+DO $$
+BEGIN
+    -- database/init.sql names the type detection_status, SQLAlchemy's create_all detectionstatus
+    IF EXISTS (SELECT 1 FROM pg_type WHERE typname = 'detection_status') THEN
+        ALTER TYPE detection_status ADD VALUE IF NOT EXISTS 'failed';
+    END IF;
+    IF EXISTS (SELECT 1 FROM pg_type WHERE typname = 'detectionstatus') THEN
+        ALTER TYPE detectionstatus ADD VALUE IF NOT EXISTS 'failed';
+    END IF;
+END$$;
@@ -0,0 +1,5 @@
+-- Key used to reuse findings when the same image is uploaded again
+
+ALTER TABLE detections ADD COLUMN IF NOT EXISTS inference_key VARCHAR(255);
+
+CREATE INDEX IF NOT EXISTS idx_detections_inference_key ON detections(inference_key);
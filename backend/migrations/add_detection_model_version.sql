@@ -0,0 +1,5 @@
+-- Record which model version produced each detection
+
+ALTER TABLE detections ADD COLUMN IF NOT EXISTS model_version VARCHAR(100);
+
+CREATE INDEX IF NOT EXISTS idx_detections_model_version ON detections(model_version);
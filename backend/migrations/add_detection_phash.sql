@@ -0,0 +1,9 @@
+-- Perceptual hash of each upload, for near-duplicate lookups within a patient
+
+ALTER TABLE detections ADD COLUMN IF NOT EXISTS image_phash BIGINT;
+ALTER TABLE detections ADD COLUMN IF NOT EXISTS duplicate_of_id UUID REFERENCES detections(id);
+
+-- Lets the per-patient lookup read all hashes from the index alone
+CREATE INDEX IF NOT EXISTS idx_detections_patient_phash
+    ON detections(patient_id) INCLUDE (image_phash)
+    WHERE image_phash IS NOT NULL;
@@ -0,0 +1,6 @@
+-- Near-duplicate lookups only consider finished detections (pending and failed ones have no findings)
+
+DROP INDEX IF EXISTS idx_detections_patient_phash;
+CREATE INDEX IF NOT EXISTS idx_detections_patient_phash
+    ON detections(patient_id) INCLUDE (image_phash)
+    WHERE image_phash IS NOT NULL AND status IN ('completed', 'reviewed');
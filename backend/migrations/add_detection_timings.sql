@@ -0,0 +1,3 @@
+-- Milliseconds spent in each stage of a detection (upload, decode, inference, ...)
+
+ALTER TABLE detections ADD COLUMN IF NOT EXISTS timings JSONB;
@@ -0,0 +1,43 @@
+import threading
+import numpy as np
+from app.ml.batch_scheduler import MicroBatchScheduler
+
+class FakeDetector:
+    """Detector stand-in that echoes its inputs"""
+    def __init__(self):
+        self.batches = []
+    
+    def detect_batch(self, images):
+        self.batches.append(list(images))
+        return {
+            "results": [f"result-{int(image[0, 0, 0])}" for image in images],
+            "processing_time_ms": 100.0,
+            "model_version": "test"
+        }
+
+def test_concurrent_submissions_are_coalesced():
+    """Test that concurrent requests share one forward pass"""
+    detector = FakeDetector()
+    scheduler = MicroBatchScheduler(detector, max_batch_size=4, max_wait_ms=200)
+    
+    outputs = {}
+    
+    def submit(i):
+        outputs[i] = scheduler.submit(np.full((8, 8, 3), i, dtype=np.uint8))
+    
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(detector.batches) == 1
+    for i, output in outputs.items():
+        assert output["results"] == [f"result-{i}"]
+        assert output["batch_size"] == 4
+        assert output["processing_time_ms"] == 25.0
+    
+    stats = scheduler.get_stats()
+    assert stats["total_batches"] == 1
+    assert stats["total_requests"] == 4
+    assert stats["batch_size_counts"] == {"4": 1}
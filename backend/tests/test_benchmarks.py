@@ -0,0 +1,59 @@
+from benchmarks.reporting import compare, flatten
+from benchmarks.stats import summarize
+
+def _report(results):
+    return {"results": results}
+
+def test_summarize():
+    """Test percentiles and the empty case"""
+    summary = summarize([10.0, 20.0, 30.0, 40.0])
+    
+    assert summary["count"] == 4
+    assert summary["p50_ms"] == 25.0
+    assert summary["min_ms"] == 10.0 and summary["max_ms"] == 40.0
+    assert summarize([]) == {"count": 0}
+
+def test_flatten_keeps_compared_metrics():
+    """Test that only latency percentiles and throughput are compared"""
+    flat = flatten({"api": {"list": {"throughput_rps": 100.0, "errors": 0, "latency": {"p50_ms": 5.0, "count": 10}}}})
+    
+    assert flat == {"api/list/throughput_rps": 100.0, "api/list/latency/p50_ms": 5.0}
+
+def test_compare_flags_regressions():
+    """Test that slower latency and lower throughput beyond the threshold count as regressions"""
+    base = _report({"api": {"list": {"throughput_rps": 100.0, "latency": {"p50_ms": 10.0, "p95_ms": 20.0}}}})
+    head = _report({"api": {"list": {"throughput_rps": 80.0, "latency": {"p50_ms": 10.5, "p95_ms": 30.0}}}})
+    
+    rows, regressions = compare(base, head, threshold=0.1)
+    
+    assert len(rows) == 3
+    assert sorted(regressions) == ["api/list/latency/p95_ms", "api/list/throughput_rps"]
+
+def test_compare_ignores_new_metrics():
+    """Test that metrics missing from the base run are not compared"""
+    base = _report({"pipeline": {"total": {"p50_ms": 10.0}}})
+    head = _report({"pipeline": {"total": {"p50_ms": 9.0}}, "report": {"findings_0": {"p50_ms": 50.0}}})
+    
+    rows, regressions = compare(base, head)
+    
+    assert [row["metric"] for row in rows] == ["pipeline/total/p50_ms"]
+    assert regressions == []
+
+def test_default_thread_counts():
+    """Test that the sweep doubles thread counts up to the CPU count"""
+    from benchmarks.threads import default_thread_counts
+    
+    assert default_thread_counts(1) == [1]
+    assert default_thread_counts(6) == [1, 2, 4, 6]
+    assert default_thread_counts(8) == [1, 2, 4, 8]
+
+def test_recommend_prefers_tail_latency_within_throughput_tolerance():
+    """Test that the recommendation trades a little throughput for a lower p95"""
+    from benchmarks.threads import recommend
+    
+    def case(intra, p95, throughput):
+        return {"intra_op_threads": intra, "opencv_threads": 1, "latency": {"p95_ms": p95}, "throughput_rps": throughput}
+    
+    configurations = [case(1, 400.0, 9.7), case(2, 300.0, 9.6), case(4, 250.0, 8.0), case(8, 500.0, 10.0)]
+    
+    assert recommend(configurations)["intra_op_threads"] == 2
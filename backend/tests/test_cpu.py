@@ -0,0 +1,66 @@
+import os
+import threading
+import pytest
+from app.core.config import settings
+from app.ml import cpu
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(cpu, "_applied", {})
+
+def test_inference_cpus(monkeypatch):
+    """Test that the affinity setting accepts ranges and lists"""
+    monkeypatch.setattr(settings, "INFERENCE_CPU_AFFINITY", "0-2,5")
+    assert cpu.inference_cpus() == [0, 1, 2, 5]
+    
+    monkeypatch.setattr(settings, "INFERENCE_CPU_AFFINITY", "")
+    assert cpu.inference_cpus() == []
+
+def test_intra_op_threads_follow_affinity(monkeypatch):
+    """Test that pinned processes default to one intra-op thread per CPU"""
+    monkeypatch.setattr(settings, "INFERENCE_CPU_AFFINITY", "0-3")
+    monkeypatch.setattr(settings, "INFERENCE_INTRA_OP_THREADS", 0)
+    assert cpu.intra_op_threads() == 4
+    
+    monkeypatch.setattr(settings, "INFERENCE_INTRA_OP_THREADS", 2)
+    assert cpu.intra_op_threads() == 2
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="Linux only")
+def test_pin_process_covers_existing_threads():
+    """Test that threads started before pinning are pinned too"""
+    cpus = sorted(os.sched_getaffinity(0))
+    pinned = cpus[:1]
+    started, release = threading.Event(), threading.Event()
+    seen = []
+    
+    def existing_thread():
+        started.set()
+        release.wait()
+        seen.append(sorted(os.sched_getaffinity(0)))
+    
+    thread = threading.Thread(target=existing_thread)
+    thread.start()
+    started.wait()
+    try:
+        cpu.pin_process(pinned)
+        release.set()
+        thread.join()
+        assert seen == [pinned]
+        assert sorted(os.sched_getaffinity(0)) == pinned
+    finally:
+        cpu.pin_process(cpus)
+
+def test_configure_opencv_once_per_process(monkeypatch):
+    """Test that OPENCV_THREADS is applied on first use and left alone afterwards"""
+    cv2 = pytest.importorskip("cv2")
+    original = cv2.getNumThreads()
+    monkeypatch.setattr(settings, "OPENCV_THREADS", 1)
+    try:
+        cpu.configure_opencv()
+        assert cv2.getNumThreads() == 1
+        
+        cv2.setNumThreads(original)
+        cpu.configure_opencv()
+        assert cv2.getNumThreads() == original
+    finally:
+        cv2.setNumThreads(original)
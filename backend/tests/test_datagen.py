@@ -0,0 +1,63 @@
+import csv
+import io
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy.dialects.postgresql import psycopg2
+from benchmarks.datagen import DEFAULT_VOLUMES, CopyWriter, generate_chunk, generate_dentists
+from app.models import CariesFinding, User
+
+END = datetime(2026, 1, 1, tzinfo=timezone.utc)
+VOLUMES = {**DEFAULT_VOLUMES, "detections_per_patient": 3, "findings_per_detection": 2}
+
+class FakeCursor:
+    def __init__(self, copies):
+        self.copies = copies
+    
+    def copy_expert(self, sql, buffer):
+        self.copies.append((sql, buffer.read()))
+    
+    def close(self):
+        pass
+
+class FakeConnection:
+    """Just enough of a SQLAlchemy connection on PostgreSQL for CopyWriter"""
+    dialect = psycopg2.dialect()
+    
+    def __init__(self):
+        self.copies = []
+        self.connection = self
+    
+    def cursor(self):
+        return FakeCursor(self.copies)
+
+def _chunk(seed: int):
+    dentists = generate_dentists(np.random.default_rng([seed, 0]), 2, "hash", seed, END)
+    return generate_chunk(np.random.default_rng([seed, 1]), 0, 20, [row[0] for row in dentists], "hash", VOLUMES, seed, END)
+
+def test_chunks_are_reproducible():
+    """Test that the same seed gives the same rows and another seed different ones"""
+    assert _chunk(0) == _chunk(0)
+    assert _chunk(0) != _chunk(1)
+
+def test_chunk_references_are_consistent():
+    """Test that findings point at generated detections and detections at generated patients"""
+    tables = {name: rows for name, columns, rows in _chunk(0)}
+    
+    patient_ids = {row[0] for row in tables["patients"]}
+    detection_ids = {row[0] for row in tables["detections"]}
+    assert {row[2] for row in tables["detections"]} <= patient_ids
+    assert {row[1] for row in tables["caries_findings"]} <= detection_ids
+    assert sum(row[10] for row in tables["detections"]) == len(tables["caries_findings"])
+
+def test_copy_writer_serializes_like_the_column_types():
+    """Test enum names, JSON and NULLs in the CSV sent to COPY"""
+    connection = FakeConnection()
+    writer = CopyWriter(connection)
+    
+    writer.write(User.__table__, ("email", "role", "is_active", "created_at"), [("a@example.com", "PATIENT", True, None)])
+    writer.write(CariesFinding.__table__, ("tooth_number", "severity", "bounding_box"), [(14, "mild", {"x": 1.0})])
+    
+    (user_sql, user_csv), (finding_sql, finding_csv) = connection.copies
+    assert user_sql == "COPY users (email, role, is_active, created_at) FROM STDIN WITH (FORMAT csv)"
+    assert user_csv == "a@example.com,PATIENT,True,\r\n"
+    assert next(csv.reader(io.StringIO(finding_csv))) == ["14", "mild", '{"x": 1.0}']
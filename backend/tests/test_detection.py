@@ -1,8 +1,9 @@
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 from io import BytesIO
-from PIL import Image
+from PIL import Image, ImageFilter
 
 client = TestClient(app)
 
@@ -46,11 +47,22 @@ def patient_id(auth_token):
     )
     return response.json()["id"]
 
-def create_test_image():
-    """Create a test image"""
-    img = Image.new('RGB', (640, 640), color='white')
+def create_test_image(blank: bool = False, quality: int = 75):
+    """Create a test image; smooth structure plus grain so it passes the quality gate unless blank
+    
+    Other JPEG qualities give near-duplicates: different bytes, same perceptual hash.
+    """
+    if blank:
+        img = Image.new('RGB', (640, 640), color='white')
+    else:
+        rng = np.random.default_rng(0)
+        structure = Image.fromarray(rng.integers(0, 256, (640, 640), dtype=np.uint8)).filter(ImageFilter.GaussianBlur(24))
+        structure = np.asarray(structure, dtype=np.float32)
+        structure = (structure - structure.min()) / max(1, np.ptp(structure)) * 190
+        grain = rng.integers(0, 60, (640, 640))
+        img = Image.fromarray((structure + grain).astype(np.uint8)).convert('RGB')
     img_byte_arr = BytesIO()
-    img.save(img_byte_arr, format='JPEG')
+    img.save(img_byte_arr, format='JPEG', quality=quality)
     img_byte_arr.seek(0)
     return img_byte_arr
 
@@ -71,4 +83,128 @@ def test_create_detection(auth_token, patient_id):
     
     # Note: This might fail without actual model file
     # In production, ensure model is available
-    assert response.status_code in [201, 500]  # 500 if model not found
\ No newline at end of file
+    assert response.status_code in [201, 500]  # 500 if model not found
+
+def test_create_batch_detection(auth_token, patient_id):
+    """Test creating detections for a series of images"""
+    files = [
+        ("files", (f"test_{i}.jpg", create_test_image(), "image/jpeg"))
+        for i in range(4)
+    ]
+    
+    response = client.post(
+        "/api/v1/detections/batch",
+        files=files,
+        data={
+            "patient_id": patient_id,
+            "image_type": "bitewing"
+        },
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    
+    assert response.status_code in [201, 500]  # 500 if model not found
+    if response.status_code == 201:
+        assert len(response.json()) == 4
+
+def cache_hits(auth_token):
+    stats = client.get("/api/v1/detections/cache/stats", headers={"Authorization": f"Bearer {auth_token}"}).json()
+    return stats["memory_hits"] + stats["db_hits"] if stats["enabled"] else None
+
+def without_ids(findings):
+    return [{key: value for key, value in finding.items() if key != "id"} for finding in findings]
+
+def test_reupload_reuses_findings(auth_token, patient_id):
+    """Test that uploading the same image again creates a new detection with the same findings"""
+    def upload():
+        return client.post(
+            "/api/v1/detections/",
+            files={"file": ("test.jpg", create_test_image(), "image/jpeg")},
+            data={"patient_id": patient_id, "image_type": "intraoral"},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+    
+    first = upload()
+    hits_before = cache_hits(auth_token)
+    second = upload()
+    
+    assert first.status_code in [201, 500]  # 500 if model not found
+    if first.status_code == 201:
+        assert second.status_code == 201
+        first, second = first.json(), second.json()
+        assert first["id"] != second["id"]
+        assert without_ids(second["caries_findings"]) == without_ids(first["caries_findings"])
+        assert second["annotated_image_path"] == first["annotated_image_path"]
+        assert second["annotated_image_url"] == first["annotated_image_url"]
+        if hits_before is not None:
+            assert cache_hits(auth_token) == hits_before + 1
+
+def test_create_detection_async_job(auth_token, patient_id):
+    """Test that an async detection returns 202 and can be followed to completion"""
+    response = client.post(
+        "/api/v1/detections/",
+        files={"file": ("test.jpg", create_test_image(), "image/jpeg")},
+        data={"patient_id": patient_id, "image_type": "intraoral", "async_job": "true"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "pending"
+    
+    # TestClient runs background tasks before returning, so the job has finished
+    status_response = client.get(job["status_url"], headers={"Authorization": f"Bearer {auth_token}"})
+    assert status_response.status_code == 200
+    assert status_response.json()["stage"] in ["done", "failed"]  # failed if model not found
+    
+    events = client.get(job["events_url"], headers={"Authorization": f"Bearer {auth_token}"})
+    assert events.headers["content-type"].startswith("text/event-stream")
+    assert "event: queued" in events.text
+
+def test_unfinished_detection_is_not_reused(auth_token, patient_id):
+    """Test that a near-duplicate of a pending or failed detection is analyzed instead of reusing its empty findings"""
+    job = client.post(
+        "/api/v1/detections/",
+        files={"file": ("test.jpg", create_test_image(), "image/jpeg")},
+        data={"patient_id": patient_id, "image_type": "intraoral", "async_job": "true"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    ).json()
+    stage = client.get(job["status_url"], headers={"Authorization": f"Bearer {auth_token}"}).json()["stage"]
+    
+    # Same radiograph, re-encoded
+    response = client.post(
+        "/api/v1/detections/",
+        files={"file": ("test.jpg", create_test_image(quality=60), "image/jpeg")},
+        data={"patient_id": patient_id, "image_type": "intraoral", "reuse_duplicate": "true"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    
+    if stage == "failed":
+        # The failed job has no findings; inference runs (and fails the same way) instead of reporting none
+        assert response.status_code == 500
+    else:
+        assert response.status_code == 201
+        assert response.json()["duplicate_of_id"] == job["id"]
+
+def test_unusable_image_asks_for_retake(auth_token, patient_id):
+    """Test that a blank capture is turned away before inference unless the gate is skipped"""
+    response = client.post(
+        "/api/v1/detections/",
+        files={"file": ("blank.jpg", create_test_image(blank=True), "image/jpeg")},
+        data={"patient_id": patient_id, "image_type": "intraoral"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert detail["retake"] is True
+    assert detail["images"][0]["filename"] == "blank.jpg"
+    assert [issue["check"] for issue in detail["images"][0]["issues"]] == ["blank"]
+    
+    response = client.post(
+        "/api/v1/detections/",
+        files={"file": ("blank.jpg", create_test_image(blank=True), "image/jpeg")},
+        data={"patient_id": patient_id, "image_type": "intraoral", "check_quality": "false"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    
+    assert response.status_code in [201, 500]  # 500 if model not found
@@ -0,0 +1,30 @@
+from app.services.detection_jobs import DetectionJobTracker
+
+def test_stage_history_is_recorded():
+    """Test that stage transitions are kept in order"""
+    tracker = DetectionJobTracker()
+    for stage in ["queued", "preprocessing", "inference", "uploading", "done"]:
+        tracker.update("job-1", stage)
+    
+    job = tracker.get("job-1")
+    
+    assert job["stage"] == "done"
+    assert [entry["stage"] for entry in job["history"]] == ["queued", "preprocessing", "inference", "uploading", "done"]
+    assert tracker.get("unknown") is None
+
+def test_failure_keeps_error():
+    """Test that a failed job reports its error"""
+    tracker = DetectionJobTracker()
+    tracker.update("job-1", "inference")
+    tracker.update("job-1", "failed", error="model not found")
+    
+    assert tracker.get("job-1")["error"] == "model not found"
+
+def test_oldest_jobs_are_dropped():
+    """Test that the tracker stays bounded"""
+    tracker = DetectionJobTracker(max_jobs=2)
+    for job_id in ["a", "b", "c"]:
+        tracker.update(job_id, "queued")
+    
+    assert tracker.get("a") is None
+    assert tracker.get("c") is not None
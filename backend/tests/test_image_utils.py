@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+from app.utils.image_utils import perceptual_hash, hamming_distances
+
+def make_radiograph(seed: int) -> np.ndarray:
+    """Smooth grayscale noise, standing in for a radiograph"""
+    noise = np.random.default_rng(seed).integers(0, 255, (750, 1500), dtype=np.uint8)
+    image = cv2.normalize(cv2.GaussianBlur(noise, (0, 0), 15), None, 0, 255, cv2.NORM_MINMAX)
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+def encode(image: np.ndarray, extension: str = ".jpg", quality: int = 95) -> bytes:
+    return cv2.imencode(extension, image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+def test_near_duplicates_hash_close():
+    """Test that re-exported, re-compressed and cropped copies stay within a few bits"""
+    image = make_radiograph(0)
+    original = perceptual_hash(encode(image))
+    
+    copies = [
+        encode(image, ".png"),
+        encode(image, quality=50),
+        encode(image[15:-15, 30:-30]),
+        encode(cv2.resize(image, (750, 375)))
+    ]
+    distances = hamming_distances(original, np.array([perceptual_hash(c) for c in copies]))
+    
+    assert distances.max() <= 8
+
+def test_different_images_hash_apart():
+    """Test that unrelated images are far apart"""
+    hashes = np.array([perceptual_hash(encode(make_radiograph(seed))) for seed in range(1, 6)])
+    
+    assert hamming_distances(perceptual_hash(encode(make_radiograph(0))), hashes).min() > 16
+
+def test_hamming_distance_uses_all_64_bits():
+    """Test distances including the sign bit of the signed 64-bit representation"""
+    distances = hamming_distances(0, np.array([0, 1, -1, -(2 ** 63)], dtype=np.int64))
+    
+    assert distances.tolist() == [0, 1, 64, 1]
@@ -0,0 +1,37 @@
+from app.core.config import settings
+from app.services.inference_cache import InferenceCache
+
+def test_key_depends_on_model_and_thresholds(monkeypatch):
+    """Test that a new model version or threshold never reuses old findings"""
+    key = InferenceCache.make_key("abc", "v1")
+    
+    assert InferenceCache.make_key("abc", "v2") != key
+    assert InferenceCache.make_key("abc", "v1", tiled=True) != key
+    
+    monkeypatch.setattr(settings, "CONFIDENCE_THRESHOLD", 0.5)
+    assert InferenceCache.make_key("abc", "v1") != key
+
+def test_key_depends_on_weights_and_backend(monkeypatch):
+    """Test that weights retrained under the same version name, or another backend, never reuse old findings"""
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "ultralytics")
+    key = InferenceCache.make_key("abc", "best", weights_hash="1111")
+    
+    assert InferenceCache.make_key("abc", "best", weights_hash="2222") != key
+    
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "onnx_int8")
+    assert InferenceCache.make_key("abc", "best", weights_hash="1111") != key
+
+def test_memory_level_is_lru():
+    """Test that the least recently used entry is evicted first"""
+    cache = InferenceCache(max_entries=2)
+    cache.put("a", [{"severity": "mild"}])
+    cache.put("b", [])
+    
+    # Memory hits never touch the database
+    assert cache.get(None, "a")["detections"] == [{"severity": "mild"}]
+    cache.put("c", [])
+    
+    assert cache.get(None, "a") is not None
+    assert cache.get(None, "c") is not None
+    assert "b" not in cache._entries
+    assert cache.get_stats()["memory_hits"] == 3
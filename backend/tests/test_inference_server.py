@@ -0,0 +1,104 @@
+import os
+import threading
+import cv2
+import numpy as np
+import pytest
+from app.ml import inference_server
+from app.ml.inference_server import InferenceServer, InferenceServerClient, SharedImageRing, server_authkey
+from app.ml.onnx_backend import OnnxResults
+
+KEY = server_authkey("test-secret")
+
+class FakeDetector:
+    """Finds one box in every image and remembers what it was given"""
+    
+    def __init__(self):
+        self.images = []
+    
+    def detect(self, image):
+        self.images.append(image.copy())
+        boxes = np.array([[10.0, 20.0, 60.0, 80.0, 0.9, 1.0]])
+        return {"results": [OnnxResults("image", image, boxes, {0: "enamel", 1: "dentin", 2: "pulp"})], "processing_time_ms": 1.0, "model_version": "fake"}
+
+@pytest.fixture
+def server(tmp_path):
+    server = InferenceServer(str(tmp_path / "inference.sock"), KEY, detector=FakeDetector())
+    server.scheduler = None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _image(height=120, width=160):
+    return np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+def _png(image):
+    return cv2.imencode(".png", image)[1].tobytes()
+
+def test_ring_slots_are_reused():
+    """Test that pixels land in the slot and the slot is free again afterwards"""
+    ring = SharedImageRing(slots=1, slot_bytes=64 * 64 * 3)
+    image = _image(64, 64)
+    try:
+        for _ in range(2):
+            with ring.slot(image) as offset:
+                stored = np.ndarray(image.shape, dtype=image.dtype, buffer=ring.memory.buf, offset=offset)
+                assert np.array_equal(stored, image)
+                del stored
+        assert ring.fits(image) and not ring.fits(_image(65, 64))
+    finally:
+        ring.close()
+
+@pytest.mark.parametrize("slot_mb", [1, 0.01])
+def test_detect_through_server(server, slot_mb):
+    """Test a detection round trip, through shared memory and (for images larger than a slot) the socket"""
+    client = InferenceServerClient(server.address, KEY, slots=2, slot_mb=slot_mb, autostart=False, connect_timeout=5)
+    image = _image()
+    try:
+        output = client.detect("upload.png", _png(image))
+        
+        assert np.array_equal(server.detector.images[-1], image)
+        assert output["model_version"] == "fake"
+        assert output["detections"].caries_type.tolist() == ["dentin"]
+        assert output["annotated"] is not None
+        assert {"decode", "inference", "postprocess", "render"} <= set(output["timings"])
+        
+        stats = client.get_stats()
+        assert stats["completed"] == 1
+        assert stats["shared_memory_requests"] == (1 if slot_mb == 1 else 0)
+        assert stats["server"]["requests"] == 1
+    finally:
+        client.shutdown()
+    assert server.get_stats()["shared_memory_segments"] == 0
+
+def test_server_not_running(tmp_path):
+    """Test that a missing server is reported when autostart is off"""
+    client = InferenceServerClient(str(tmp_path / "missing.sock"), KEY, autostart=False, connect_timeout=0.2)
+    try:
+        with pytest.raises(RuntimeError, match="not running"):
+            client.detect("upload.png", _png(_image()))
+        assert client.get_stats()["server"] is None
+    finally:
+        client.shutdown()
+
+@pytest.mark.parametrize("launcher_pid", [None, 4321])
+def test_server_watches_the_launcher(monkeypatch, launcher_pid):
+    """Test that a server started from a launcher worker exits with the launcher rather than that worker"""
+    commands = []
+    
+    class FakePopen:
+        def __init__(self, command, **kwargs):
+            commands.append(command)
+        
+        def wait(self):
+            pass
+    
+    monkeypatch.setattr(inference_server.subprocess, "Popen", FakePopen)
+    if launcher_pid is None:
+        monkeypatch.delenv(inference_server.LAUNCHER_PID_ENV, raising=False)
+    else:
+        monkeypatch.setenv(inference_server.LAUNCHER_PID_ENV, str(launcher_pid))
+    
+    inference_server.start_server("inference.sock")
+    
+    command = commands[0]
+    assert command[command.index("--watch-pid") + 1] == str(launcher_pid or os.getpid())
+
@@ -0,0 +1,74 @@
+import os
+import signal
+import pytest
+from app import launcher
+from app.launcher import Launcher, format_memory_report, memory_report
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="The launcher forks its workers")
+
+def test_memory_report_of_a_forked_child():
+    """Test that a forked child shares most of its memory with its parent"""
+    data = bytearray(32 * 1024 * 1024)
+    for i in range(0, len(data), 4096):
+        data[i] = 1  # Touch every page so it is resident before forking
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write_fd, b".")
+        signal.pause()
+        os._exit(0)
+    
+    try:
+        os.read(read_fd, 1)
+        rows = memory_report({os.getpid(): "parent", pid: "child", 2 ** 22 + 1: "exited"})
+    finally:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        os.close(read_fd)
+        os.close(write_fd)
+    
+    assert [row["process"] for row in rows] == ["parent", "child"]
+    child = rows[1]
+    assert child["uss_mb"] < child["rss_mb"]
+    assert child["shared_mb"] >= 32
+    assert child["pss_mb"] < child["rss_mb"]
+
+def test_format_memory_report_totals():
+    """Test that the report sums PSS across processes"""
+    rows = [
+        {"process": "launcher", "pid": 1, "rss_mb": 500.0, "pss_mb": 300.0, "uss_mb": 100.0, "shared_mb": 400.0},
+        {"process": "worker-0", "pid": 2, "rss_mb": 450.0, "pss_mb": 210.5, "uss_mb": 20.0, "shared_mb": 430.0}
+    ]
+    
+    report = format_memory_report(rows)
+    
+    assert "worker-0" in report
+    assert report.splitlines()[-1] == "Total PSS 510.5 MB (sum of RSS 950.0 MB)"
+
+def test_crashed_worker_is_restarted(monkeypatch):
+    """Test that a worker exiting is replaced, and that SIGTERM stops the launcher and its workers"""
+    monkeypatch.setattr(launcher, "RESPAWN_DELAY_SECONDS", 0)
+    read_fd, write_fd = os.pipe()
+    marker = f"/tmp/caries-launcher-test-{os.getpid()}"
+    
+    def target(index):
+        os.write(write_fd, b".")
+        if not os.path.exists(marker):
+            open(marker, "w").close()
+            raise RuntimeError("first start fails")
+        os.kill(os.getppid(), signal.SIGTERM)
+        signal.pause()
+    
+    handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1)}
+    try:
+        Launcher(1, target).run()
+        starts = os.read(read_fd, 16)
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+        os.close(read_fd)
+        os.close(write_fd)
+        if os.path.exists(marker):
+            os.remove(marker)
+    
+    assert starts == b".."
@@ -0,0 +1,33 @@
+import linecache
+from benchmarks.memory import AllocationTracer, check_budgets, growth_per_iteration_kb
+
+def test_growth_ignores_warm_up():
+    """Test that early growth that levels off is not reported as a leak"""
+    warming = [100.0, 110.0, 118.0, 120.0] + [120.0] * 4
+    leaking = [100.0 + i * 0.5 for i in range(8)]
+    
+    assert growth_per_iteration_kb(warming) == 0.0
+    assert growth_per_iteration_kb(leaking) == 512.0
+    assert growth_per_iteration_kb([100.0]) == 0.0
+
+def test_tracer_points_at_leaking_site():
+    """Test that the leak report names the line that keeps the allocations"""
+    leaked = []
+    
+    with AllocationTracer() as tracer:
+        for _ in range(50):
+            leaked.append(bytearray(64 * 1024))
+    
+    top = tracer.top_growth(limit=1)[0]
+    assert top["size_kb"] >= 50 * 64
+    filename, lineno = top["site"][0].rsplit(":", 1)
+    assert filename.endswith("test_memory_guard.py")
+    assert "bytearray" in linecache.getline(__file__, int(lineno))
+
+def test_check_budgets():
+    """Test peak and growth budgets"""
+    assert check_budgets({"peak_rss_mb": 400.0, "growth_kb_per_iteration": 10.0}) == []
+    
+    violations = check_budgets({"peak_rss_mb": 600.0, "growth_kb_per_iteration": 200.0}, budget_mb=512, max_growth_kb=64)
+    assert len(violations) == 2
+    assert "600 MB" in violations[0]
@@ -0,0 +1,67 @@
+import pytest
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.testclient import TestClient
+from app.core import metrics
+
+def test_route_template_collapses_ids():
+    """Test that requests are labelled with the route path, not the concrete URL"""
+    router = APIRouter()
+    templates = []
+    
+    @router.get("/detections/{detection_id}/findings/{finding_id}")
+    async def get_finding(detection_id: str, finding_id: str):
+        return {}
+    
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    
+    @app.middleware("http")
+    async def record_template(request: Request, call_next):
+        response = await call_next(request)
+        templates.append(metrics.route_template(request))
+        return response
+    
+    client = TestClient(app)
+    client.get("/api/v1/detections/7/findings/7")
+    client.get("/api/v1/detections/7/findings/8")
+    client.get("/no/such/route")
+    
+    assert templates == [
+        "/api/v1/detections/{detection_id}/findings/{finding_id}",
+        "/api/v1/detections/{detection_id}/findings/{finding_id}",
+        "unmatched"
+    ]
+
+def test_scrape_needs_the_metrics_token(monkeypatch):
+    """Test that /metrics is only served to a scraper presenting METRICS_TOKEN"""
+    monkeypatch.setattr(metrics.settings, "METRICS_TOKEN", "")
+    assert not metrics.scrape_authorized("Bearer ")
+    
+    monkeypatch.setattr(metrics.settings, "METRICS_TOKEN", "s3cret")
+    assert metrics.scrape_authorized("Bearer s3cret")
+    assert not metrics.scrape_authorized("Bearer wrong")
+    assert not metrics.scrape_authorized(None)
+
+def test_track_upstream_counts_errors():
+    """Test that exceptions are counted as upstream errors and timed"""
+    def sample(name):
+        return metrics.REGISTRY.get_sample_value(name, {"service": "test", "operation": "fail"}) or 0.0
+    
+    errors_before = sample("upstream_errors_total")
+    calls_before = sample("upstream_request_duration_seconds_count")
+    
+    with pytest.raises(RuntimeError):
+        with metrics.track_upstream("test", "fail"):
+            raise RuntimeError("timeout")
+    
+    assert sample("upstream_errors_total") == errors_before + 1
+    assert sample("upstream_request_duration_seconds_count") == calls_before + 1
+
+def test_render_metrics_text_format():
+    """Test that the exposition includes the inference histograms"""
+    metrics.INFERENCE_SECONDS.labels("single").observe(0.12)
+    
+    content, content_type = metrics.render_metrics()
+    
+    assert content_type.startswith("text/plain")
+    assert b'inference_duration_seconds_bucket{le="0.25",mode="single"}' in content
@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+import time
+import pytest
+from app.core.config import settings
+from app.ml import cpu
+from app.ml.model_loader import ModelLoader, model_loader, parse_warmup_shapes, resolve_model_path
+
+@pytest.fixture
+def fake_loader(monkeypatch, tmp_path):
+    """Model loader whose backend load is a slow fake, with the default version's weights under tmp_path"""
+    calls = []
+    weights = tmp_path / "best.pt"
+    weights.write_bytes(b"weights")
+    
+    def fake_load(model_path):
+        calls.append(model_path)
+        time.sleep(0.05)
+        return object()
+    
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "ultralytics")
+    monkeypatch.setattr(settings, "MODEL_WARMUP_ENABLED", False)
+    monkeypatch.setattr(ModelLoader, "_load_ultralytics_model", staticmethod(fake_load))
+    monkeypatch.setattr(model_loader, "_models", {})
+    monkeypatch.setattr(model_loader, "_paths", {model_loader.default_version: str(weights)})
+    monkeypatch.setattr(model_loader, "_loaded_hashes", {})
+    monkeypatch.setattr(model_loader, "_file_hashes", {})
+    monkeypatch.setattr(model_loader, "_refcounts", {})
+    monkeypatch.setattr(model_loader, "_retired", set())
+    monkeypatch.setattr(model_loader, "_default_version", model_loader.default_version)
+    monkeypatch.setattr(model_loader, "_load_count", 0)
+    monkeypatch.setattr(model_loader, "_unload_count", 0)
+    monkeypatch.setattr(model_loader, "_last_warmup", None)
+    monkeypatch.setattr(settings, "MODEL_REGISTRY_FILE", str(tmp_path / "registry.json"))
+    monkeypatch.setattr(model_loader, "_registry_stamp", None)
+    monkeypatch.setattr(model_loader, "_unload_generation", None)
+    monkeypatch.setattr(model_loader, "_preloaded", set())
+    return calls
+
+def test_concurrent_first_requests_load_once(fake_loader):
+    """Test that racing first requests share a single load"""
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(model_loader.get_model())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(fake_loader) == 1
+    assert len({id(model) for model in models}) == 1
+
+def test_unload_and_reload(fake_loader):
+    """Test that an unloaded model is reloaded on demand"""
+    first = model_loader.get_model()
+    
+    assert model_loader.unload_model(reason="test") is True
+    assert model_loader.unload_model(reason="test") is False
+    
+    second = model_loader.get_model()
+    stats = model_loader.get_stats()
+    
+    assert first is not second
+    assert stats["load_count"] == 2
+    assert stats["unload_count"] == 1
+    assert stats["last_unload_reason"] == "test"
+    assert stats["loaded"] is True
+
+def test_preloaded_model_is_not_evicted_in_launcher_workers(fake_loader, monkeypatch):
+    """Test that a worker keeps the model it shares with the launcher but evicts ones it loaded itself"""
+    monkeypatch.setattr(settings, "MODEL_IDLE_TTL_MINUTES", 0.001)
+    monkeypatch.setattr(model_loader, "_start_watchdog", lambda: None)
+    model_loader.get_model()
+    model_loader.after_fork()
+    model_loader._last_used[model_loader.default_version] = time.monotonic() - 60
+    
+    model_loader._evict_unused()
+    assert model_loader.get_stats()["loaded"] is True
+    
+    # Loaded again after an unload, the copy is the worker's own
+    model_loader.unload_model(reason="test")
+    model_loader.get_model()
+    model_loader._last_used[model_loader.default_version] = time.monotonic() - 60
+    
+    model_loader._evict_unused()
+    assert model_loader.get_stats()["last_unload_reason"] == "idle"
+
+def test_hot_swap_waits_for_in_flight_inference(fake_loader, tmp_path):
+    """Test that the old default is released only after in-flight inferences finish"""
+    original = model_loader.default_version
+    (tmp_path / "candidate.pt").write_bytes(b"candidate")
+    model_loader.register_version("candidate", str(tmp_path / "candidate.pt"))
+    
+    with model_loader.acquire() as (version, model):
+        assert version == original
+        
+        assert model_loader.set_default_version("candidate") == original
+        assert model_loader.default_version == "candidate"
+        
+        # Still held by the running inference
+        assert original in model_loader._models
+    
+    assert original not in model_loader._models
+    assert "candidate" in model_loader._models
+    
+    with model_loader.acquire() as (version, _):
+        assert version == "candidate"
+
+def test_unknown_version_is_rejected(fake_loader):
+    """Test that switching to an unregistered version fails"""
+    with pytest.raises(ValueError):
+        model_loader.set_default_version("does-not-exist")
+
+def test_weights_hash_follows_the_served_weights(fake_loader):
+    """Test that a loaded version keeps the hash it was loaded with until weights replaced in place are reloaded"""
+    path = model_loader.get_version_path()
+    model_loader.get_model()
+    loaded_hash = model_loader.weights_hash()
+    
+    with open(path, "wb") as f:
+        f.write(b"retrained weights")
+    
+    assert model_loader.weights_hash() == loaded_hash
+    assert model_loader.get_stats()["versions"][0]["weights_hash"] == loaded_hash
+    
+    model_loader.unload_model(reason="test")
+    
+    assert model_loader.weights_hash() != loaded_hash
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="Linux only")
+def test_model_load_leaves_the_api_process_unpinned(fake_loader, monkeypatch):
+    """Test that INFERENCE_CPU_AFFINITY does not pin the process loading the model (an API worker)"""
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < 2:
+        pytest.skip("Needs two CPUs to tell a pinned process apart")
+    monkeypatch.setattr(settings, "INFERENCE_CPU_AFFINITY", str(cpus[0]))
+    monkeypatch.setattr(cpu, "_applied", {})
+    
+    model_loader.get_model()
+    
+    assert sorted(os.sched_getaffinity(0)) == cpus
+
+def test_model_paths_are_confined_to_the_models_directory(monkeypatch, tmp_path):
+    """Test that only existing .pt files under MODELS_DIR can be registered through the admin API"""
+    models_dir = tmp_path / "models"
+    models_dir.mkdir()
+    (models_dir / "candidate.pt").write_bytes(b"weights")
+    (tmp_path / "outside.pt").write_bytes(b"weights")
+    (models_dir / "notes.txt").write_text("not a model")
+    monkeypatch.setattr(settings, "MODELS_DIR", str(models_dir))
+    
+    assert resolve_model_path("candidate.pt") == str(models_dir / "candidate.pt")
+    for path in ("../outside.pt", str(tmp_path / "outside.pt"), "notes.txt", "missing.pt"):
+        with pytest.raises(ValueError):
+            resolve_model_path(path)
+
+def publish(path, state):
+    """Write a registry file the way another worker's publish_registry does"""
+    (path.parent / "registry.json.tmp").write_text(json.dumps(state))
+    os.replace(path.parent / "registry.json.tmp", path)
+
+def test_registry_changes_reach_other_workers(fake_loader, tmp_path):
+    """Test that a version switch and an unload published by another worker are applied here"""
+    original = model_loader.default_version
+    model_loader.get_model()
+    (tmp_path / "candidate.pt").write_bytes(b"candidate")
+    model_loader.publish_registry()
+    
+    # Another worker registers a version, makes it the default, then unloads everywhere
+    state = json.loads((tmp_path / "registry.json").read_text())
+    state["versions"]["candidate"] = str(tmp_path / "candidate.pt")
+    state["default"] = "candidate"
+    publish(tmp_path / "registry.json", state)
+    
+    assert model_loader.default_version == "candidate"
+    assert original not in model_loader._models  # Retired with nothing in flight
+    assert "candidate" not in model_loader._models  # Loaded by the next detection, not the switch
+    
+    model_loader.get_model()
+    state["unload_generation"] += 1
+    publish(tmp_path / "registry.json", state)
+    
+    assert model_loader.get_stats()["loaded"] is False
+    assert model_loader.get_stats()["last_unload_reason"] == "admin"
+
+def test_parse_warmup_shapes():
+    """Test that warm-up shapes are read as WIDTHxHEIGHT"""
+    assert parse_warmup_shapes("1280x960, 640X840") == [(1280, 960), (640, 840)]
+    assert parse_warmup_shapes("") == []
+    with pytest.raises(ValueError):
+        parse_warmup_shapes("1280")
+
+def test_warm_up_runs_before_the_model_is_published(fake_loader, monkeypatch):
+    """Test that each configured shape is inferred before the first request gets the model"""
+    calls = []
+    
+    class FakeModel:
+        def predict(self, source, **kwargs):
+            calls.append(source.shape)
+            assert model_loader.default_version not in model_loader._models
+            return []
+    
+    monkeypatch.setattr(ModelLoader, "_load_ultralytics_model", staticmethod(lambda model_path: FakeModel()))
+    monkeypatch.setattr(settings, "MODEL_WARMUP_ENABLED", True)
+    monkeypatch.setattr(settings, "MODEL_WARMUP_SHAPES", "320x240,200x100")
+    monkeypatch.setattr(settings, "MODEL_WARMUP_RUNS", 2)
+    
+    model = model_loader.get_model()
+    warmup = model_loader.get_stats()["last_warmup"]
+    
+    assert isinstance(model, FakeModel)
+    assert calls == [(240, 320, 3), (240, 320, 3), (100, 200, 3), (100, 200, 3)]
+    assert warmup["shapes"] == ["320x240", "200x100"]
+    assert warmup["duration_ms"] >= warmup["first_inference_ms"] + warmup["steady_inference_ms"]
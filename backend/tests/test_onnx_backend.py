@@ -0,0 +1,86 @@
+import os
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.ml.onnx_backend import nms, postprocess_output, letterbox
+
+def test_nms_suppresses_overlapping_boxes():
+    """Test that NMS keeps the best of overlapping boxes"""
+    boxes = np.array([
+        [0, 0, 100, 100],
+        [5, 5, 105, 105],
+        [200, 200, 300, 300]
+    ], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+    
+    keep = nms(boxes, scores, iou_threshold=0.45)
+    
+    assert keep.tolist() == [0, 2]
+
+def test_postprocess_output_is_class_aware():
+    """Test that overlapping boxes of different classes are both kept"""
+    # Two anchors on the same box, one per class; layout is (4 + num_classes, num_anchors)
+    output = np.array([
+        [50, 50],    # cx
+        [50, 50],    # cy
+        [40, 40],    # w
+        [40, 40],    # h
+        [0.9, 0.0],  # class 0 score
+        [0.0, 0.8],  # class 1 score
+    ], dtype=np.float32)
+    
+    detections = postprocess_output(output, conf_threshold=0.25, iou_threshold=0.45)
+    
+    assert detections.shape == (2, 6)
+    assert detections[:, 5].tolist() == [0.0, 1.0]
+    np.testing.assert_allclose(detections[0, :4], [30, 30, 70, 70])
+
+def test_letterbox_pads_to_square():
+    """Test letterbox output size and padding"""
+    image = np.zeros((320, 640, 3), dtype=np.uint8)
+    
+    padded, gain, (pad_x, pad_y) = letterbox(image, 640)
+    
+    assert padded.shape == (640, 640, 3)
+    assert gain == 1.0
+    assert (pad_x, pad_y) == (0, 160)
+
+@pytest.mark.skipif(not os.path.exists(settings.MODEL_PATH), reason="Model file not available")
+def test_onnx_matches_ultralytics(tmp_path):
+    """Test that the ONNX backend finds the same boxes as ultralytics"""
+    pytest.importorskip("onnxruntime")
+    ultralytics = pytest.importorskip("ultralytics")
+    import cv2
+    from app.ml.onnx_backend import OnnxCariesModel, export_onnx
+    
+    image_path = str(tmp_path / "test.jpg")
+    rng = np.random.default_rng(0)
+    cv2.imwrite(image_path, rng.integers(0, 255, (480, 640, 3), dtype=np.uint8))
+    
+    reference = ultralytics.YOLO(settings.MODEL_PATH).predict(image_path, conf=0.25, iou=0.45)[0]
+    onnx_model = OnnxCariesModel(export_onnx(settings.MODEL_PATH))
+    result = onnx_model.predict(image_path, conf=0.25, iou=0.45)[0]
+    
+    assert len(result.boxes) == len(reference.boxes)
+    if len(reference.boxes):
+        np.testing.assert_allclose(
+            np.sort(result.boxes.xyxy, axis=0),
+            np.sort(reference.boxes.xyxy.cpu().numpy(), axis=0),
+            atol=2.0
+        )
+
+def test_compare_detections_scores_agreement():
+    """Test box agreement and mAP between reference and candidate detections"""
+    pytest.importorskip("onnxruntime")
+    from app.ml.quantization import compare_detections
+    
+    reference = [np.array([[0, 0, 100, 100, 0.9, 0], [200, 200, 300, 300, 0.8, 1]], dtype=np.float32)]
+    candidate = [np.array([[2, 2, 100, 100, 0.85, 0], [400, 400, 450, 450, 0.3, 1]], dtype=np.float32)]
+    
+    agreement = compare_detections(reference, candidate)
+    
+    assert agreement["matched_boxes"] == 1
+    assert agreement["precision"] == 0.5
+    assert agreement["recall"] == 0.5
+    assert agreement["ap50_per_class"] == {"0": 1.0, "1": 0.0}
+    assert agreement["map50"] == 0.5
@@ -0,0 +1,61 @@
+import numpy as np
+from app.ml.onnx_backend import OnnxResults
+from app.ml.postprocessor import DetectionColumns, ResultProcessor
+
+def make_result(boxes: np.ndarray, image_shape=(300, 600, 3)):
+    return OnnxResults(
+        path="",
+        orig_img=np.zeros(image_shape, dtype=np.uint8),
+        boxes=boxes,
+        names={0: "enamel", 1: "dentin", 2: "pulp"}
+    )
+
+def test_columnar_matches_per_box_rules():
+    """Test that vectorized processing agrees with the scalar classification rules"""
+    rng = np.random.default_rng(0)
+    x1y1 = rng.uniform(0, 250, size=(50, 2))
+    boxes = np.column_stack([
+        x1y1,
+        x1y1 + rng.uniform(5, 50, size=(50, 2)),
+        rng.uniform(0.25, 1.0, size=50),
+        rng.integers(0, 4, size=50)  # Class 3 is unknown and falls back to enamel
+    ]).astype(np.float32)
+    image_shape = (300, 600, 3)
+    
+    detections = ResultProcessor().process_results([make_result(boxes, image_shape)], image_shape).to_dicts()
+    
+    assert len(detections) == 50
+    for det, box in zip(detections, boxes):
+        x1, y1, x2, y2 = box[:4].tolist()
+        confidence = float(box[4])
+        caries_type = {0: "enamel", 1: "dentin", 2: "pulp"}.get(int(box[5]), "enamel")
+        severity = ResultProcessor.classify_severity(confidence)
+        
+        assert det["confidence"] == confidence
+        assert det["bbox"] == {"x": x1, "y": y1, "width": x2 - x1, "height": y2 - y1}
+        assert det["area_mm2"] == (x2 - x1) * (y2 - y1)
+        assert det["severity"] == severity
+        assert det["caries_type"] == caries_type
+        assert det["location"] == ResultProcessor.determine_location([x1, y1, x2, y2], image_shape)
+        assert det["treatment_recommendation"] == ResultProcessor.generate_treatment_recommendation(severity, caries_type)
+
+def test_no_boxes():
+    """Test that an image without findings yields no detections"""
+    result = make_result(np.zeros((0, 6), dtype=np.float32))
+    
+    columns = ResultProcessor().process_results([result], (300, 600, 3))
+    
+    assert len(columns) == 0
+    assert columns.to_dicts() == []
+
+def test_stored_findings_round_trip():
+    """Test that findings stored as rows, including edited ones, come back unchanged as columns"""
+    boxes = np.array([[10, 20, 60, 80, 0.9, 1], [100, 200, 130, 260, 0.5, 0]], dtype=np.float32)
+    findings = ResultProcessor().process_results([make_result(boxes)], (300, 600, 3)).to_dicts()
+    findings[1]["treatment_recommendation"] = "Monitor at next recall"
+    findings[1]["location"] = None
+    
+    columns = DetectionColumns.from_dicts(findings)
+    
+    assert columns.to_dicts() == findings
+    assert len(DetectionColumns.from_dicts([])) == 0
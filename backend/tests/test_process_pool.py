@@ -0,0 +1,32 @@
+import os
+import pytest
+from app.ml.process_pool import InferencePool, parse_cpu_sets
+
+def test_explicit_cpu_sets():
+    """Test that one CPU set is parsed per worker"""
+    assert parse_cpu_sets("0-1;2,3;4", 3) == [[0, 1], [2, 3], [4]]
+    assert parse_cpu_sets("0-1;2-3;4-5", 2) == [[0, 1], [2, 3]]
+
+def test_too_few_cpu_sets():
+    """Test that a worker without a CPU set is rejected"""
+    with pytest.raises(ValueError):
+        parse_cpu_sets("0-1", 2)
+
+def test_default_cpu_sets_are_disjoint_when_possible():
+    """Test that available CPUs are split between workers"""
+    cpu_sets = parse_cpu_sets("", 2)
+    
+    assert len(cpu_sets) == 2
+    assert all(cpu_sets)
+    if len(os.sched_getaffinity(0)) >= 2:
+        assert not set(cpu_sets[0]) & set(cpu_sets[1])
+
+def test_stats_before_first_use():
+    """Test that no worker is started until a detection is submitted"""
+    pool = InferencePool(2, "0;0")
+    
+    stats = pool.get_stats()
+    
+    assert pool._executor is None
+    assert stats["in_flight"] == 0
+    assert stats["utilization"] == 0.0
@@ -0,0 +1,58 @@
+import cv2
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.ml.quality import assess_image_quality
+from app.utils.image_utils import decode_reduced_grayscale
+from benchmarks.synthetic import encode_jpeg, make_radiograph
+
+def assess(image: np.ndarray):
+    gray = decode_reduced_grayscale(encode_jpeg(image))
+    return assess_image_quality(gray, (image.shape[1], image.shape[0]))
+
+def checks(image: np.ndarray):
+    return [issue["check"] for issue in assess(image)["issues"]]
+
+def motion_blur(image: np.ndarray, length: int) -> np.ndarray:
+    kernel = np.zeros((length, length), dtype=np.float32)
+    kernel[length // 2, :] = 1 / length
+    return cv2.filter2D(image, -1, kernel)
+
+@pytest.mark.parametrize("size", [(640, 840), (1280, 960), (2900, 1400)])
+def test_usable_radiographs_pass(size):
+    """Test that sharp, dim and bright but usable captures pass"""
+    image = make_radiograph(*size)
+    
+    for variant in (image, cv2.convertScaleAbs(image, alpha=0.5), cv2.convertScaleAbs(image, alpha=1.2, beta=20)):
+        result = assess(variant)
+        assert result["passed"], result
+
+def test_blur_is_rejected():
+    """Test that heavy motion and focus blur fail the blur check"""
+    image = make_radiograph(1280, 960)
+    
+    assert checks(motion_blur(image, 51)) == ["blur"]
+    assert checks(cv2.GaussianBlur(image, (0, 0), 6)) == ["blur"]
+
+def test_bad_exposure_is_rejected_for_its_root_cause():
+    """Test that over- and underexposed captures fail the exposure checks, not the blur check"""
+    image = make_radiograph(1280, 960)
+    
+    assert checks(cv2.convertScaleAbs(image, alpha=2.5, beta=60)) == ["overexposed"]
+    assert checks(cv2.convertScaleAbs(image, alpha=0.15)) == ["underexposed"]
+
+def test_blank_and_small_images_are_rejected():
+    """Test that uniform images fail the blank check and small ones the resolution check"""
+    assert checks(np.full((960, 1280, 3), 255, dtype=np.uint8)) == ["blank"]
+    assert checks(np.full((960, 1280, 3), 3, dtype=np.uint8)) == ["blank"]
+    assert checks(make_radiograph(320, 240)) == ["resolution"]
+
+def test_thresholds_come_from_settings(monkeypatch):
+    """Test that the gate uses the configured thresholds"""
+    image = motion_blur(make_radiograph(1280, 960), 51)
+    monkeypatch.setattr(settings, "QUALITY_MIN_SHARPNESS", 5.0)
+    
+    result = assess(image)
+    
+    assert result["passed"]
+    assert 5.0 < result["metrics"]["sharpness"] < 20.0
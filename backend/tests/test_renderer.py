@@ -0,0 +1,40 @@
+import cv2
+import numpy as np
+import pytest
+from app.ml.postprocessor import DetectionColumns
+from app.ml.renderer import AnnotationRenderer
+
+def make_detection(severity: str):
+    return {
+        "bbox": {"x": 10, "y": 40, "width": 50, "height": 30},
+        "severity": severity,
+        "caries_type": "enamel",
+        "confidence": 0.9,
+        "location": "occlusal",
+        "area_mm2": 1500.0,
+        "treatment_recommendation": "Immediate restoration required"
+    }
+
+def test_render_draws_severity_color():
+    """Test that boxes are drawn in the severity color without touching the input"""
+    image = np.zeros((200, 200, 3), dtype=np.uint8)
+    
+    annotated = AnnotationRenderer.render(image, DetectionColumns.from_dicts([make_detection("severe")]))
+    
+    assert image.sum() == 0
+    assert tuple(annotated[55, 10]) == AnnotationRenderer.SEVERITY_COLORS["severe"]
+
+@pytest.mark.parametrize("image_format", ["jpg", "webp"])
+def test_encode_round_trips(image_format):
+    """Test that encoded buffers decode back to the same image size"""
+    image = np.full((120, 160, 3), 128, dtype=np.uint8)
+    
+    buffer = AnnotationRenderer.encode(image, image_format)
+    decoded = cv2.imdecode(np.frombuffer(buffer, dtype=np.uint8), cv2.IMREAD_COLOR)
+    
+    assert decoded.shape == image.shape
+
+def test_encode_rejects_unknown_format():
+    """Test that unsupported formats raise"""
+    with pytest.raises(ValueError):
+        AnnotationRenderer.encode(np.zeros((10, 10, 3), dtype=np.uint8), "gif")
@@ -0,0 +1,18 @@
+from benchmarks.suites.startup import _package_times, probe
+
+def test_app_starts_without_heavy_libraries(tmp_path):
+    """Test that ML, image and PDF libraries are only imported on first use"""
+    result = probe(str(tmp_path))
+    
+    assert result["heavy_modules"] == []
+
+def test_package_times():
+    """Test that -X importtime self times are summed per top-level package"""
+    log = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:      1500 |       1500 |     numpy.core",
+        "import time:       500 |       2000 |   numpy",
+        "import time:       250 |       2250 | app.main"
+    ])
+    
+    assert _package_times(log) == {"numpy": 2.0, "app": 0.25}
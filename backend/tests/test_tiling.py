@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+import numpy as np
+from app.ml import predictor
+from app.ml.onnx_backend import OnnxResults
+from app.ml.predictor import CariesDetector
+from app.ml.tiling import make_tiles, merge_tile_detections
+
+def test_tiles_cover_panoramic_with_overlap():
+    """Test that tiles cover the whole image and overlap their neighbours"""
+    tiles = make_tiles(1500, 3000, tile_size=640, overlap=0.2, max_tiles=24)
+    
+    covered = np.zeros((1500, 3000), dtype=bool)
+    for x1, y1, x2, y2 in tiles:
+        assert x2 - x1 == 640 and y2 - y1 == 640
+        covered[y1:y2, x1:x2] = True
+    assert covered.all()
+    assert len(tiles) <= 24
+    assert tiles[1][0] < tiles[0][2]
+
+def test_tiles_grow_to_respect_max_count():
+    """Test that the tile size grows instead of exceeding the tile budget"""
+    tiles = make_tiles(1500, 3000, tile_size=640, overlap=0.2, max_tiles=4)
+    
+    assert len(tiles) <= 4
+    assert tiles[-1][2] == 3000 and tiles[-1][3] == 1500
+
+def test_small_image_is_a_single_tile():
+    """Test that an image smaller than a tile is not split"""
+    assert make_tiles(400, 500, tile_size=640) == [(0, 0, 500, 400)]
+
+def test_wbf_fuses_box_split_across_tiles():
+    """Test that a lesion cut by a tile edge is fused with the full box, per class"""
+    detections = np.array([
+        [100, 100, 200, 160, 0.9, 1],  # Full box from one tile
+        [100, 100, 150, 160, 0.6, 1],  # Same lesion cut off by the neighbouring tile
+        [100, 100, 200, 160, 0.7, 2],  # Overlapping finding of another class
+    ], dtype=np.float32)
+    
+    merged = merge_tile_detections(detections, method="wbf", match_threshold=0.5)
+    
+    assert len(merged) == 2
+    fused = merged[merged[:, 5] == 1][0]
+    assert fused[4] == np.float32(0.9)
+    assert 150 < fused[2] < 200
+
+def test_nms_is_class_aware():
+    """Test that NMS only suppresses boxes of the same class"""
+    detections = np.array([
+        [100, 100, 200, 160, 0.9, 1],
+        [102, 100, 200, 160, 0.6, 1],
+        [100, 100, 200, 160, 0.7, 2],
+    ], dtype=np.float32)
+    
+    merged = merge_tile_detections(detections, method="nms", match_threshold=0.5)
+    
+    assert sorted(merged[:, 4].tolist()) == [np.float32(0.7), np.float32(0.9)]
+
+def test_detect_tiled_maps_boxes_to_image_coordinates(monkeypatch):
+    """Test that tile boxes are shifted back and duplicates from overlaps are merged"""
+    image = np.zeros((640, 1100, 3), dtype=np.uint8)
+    image[300:340, 560:600] = 255  # One lesion inside the overlap of both tiles
+    
+    class FakeModel:
+        def predict(self, source, **kwargs):
+            results = []
+            for crop in source:
+                ys, xs = np.nonzero(crop[:, :, 0])
+                boxes = np.array([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1, 0.9, 0]], dtype=np.float32)
+                results.append(OnnxResults("", crop, boxes, {0: "enamel"}))
+            return results
+    
+    @contextmanager
+    def fake_acquire(version=None):
+        yield "test", FakeModel()
+    
+    monkeypatch.setattr(predictor.model_loader, "acquire", fake_acquire)
+    monkeypatch.setattr(predictor.settings, "TILE_SIZE", 640)
+    monkeypatch.setattr(predictor.settings, "TILE_OVERLAP", 0.2)
+    
+    output = CariesDetector().detect_tiled(image)
+    
+    assert output["tile_count"] == 2
+    boxes = output["results"][0].boxes.data
+    assert boxes.shape == (1, 6)
+    assert boxes[0, :4].tolist() == [560, 300, 600, 340]
@@ -0,0 +1,28 @@
+import time
+from app.utils.timing import StageTimer
+
+def test_stages_accumulate():
+    """Test that repeated stages add up and the total covers every stage"""
+    timer = StageTimer()
+    
+    with timer.stage("decode"):
+        time.sleep(0.01)
+    with timer.stage("decode"):
+        time.sleep(0.01)
+    timer.add("inference", 5.0)
+    
+    assert timer.timings["decode"] >= 20.0
+    assert timer.total_ms() == round(timer.timings["decode"] + 5.0, 3)
+
+def test_records_into_given_timings():
+    """Test that a breakdown started elsewhere is continued in place"""
+    timings = {"upload_save": 1.5}
+    
+    timer = StageTimer(timings)
+    try:
+        with timer.stage("cloudinary_original"):
+            raise RuntimeError("upload failed")
+    except RuntimeError:
+        pass
+    
+    assert set(timings) == {"upload_save", "cloudinary_original"}
@@ -11,7 +11,7 @@ CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE TYPE user_role AS ENUM ('dentist', 'admin', 'assistant');
 CREATE TYPE gender_type AS ENUM ('male', 'female', 'other');
 CREATE TYPE image_type AS ENUM ('intraoral', 'bitewing', 'periapical', 'panoramic');
-CREATE TYPE detection_status AS ENUM ('pending', 'completed', 'reviewed');
+CREATE TYPE detection_status AS ENUM ('pending', 'completed', 'reviewed', 'failed');
 CREATE TYPE caries_type AS ENUM ('enamel', 'dentin', 'pulp');
 CREATE TYPE severity_type AS ENUM ('mild', 'moderate', 'severe');
 
@@ -32,7 +32,11 @@ export const DetectionProvider: React.FC<DetectionProviderProps> = ({ children }
       setCurrentDetection(detection);
       return detection;
     } catch (err: any) {
-      const errorMessage = err.response?.data?.detail || 'Failed to create detection';
+      const detail = err.response?.data?.detail;
+      // Rejected by the quality gate: the retake prompt and what to fix
+      const errorMessage = detail?.retake
+        ? [detail.message, ...detail.images.flatMap((image: any) => image.issues.map((issue: any) => issue.message))].join(' ')
+        : detail || 'Failed to create detection';
       setError(errorMessage);
       throw new Error(errorMessage);
     } finally {